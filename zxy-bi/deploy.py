@@ -19,6 +19,7 @@ class DashboardDeployer:
         self.project_root = Path(__file__).parent
         self.deployment_files = [
             'app.py',
+            'gunicorn.conf.py',
             'requirements.txt',
             'templates/',
             'static/',
@@ -114,7 +115,7 @@ export FLASK_ENV=production
 
 # Start the application with Gunicorn
 echo "   🌐 Starting server on http://{self.target_server}:{self.target_port}"
-gunicorn -w 4 -b 0.0.0.0:{self.target_port} app:app --daemon
+gunicorn -c gunicorn.conf.py -w 4 -b 0.0.0.0:{self.target_port} app:app --daemon
 
 echo "   ✅ ZXY Dashboard started successfully!"
 echo "   🌐 Access at: http://{self.target_server}:{self.target_port}"
@@ -171,7 +172,7 @@ User=www-data
 Group=www-data
 WorkingDirectory=/var/www/zxy-dashboard
 Environment=PATH=/var/www/zxy-dashboard/venv/bin
-ExecStart=/var/www/zxy-dashboard/venv/bin/gunicorn -w 4 -b 0.0.0.0:{self.target_port} app:app --daemon
+ExecStart=/var/www/zxy-dashboard/venv/bin/gunicorn -c gunicorn.conf.py -w 4 -b 0.0.0.0:{self.target_port} app:app --daemon
 ExecReload=/bin/kill -s HUP $MAINPID
 Restart=always
 
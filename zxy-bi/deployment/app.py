@@ -3,14 +3,28 @@ ZXY Business Intelligence Dashboard
 Main Flask Application
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request, stream_with_context
+import hmac
 from flask_cors import CORS
 import os
 from datetime import datetime, timedelta
 import json
 import random
+import itertools
 import logging
-from app.models.dashboard_data import DashboardDataModel
+from app.models.dashboard_data import DashboardDataModel, CPO_FIELDS
+from app.cache import CachedDashboardModel
+from app.models.table_store import OrderTableStore, DEFAULT_PAGE_SIZE
+from app.models.rollup_cube import DIMENSION_KEYS
+from app.models.order_analytics import OrderQuery, order_analytics_from_env
+from app.sections import SectionFanout, build_sections
+from app.snapshots import SnapshotStore, SnapshotScheduler
+from app.http_cache import init_http_cache
+from app.payload_cache import payload_cache_from_env
+from app.json_provider import FastJSONProvider
+from app.wire_format import (ARROW_STREAM_MIMETYPE, frame_from_records, requested_format,
+                             to_arrow_stream, to_columnar)
+from app.metrics import DashboardMetrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,14 +32,105 @@ logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
 # Configuration
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'zxy-bi-dashboard-secret-key')
 app.config['DEBUG'] = os.environ.get('FLASK_DEBUG', True)
 
-# Initialize data model
-dashboard_data = DashboardDataModel()
+# Prometheus metrics; registered before the HTTP cache so response sizes
+# are measured after compression
+dashboard_metrics = DashboardMetrics()
+dashboard_metrics.init_app(app)
+
+# ETags, conditional GETs and compression for JSON API responses
+http_cache = init_http_cache(app)
+
+# Encoded responses, reused while the data they were built from is unchanged
+payload_cache = payload_cache_from_env(http_cache)
+dashboard_metrics.observe_stats('payload', payload_cache.stats)
+
+# Initialize data model behind the result cache
+data_model = DashboardDataModel()
+dashboard_metrics.instrument_model(data_model)
+dashboard_metrics.instrument_database(data_model.db)
+dashboard_data = CachedDashboardModel(data_model)
+dashboard_metrics.instrument_cache(dashboard_data)
+dashboard_metrics.observe_stats('result', dashboard_data.cache.stats)
+
+# Order table extract backing the data table, loaded once per worker (CSV, Arrow or Parquet)
+order_table = OrderTableStore(
+    os.environ.get(
+        'ORDER_TABLE_PATH',
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '..', 'data', 'data.csv')
+    )
+)
+
+# Ad-hoc filters, group-bys and top-N over the order table (DuckDB when installed)
+order_analytics = order_analytics_from_env(order_table)
+
+# Everything the dashboard page loads, fetched concurrently by /api/dashboard
+dashboard_sections = SectionFanout(build_sections(dashboard_data, order_table))
+dashboard_metrics.instrument_sections(dashboard_sections)
+
+# Precomputed dashboard snapshots, recomputed in the background by one worker
+# and served to all of them instead of live queries
+snapshot_store = None
+snapshot_scheduler = None
+if os.environ.get('DASHBOARD_SNAPSHOT_PATH'):
+    try:
+        snapshot_store = SnapshotStore(os.environ['DASHBOARD_SNAPSHOT_PATH'])
+    except OSError as e:
+        logger.error(f"Cannot use dashboard snapshots, serving live queries: {e}")
+if snapshot_store is not None:
+    snapshot_scheduler = SnapshotScheduler(
+        snapshot_store,
+        # Bypass the result cache so each run reads the database
+        SectionFanout(build_sections(dashboard_data.model, order_table)),
+        # The table is read from the local extract already
+        [name for name in dashboard_sections.names() if name != 'table-data'],
+        interval=float(os.environ.get('DASHBOARD_SNAPSHOT_INTERVAL', 60)),
+        healthcheck=dashboard_data.model.db.test_connection
+    )
+    snapshot_scheduler.ensure_started()
+
+def model_payload(*keys):
+    """Cache a view's encoded response while the named model results are unchanged"""
+    return payload_cache.cached(
+        lambda: dashboard_data.data_version(*keys),
+        lambda: dashboard_data.fresh_ttl(*keys)
+    )
+
+def table_payload():
+    """Cache a view's encoded response until the order table file changes"""
+    def version():
+        # An unreadable table is left to the view, which answers with its own error
+        try:
+            return order_table.snapshot().version
+        except Exception as e:
+            logger.warning(f"Order table version unavailable, bypassing the payload cache: {e}")
+            return None
+    return payload_cache.cached(version)
+
+def wire_response(wire_format, frame, envelope=None):
+    """Respond with frame as columnar JSON or an Arrow stream (format=columnar/arrow)
+    
+    envelope holds the other fields of a paged response; the columns go under
+    its 'data' key, or for Arrow the envelope goes in the stream metadata.
+    """
+    if wire_format == 'arrow':
+        return Response(to_arrow_stream(frame, envelope), mimetype=ARROW_STREAM_MIMETYPE)
+    data = to_columnar(frame)
+    return jsonify(data if envelope is None else {**envelope, 'data': data})
+
+# Query parameters that switch /api/table-data to server-side paging
+TABLE_QUERY_PARAMS = ('page', 'page_size', 'sort', 'order', 'q', 'customer_group')
+
+# CPO detail paging and streaming limits
+CPO_COLUMNS = [field.name for field in CPO_FIELDS]
+CPO_MAX_PAGE_SIZE = 1000
+CPO_STREAM_CHUNK_SIZE = int(os.environ.get('CPO_STREAM_CHUNK_SIZE', 1000))
 
 # Sample data for demonstration
 def generate_sample_data():
@@ -101,12 +206,69 @@ def generate_sample_data():
         ]
     }
 
+@app.before_request
+def serve_from_snapshot():
+    """Answer dashboard section requests from the latest snapshot when one exists"""
+    if snapshot_scheduler is None:
+        return None
+    # Restarts the scheduler in a worker forked after the app was loaded
+    snapshot_scheduler.ensure_started()
+    if request.method != 'GET' or request.args or not request.path.startswith('/api/'):
+        return None
+    name = request.path[len('/api/'):]
+    if name not in snapshot_scheduler.names:
+        return None
+    snapshot = snapshot_store.read(name)
+    if snapshot is None:
+        return None
+    response = jsonify(snapshot.payload)
+    response.headers.update(snapshot.headers())
+    return response
+
 @app.route('/')
 def dashboard():
     """Main dashboard route"""
     return render_template('dashboard.html')
 
+@app.route('/api/dashboard')
+def get_dashboard():
+    """API endpoint for the whole dashboard in one response
+    
+    Sections are loaded concurrently; a section that fails is replaced by its
+    sample data and reported under errors. sections takes a comma-separated
+    subset of the section names (default: all). Sections with a precomputed
+    snapshot are served from it, and the oldest snapshot used is reported in
+    the X-Snapshot-* headers.
+    """
+    names = [name.strip() for name in request.args.get('sections', '').split(',') if name.strip()]
+    names = names or dashboard_sections.names()
+    
+    snapshots = {}
+    if snapshot_store is not None:
+        for name in names:
+            snapshot = snapshot_store.read(name) if name in snapshot_scheduler.names else None
+            if snapshot is not None:
+                snapshots[name] = snapshot
+    
+    try:
+        sections, errors = dashboard_sections.fetch([name for name in names if name not in snapshots])
+    except ValueError as e:
+        return jsonify({'error': str(e), 'valid_sections': dashboard_sections.names()}), 400
+    sections.update({name: snapshot.payload for name, snapshot in snapshots.items()})
+    
+    logger.info(f"Retrieved {len(sections)} dashboard sections ({len(snapshots)} from snapshot, {len(errors)} with errors)")
+    response = jsonify({
+        'sections': sections,
+        'errors': errors,
+        'generated_at': datetime.now().isoformat()
+    })
+    if snapshots:
+        oldest = min(snapshots.values(), key=lambda snapshot: snapshot.generated_at)
+        response.headers.update(oldest.headers())
+    return response
+
 @app.route('/api/kpis')
+@model_payload('kpis')
 def get_kpis():
     """API endpoint for KPI data"""
     try:
@@ -115,11 +277,13 @@ def get_kpis():
         return jsonify(kpis)
     except Exception as e:
         logger.error(f"Error fetching KPIs: {e}")
+        dashboard_metrics.record_fallback('app')
         # Fallback to sample data
         data = generate_sample_data()
         return jsonify(data['kpis'])
 
 @app.route('/api/alerts')
+@model_payload('alerts')
 def get_alerts():
     """API endpoint for alerts data"""
     try:
@@ -128,6 +292,7 @@ def get_alerts():
         return jsonify(alerts)
     except Exception as e:
         logger.error(f"Error fetching alerts: {e}")
+        dashboard_metrics.record_fallback('app')
         # Fallback to sample data
         data = generate_sample_data()
         # Convert datetime objects to strings for JSON serialization
@@ -139,6 +304,7 @@ def get_alerts():
         return jsonify(alerts)
 
 @app.route('/api/sales-pipeline')
+@model_payload('sales-pipeline')
 def get_sales_pipeline():
     """API endpoint for sales pipeline data"""
     try:
@@ -147,11 +313,13 @@ def get_sales_pipeline():
         return jsonify(pipeline)
     except Exception as e:
         logger.error(f"Error fetching sales pipeline: {e}")
+        dashboard_metrics.record_fallback('app')
         # Fallback to sample data
         data = generate_sample_data()
         return jsonify(data['sales_pipeline'])
 
 @app.route('/api/chart-data/<chart_type>')
+@model_payload('chart-data')
 def get_chart_data(chart_type):
     """API endpoint for chart data"""
     try:
@@ -179,6 +347,7 @@ def get_chart_data(chart_type):
 
 def get_fallback_chart_data(chart_type):
     """Generate fallback chart data when database is unavailable"""
+    dashboard_metrics.record_fallback('app')
     if chart_type == 'sales-trend':
         # Generate sample sales trend data
         months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun']
@@ -213,6 +382,7 @@ def get_fallback_chart_data(chart_type):
         return jsonify({'error': 'Chart type not found'}), 404
 
 @app.route('/api/financial-years')
+@model_payload('financial-years')
 def get_financial_years():
     """API endpoint for financial year data"""
     try:
@@ -221,6 +391,7 @@ def get_financial_years():
         return jsonify(financial_years)
     except Exception as e:
         logger.error(f"Error fetching financial years: {e}")
+        dashboard_metrics.record_fallback('app')
         # Fallback to sample data
         return jsonify([
             {'id': 1, 'name': 'FY 2024-25', 'start_date': '2024-04-01', 'end_date': '2025-03-31', 'is_active': True},
@@ -228,6 +399,7 @@ def get_financial_years():
         ])
 
 @app.route('/api/customer-groups')
+@model_payload('customer-groups')
 def get_customer_groups():
     """API endpoint for customer group data"""
     try:
@@ -236,6 +408,7 @@ def get_customer_groups():
         return jsonify(customer_groups)
     except Exception as e:
         logger.error(f"Error fetching customer groups: {e}")
+        dashboard_metrics.record_fallback('app')
         # Fallback to sample data
         return jsonify([
             {'id': 1, 'name': 'Premium Customers', 'description': 'High-value customers with premium service', 'is_active': True},
@@ -243,17 +416,45 @@ def get_customer_groups():
             {'id': 3, 'name': 'Wholesale Partners', 'description': 'Bulk purchase partners and distributors', 'is_active': True}
         ])
 
-@app.route('/api/refresh-data')
+@app.route('/api/refresh-data', methods=['POST'])
 def refresh_data():
-    """API endpoint to refresh dashboard data"""
-    # In a real application, this would trigger data refresh from databases
+    """API endpoint to refresh dashboard data by invalidating cached results
+    
+    Snapshots are dropped as well, whatever the key, and the snapshot leader
+    (in whichever worker) recomputes them within a second or so; sections
+    are answered live until then. Forces cold reloads
+    from the database, so it requires the admin token like /api/admin/*.
+    """
+    denied = check_admin_token()
+    if denied:
+        return denied
+    key = request.args.get('key')
+    if key and key not in dashboard_data.cache_keys():
+        return jsonify({
+            'status': 'error',
+            'message': f'Unknown cache key: {key}',
+            'valid_keys': dashboard_data.cache_keys()
+        }), 400
+    
+    invalidated = dashboard_data.invalidate(key)
+    if key is None:
+        payload_cache.clear()
+    if snapshot_store is not None:
+        snapshot_store.request_refresh()
+    logger.info(f"Invalidated {invalidated} cached results ({key or 'all'})")
     return jsonify({
         'status': 'success',
         'message': 'Data refreshed successfully',
+        'key': key or 'all',
+        'invalidated': invalidated,
+        'cache': dashboard_data.cache.stats(),
+        'payloads': payload_cache.stats(),
+        'snapshots': snapshot_store.stats() if snapshot_store else None,
         'timestamp': datetime.now().isoformat()
     })
 
 @app.route('/api/countries')
+@model_payload('countries')
 def get_countries():
     """API endpoint for country list"""
     try:
@@ -262,6 +463,7 @@ def get_countries():
         return jsonify(countries)
     except Exception as e:
         logger.error(f"Error fetching countries: {e}")
+        dashboard_metrics.record_fallback('app')
         return jsonify([
             {'id': None, 'name': 'Bangladesh'},
             {'id': None, 'name': 'Türkiye'},
@@ -271,6 +473,7 @@ def get_countries():
         ])
 
 @app.route('/api/customer-order-metrics')
+@model_payload('customer-order-metrics')
 def get_customer_order_metrics():
     """API endpoint for customer order metrics"""
     try:
@@ -279,6 +482,7 @@ def get_customer_order_metrics():
         return jsonify(metrics)
     except Exception as e:
         logger.error(f"Error fetching customer order metrics: {e}")
+        dashboard_metrics.record_fallback('app')
         return jsonify({
             'quantity': 247,
             'value': 12500000.0,
@@ -288,58 +492,153 @@ def get_customer_order_metrics():
 
 @app.route('/api/cpo-detailed-data')
 def get_cpo_detailed_data():
-    """API endpoint for detailed CPO data"""
+    """API endpoint for detailed CPO data
+    
+    By default returns the latest 100 rows. Keyset paging over the full
+    history is available with page_size (and after_date/after_id from the
+    previous page's next_cursor); stream=ndjson or stream=json streams every
+    matching row as it is fetched. format=columnar or format=arrow returns the
+    rows (not streams) column by column.
+    """
+    customer_name = request.args.get('customer_name')
+    stream_format = request.args.get('stream')
+    try:
+        wire_format = requested_format(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if stream_format or any(param in request.args for param in ('page_size', 'after_date', 'after_id')):
+        try:
+            after_date, after_id = parse_cpo_cursor(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if stream_format:
+            if wire_format != 'json':
+                return jsonify({'error': 'format cannot be combined with stream'}), 400
+            return stream_cpo_detailed_data(stream_format, customer_name, after_date, after_id)
+        
+        page_size = request.args.get('page_size', 100, type=int)
+        if not 1 <= page_size <= CPO_MAX_PAGE_SIZE:
+            return jsonify({'error': f'page_size must be between 1 and {CPO_MAX_PAGE_SIZE}'}), 400
+        try:
+            page = dashboard_data.get_cpo_page(customer_name, after_date, after_id, page_size)
+            logger.info(f"Retrieved {len(page['data'])} CPO records from database (keyset page)")
+        except Exception as e:
+            logger.error(f"Error fetching CPO detailed data page: {e}")
+            page = {'data': [], 'page_size': page_size, 'next_cursor': None}
+        if wire_format == 'json':
+            return jsonify(page)
+        envelope = {key: value for key, value in page.items() if key != 'data'}
+        return wire_response(wire_format, frame_from_records(page['data'], CPO_COLUMNS), envelope)
+    
     try:
-        customer_name = request.args.get('customer_name')
         cpo_data = dashboard_data.get_cpo_detailed_data(customer_name)
         logger.info(f"Retrieved {len(cpo_data)} CPO records from database")
-        return jsonify(cpo_data)
     except Exception as e:
         logger.error(f"Error fetching CPO detailed data: {e}")
+        cpo_data = []
+    if wire_format == 'json':
+        return jsonify(cpo_data)
+    return wire_response(wire_format, frame_from_records(cpo_data, CPO_COLUMNS))
+
+def parse_cpo_cursor(args):
+    """Read the after_date/after_id keyset cursor from request arguments"""
+    after_date = args.get('after_date')
+    after_id = args.get('after_id')
+    if after_date is None and after_id is None:
+        return None, None
+    if after_date is None or after_id is None:
+        raise ValueError('after_date and after_id must be given together')
+    try:
+        return datetime.fromisoformat(after_date), int(after_id)
+    except ValueError:
+        raise ValueError('after_date must be an ISO timestamp and after_id an integer')
+
+def stream_cpo_detailed_data(stream_format, customer_name, after_date, after_id):
+    """Stream CPO rows as NDJSON or as one chunked JSON array"""
+    if stream_format not in ('ndjson', 'json'):
+        return jsonify({'error': "stream must be 'ndjson' or 'json'"}), 400
+    chunk_size = min(max(request.args.get('chunk_size', CPO_STREAM_CHUNK_SIZE, type=int), 1), 10000)
+    
+    chunks = dashboard_data.iter_cpo_detailed_data(customer_name, after_date, after_id, chunk_size)
+    try:
+        # Fetch the first chunk up front so connection errors still get a normal response
+        first_chunk = next(chunks, [])
+    except Exception as e:
+        logger.error(f"Error streaming CPO detailed data: {e}")
         return jsonify([])
+    
+    def generate():
+        row_count = 0
+        try:
+            if stream_format == 'json':
+                yield '['
+            for chunk in itertools.chain([first_chunk], chunks):
+                for record in chunk:
+                    encoded = app.json.dumps(record)
+                    if stream_format == 'ndjson':
+                        yield encoded + '\n'
+                    else:
+                        yield (',' if row_count else '') + encoded
+                    row_count += 1
+            if stream_format == 'json':
+                yield ']'
+            logger.info(f"Streamed {row_count} CPO records from database")
+        except Exception as e:
+            # Headers are already sent; the truncated body signals the failure
+            logger.error(f"CPO stream aborted after {row_count} records: {e}")
+    
+    mimetype = 'application/x-ndjson' if stream_format == 'ndjson' else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
 
 @app.route('/api/table-data')
+@table_payload()
 def get_table_data():
-    """API endpoint for data table CSV data"""
+    """API endpoint for data table CSV data
+    
+    Without query parameters the whole table is returned. With any of page,
+    page_size, sort, order, q or customer_group, only the requested page is
+    returned along with the total number of matching rows. format=columnar or
+    format=arrow returns the rows column by column.
+    """
     try:
-        import pandas as pd
-        import os
-        import numpy as np
-        
-        # Path to the CSV file
-        csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '..', 'data', 'data.csv')
-        
-        # Read CSV file
-        df = pd.read_csv(csv_path)
-        
-        # Replace NaN values with appropriate defaults
-        df = df.fillna({
-            'Customer Group': '',
-            'CustomerName': '',
-            'FactoryName': '',
-            'Order Value': 0,
-            'Order Quantity': 0,
-            'Margin': 0
-        })
-        
-        # Convert to list of dictionaries
-        data = df.to_dict('records')
-        
-        # Ensure all numeric values are properly formatted
-        for record in data:
-            for key, value in record.items():
-                if pd.isna(value) or value is np.nan:
-                    if key in ['Order Value', 'Order Quantity', 'Margin']:
-                        record[key] = 0
-                    else:
-                        record[key] = ''
+        wire_format = requested_format(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if any(param in request.args for param in TABLE_QUERY_PARAMS):
+        try:
+            result = order_table.query(
+                page=request.args.get('page', 1, type=int),
+                page_size=request.args.get('page_size', DEFAULT_PAGE_SIZE, type=int),
+                sort=request.args.get('sort') or None,
+                order=request.args.get('order', 'asc'),
+                q=request.args.get('q', '').strip() or None,
+                customer_group=request.args.get('customer_group') or None
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.error(f"Error querying table data: {e}")
+            return jsonify({'error': 'Table data unavailable'}), 503
+        logger.info(f"Retrieved page {result['page']} ({len(result['data'])} of {result['total']} records)")
+        if wire_format == 'json':
+            return jsonify(result)
+        envelope = {key: value for key, value in result.items() if key != 'data'}
+        return wire_response(wire_format, frame_from_records(result['data'], order_table.schema), envelope)
+    
+    try:
+        if wire_format != 'json':
+            frame = order_table.frame()
+            logger.info(f"Retrieved {len(frame)} records from CSV file ({wire_format})")
+            return wire_response(wire_format, frame)
+        data = order_table.records()
         
         logger.info(f"Retrieved {len(data)} records from CSV file")
         return jsonify(data)
     except Exception as e:
         logger.error(f"Error reading CSV file: {e}")
+        dashboard_metrics.record_fallback('app')
         # Return sample data if CSV reading fails
-        return jsonify([
+        sample = [
             {
                 "Customer Group": "ABC S.A.",
                 "CustomerName": "ABC S.A.",
@@ -356,7 +655,108 @@ def get_table_data():
                 "Order Quantity": 1098,
                 "Margin": 2718
             }
-        ])
+        ]
+        if wire_format != 'json':
+            return wire_response(wire_format, frame_from_records(sample, order_table.schema))
+        return jsonify(sample)
+
+@app.route('/api/table-data/rollup')
+@table_payload()
+def get_table_data_rollup():
+    """API endpoint for data table subtotals
+    
+    group_by takes a comma-separated list of customer_group, customer and
+    factory (or their column names); the same keys as query parameters
+    filter the slice being drilled into.
+    """
+    group_by = [name.strip() for name in request.args.get('group_by', '').split(',') if name.strip()]
+    filters = {key: request.args[key] for key in DIMENSION_KEYS if request.args.get(key)}
+    try:
+        result = order_table.rollup(
+            group_by,
+            filters,
+            sort=request.args.get('sort') or None,
+            order=request.args.get('order', 'asc')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error building table data rollup: {e}")
+        return jsonify({'error': 'Table data unavailable'}), 503
+    logger.info(f"Retrieved {len(result['rows'])} rollup rows grouped by {result['group_by']}")
+    return jsonify(result)
+
+@app.route('/api/table-data/query')
+@table_payload()
+def get_table_data_query():
+    """API endpoint for ad-hoc queries over the data table
+    
+    Filters by customer_group, customer and factory (repeat a key for
+    several values), min_/max_ value, quantity and margin, and a q search,
+    then returns the top limit rows, or groups when group_by is given,
+    ordered by sort, with the totals of everything that matched.
+    """
+    try:
+        query = OrderQuery.from_args(request.args)
+        result = order_analytics.query(query)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error querying table data: {e}")
+        return jsonify({'error': 'Table data unavailable'}), 503
+    logger.info(f"Table query returned {len(result['rows'])} of {result['matched']} rows ({result['engine']})")
+    return jsonify(result)
+
+def check_admin_token():
+    """Error response unless the request carries ADMIN_TOKEN
+    
+    Without ADMIN_TOKEN configured only requests from this host are allowed;
+    a request forwarded by a proxy on this host does not count as local.
+    """
+    token = os.environ.get('ADMIN_TOKEN')
+    if not token:
+        if request.remote_addr in ('127.0.0.1', '::1') and 'X-Forwarded-For' not in request.headers:
+            return None
+        return jsonify({'error': 'Admin endpoints are only available locally unless ADMIN_TOKEN is set'}), 403
+    supplied = request.headers.get('X-Admin-Token', '')
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        supplied = authorization[len('Bearer '):]
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return jsonify({'error': 'Admin token required'}), 403
+    return None
+
+@app.route('/api/admin/query-stats', methods=['GET', 'DELETE'])
+def get_query_stats():
+    """API endpoint for per-statement database timings
+    
+    GET returns the statements sorted by sort (default total_ms), optionally
+    the top limit of them; DELETE resets the collected timings.
+    """
+    denied = check_admin_token()
+    if denied:
+        return denied
+    profiler = dashboard_data.model.db.profiler
+    if profiler is None:
+        return jsonify({'error': 'Query profiler is disabled (DB_QUERY_PROFILER=false)'}), 404
+    if request.method == 'DELETE':
+        profiler.reset()
+        return jsonify({'status': 'success', 'message': 'Query stats reset'})
+    
+    try:
+        statements = profiler.stats(
+            sort=request.args.get('sort', 'total_ms'),
+            limit=request.args.get('limit', type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'pid': os.getpid(),
+        'slow_query_ms': profiler.slow_query_ms,
+        'slow_queries': profiler.slow_queries,
+        'statements': statements,
+        'timestamp': datetime.now().isoformat()
+    })
 
 @app.errorhandler(404)
 def not_found(error):
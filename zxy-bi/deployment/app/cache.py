@@ -0,0 +1,358 @@
+"""
+Result caching for ZXY Business Intelligence Dashboard
+
+An in-process LRU cache with per-entry TTLs and stale-while-revalidate, plus
+a wrapper that puts it in front of the DashboardDataModel getters. When
+DASHBOARD_SHARED_CACHE_PATH is set, a SQLite file shared by all workers on the
+host sits behind the in-process cache as a second tier. Sample data served
+while the database is failing is only kept briefly, in the worker that
+loaded it.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Callable, Hashable, Tuple
+
+from app.shared_cache import SharedCache
+from app.models.dashboard_data import FallbackScope, note_fallback
+
+logger = logging.getLogger(__name__)
+
+# Seconds a result is served fresh, then seconds it may still be served
+# stale while a background refresh runs
+DEFAULT_METHOD_TTLS: Dict[str, Tuple[int, int]] = {
+    'get_kpi_data': (60, 300),
+    'get_alerts_data': (30, 120),
+    'get_sales_pipeline_data': (120, 600),
+    'get_chart_data': (300, 900),
+    'get_financial_years': (3600, 86400),
+    'get_customer_groups': (3600, 86400),
+    'get_countries': (3600, 86400),
+    'get_customer_order_metrics': (120, 600),
+    'get_cpo_detailed_data': (60, 300),
+}
+
+# Seconds sample data served in place of a failed load is cached for
+DEFAULT_FALLBACK_TTL = 10
+
+# Friendly names accepted by /api/refresh-data, matching the API routes
+CACHE_KEY_ALIASES = {
+    'kpis': 'get_kpi_data',
+    'alerts': 'get_alerts_data',
+    'sales-pipeline': 'get_sales_pipeline_data',
+    'chart-data': 'get_chart_data',
+    'financial-years': 'get_financial_years',
+    'customer-groups': 'get_customer_groups',
+    'countries': 'get_countries',
+    'customer-order-metrics': 'get_customer_order_metrics',
+    'cpo-detailed-data': 'get_cpo_detailed_data',
+}
+
+
+class FallbackResult(Exception):
+    """Raised by a loader to return sample data that must not be cached as a result"""
+
+    def __init__(self, value: Any):
+        super().__init__('loader fell back to sample data')
+        self.value = value
+
+
+class CacheEntry:
+    """A cached value with its freshness deadlines"""
+
+    __slots__ = ('value', 'stored_at', 'fresh_until', 'stale_until', 'fallback')
+
+    def __init__(self, value: Any, ttl: float, stale_ttl: float, fallback: bool = False):
+        now = time.monotonic()
+        self.value = value
+        self.stored_at = time.time()
+        self.fresh_until = now + ttl
+        self.stale_until = now + ttl + stale_ttl
+        self.fallback = fallback
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry TTL and stale-while-revalidate
+
+    With a shared cache, local misses are looked up there before loading,
+    loaded values are written to both tiers, and an invalidation in any
+    worker clears every worker's local entries within sync_interval seconds.
+    A loader raising FallbackResult has its value kept for fallback_ttl
+    seconds, locally only, and a background refresh that falls back keeps
+    serving the stale entry instead.
+    """
+
+    def __init__(self, max_entries: int = 512, shared: Optional[SharedCache] = None,
+                 sync_interval: float = 1.0, fallback_ttl: float = DEFAULT_FALLBACK_TTL):
+        self.max_entries = max_entries
+        self.shared = shared
+        self.sync_interval = sync_interval
+        self.fallback_ttl = fallback_ttl
+        self._entries: 'OrderedDict[Hashable, CacheEntry]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._refreshing = set()
+        self._epoch = 0
+        self._versions: Dict[Hashable, int] = {}
+        self._shared_generation = shared.generation() if shared else None
+        self._synced_at = time.monotonic()
+        self.hits = 0
+        self.stale_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _sync_shared_generation(self, now: float) -> None:
+        """Drop local entries if another worker invalidated the shared cache"""
+        if self.shared is None or now - self._synced_at < self.sync_interval:
+            return
+        self._synced_at = now
+        generation = self.shared.generation()
+        if generation is not None and generation != self._shared_generation:
+            with self._lock:
+                self._shared_generation = generation
+                self._epoch += 1
+                self._entries.clear()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any],
+                    ttl: float, stale_ttl: float = 0) -> Any:
+        """Return the cached value for key, loading or refreshing it as needed"""
+        now = time.monotonic()
+        self._sync_shared_generation(now)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if now < entry.fresh_until:
+                    self.hits += 1
+                    if entry.fallback:
+                        # Cached sample data is still sample data to the caller
+                        note_fallback()
+                    return entry.value
+                if now < entry.stale_until:
+                    self.stale_hits += 1
+                    self._schedule_refresh(key, loader, ttl, stale_ttl)
+                    return entry.value
+            epoch = self._epoch
+
+        if self.shared is not None:
+            found = self.shared.get(key)
+            if found is not None:
+                value, fresh_for, stale_for = found
+                with self._lock:
+                    self.shared_hits += 1
+                    # Keep the shared deadlines so every worker expires together
+                    self._store(key, value, max(fresh_for, 0), stale_for - max(fresh_for, 0), epoch, share=False)
+                    if fresh_for <= 0:
+                        self._schedule_refresh(key, loader, ttl, stale_ttl)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        try:
+            value = loader()
+        except FallbackResult as fallback:
+            self._store(key, fallback.value, self.fallback_ttl, 0, epoch, share=False, fallback=True)
+            return fallback.value
+        self._store(key, value, ttl, stale_ttl, epoch)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0) -> None:
+        """Store a value unconditionally"""
+        with self._lock:
+            self._store(key, value, ttl, stale_ttl, self._epoch)
+
+    def _store(self, key: Hashable, value: Any, ttl: float, stale_ttl: float, epoch: int,
+               share: bool = True, fallback: bool = False) -> None:
+        """Store a value unless the cache was invalidated after the load started"""
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._entries[key] = CacheEntry(value, ttl, stale_ttl, fallback)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            name = self._name(key)
+            self._versions[name] = self._versions.get(name, 0) + 1
+        if share and self.shared is not None:
+            self.shared.set(key, value, ttl, stale_ttl)
+
+    @staticmethod
+    def _name(key: Hashable) -> Hashable:
+        """The name a key is versioned and invalidated under"""
+        return key[0] if isinstance(key, tuple) and key else key
+
+    def version(self, name: Hashable) -> Tuple[int, int]:
+        """Changes whenever a value stored under name may have changed
+
+        Lets derived data (e.g. encoded responses) be keyed on the cached
+        values it was built from.
+        """
+        return self._epoch, self._versions.get(name, 0)
+
+    def _schedule_refresh(self, key: Hashable, loader: Callable[[], Any],
+                          ttl: float, stale_ttl: float) -> None:
+        """Start a background refresh for key unless one is already running"""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        thread = threading.Thread(
+            target=self._refresh,
+            args=(key, loader, ttl, stale_ttl, self._epoch),
+            name='cache-refresh',
+            daemon=True
+        )
+        thread.start()
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any],
+                 ttl: float, stale_ttl: float, epoch: int) -> None:
+        """Reload a stale entry in the background"""
+        try:
+            self._store(key, loader(), ttl, stale_ttl, epoch)
+        except FallbackResult:
+            logger.warning(f"Background cache refresh for {key} fell back to sample data, keeping stale value")
+        except Exception as e:
+            logger.warning(f"Background cache refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def has_fallback(self, name: Hashable) -> bool:
+        """Whether any entry stored under name holds sample data"""
+        with self._lock:
+            return any(entry.fallback for key, entry in self._entries.items() if self._name(key) == name)
+
+    def invalidate(self, name: Optional[str] = None) -> int:
+        """Drop every entry, or only the entries whose key starts with name, from both tiers"""
+        with self._lock:
+            self._epoch += 1
+            if name is None:
+                count = len(self._entries)
+                self._entries.clear()
+            else:
+                keys = [key for key in self._entries if key == name or (isinstance(key, tuple) and key[:1] == (name,))]
+                for key in keys:
+                    del self._entries[key]
+                count = len(keys)
+        if self.shared is not None:
+            count = max(count, self.shared.invalidate(name))
+            # Our own bump must not clear us again on the next sync
+            self._shared_generation = self.shared.generation()
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters for diagnostics"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'refreshing': len(self._refreshing),
+                'shared': self.shared.stats() if self.shared else None
+            }
+
+
+def shared_cache_from_env() -> Optional[SharedCache]:
+    """The host-wide shared cache if DASHBOARD_SHARED_CACHE_PATH is set"""
+    path = os.environ.get('DASHBOARD_SHARED_CACHE_PATH')
+    if not path:
+        return None
+    try:
+        return SharedCache(
+            path,
+            max_bytes=int(os.environ.get('DASHBOARD_SHARED_CACHE_MAX_MB', 64)) * 1024 * 1024
+        )
+    except Exception as e:
+        logger.error(f"Failed to open shared cache at {path}, using per-worker cache only: {e}")
+        return None
+
+
+class CachedDashboardModel:
+    """Serves DashboardDataModel getters through a TTLCache"""
+
+    def __init__(self, model, cache: Optional[TTLCache] = None,
+                 method_ttls: Optional[Dict[str, Tuple[int, int]]] = None):
+        self._model = model
+        self.cache = cache or TTLCache(
+            int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRIES', 512)),
+            shared=shared_cache_from_env(),
+            fallback_ttl=float(os.environ.get('DASHBOARD_CACHE_FALLBACK_TTL', DEFAULT_FALLBACK_TTL))
+        )
+        self.method_ttls = dict(method_ttls or DEFAULT_METHOD_TTLS)
+        # Called with the method name whenever a getter answers with sample
+        # data, whether just loaded or from a cached fallback entry
+        self.fallback_observers: List[Callable[[str], None]] = []
+        for method_name, (ttl, stale_ttl) in list(self.method_ttls.items()):
+            # e.g. DASHBOARD_CACHE_TTL_GET_KPI_DATA=30
+            override = os.environ.get(f"DASHBOARD_CACHE_TTL_{method_name.upper()}")
+            if override:
+                self.method_ttls[method_name] = (int(override), stale_ttl)
+
+    @property
+    def model(self):
+        """The wrapped, uncached data model"""
+        return self._model
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._model, name)
+        if name not in self.method_ttls or not callable(attr):
+            return attr
+
+        ttl, stale_ttl = self.method_ttls[name]
+
+        def load(*args, **kwargs):
+            scope = FallbackScope()
+            value = attr(*args, **kwargs)
+            if scope.used:
+                raise FallbackResult(value)
+            return value
+
+        def cached_call(*args, **kwargs):
+            key = (name,) + args + tuple(sorted(kwargs.items()))
+            scope = FallbackScope()
+            value = self.cache.get_or_load(key, lambda: load(*args, **kwargs), ttl, stale_ttl)
+            if scope.used:
+                self._notify_fallback(name)
+            return value
+
+        cached_call.__name__ = name
+        cached_call.__doc__ = attr.__doc__
+        return cached_call
+
+    def _notify_fallback(self, name: str) -> None:
+        """Call the fallback observers, never letting them break a request"""
+        for observer in self.fallback_observers:
+            try:
+                observer(name)
+            except Exception as e:
+                logger.debug(f"Cache fallback observer failed: {e}")
+
+    def invalidate(self, key: Optional[str] = None) -> int:
+        """Invalidate all cached results, or those of one method or route alias"""
+        if key is None:
+            return self.cache.invalidate()
+        return self.cache.invalidate(CACHE_KEY_ALIASES.get(key, key))
+
+    def data_version(self, *keys: str) -> Tuple:
+        """Combined cache version of the given methods or route aliases"""
+        return tuple(self.cache.version(CACHE_KEY_ALIASES.get(key, key)) for key in keys)
+
+    def fresh_ttl(self, *keys: str) -> float:
+        """Shortest fresh TTL among the given methods or route aliases
+
+        Only the fallback TTL while any of them is holding sample data, so
+        responses built from it are not kept longer than the data itself.
+        """
+        names = [CACHE_KEY_ALIASES.get(key, key) for key in keys]
+        ttl = min(self.method_ttls[name][0] for name in names)
+        if any(self.cache.has_fallback(name) for name in names):
+            return min(ttl, self.cache.fallback_ttl)
+        return ttl
+
+    def cache_keys(self) -> List[str]:
+        """Keys accepted by invalidate()"""
+        return sorted(self.method_ttls) + sorted(CACHE_KEY_ALIASES)
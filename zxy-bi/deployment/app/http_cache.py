@@ -0,0 +1,202 @@
+"""
+HTTP caching and compression for ZXY Business Intelligence Dashboard
+
+Adds content-hash ETags and Last-Modified to JSON API responses, answers
+matching conditional requests with 304 Not Modified, and compresses bodies
+with brotli (when installed) or gzip according to Accept-Encoding. Streamed
+responses are left untouched.
+"""
+
+import os
+import gzip
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+JSON_MIMETYPES = ('application/json',)
+
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# Bodies that get validators, compression and payload caching
+API_MIMETYPES = JSON_MIMETYPES + (ARROW_STREAM_MIMETYPE,)
+
+# Suffixes distinguishing the ETag of each encoded representation
+ENCODING_SUFFIXES = {'gzip': '-gzip', 'br': '-br'}
+
+
+class LastModifiedTracker:
+    """Remembers when each URL's content (by ETag) was first served
+
+    The data behind the API has no single modification time, so a response's
+    Last-Modified is the first time this worker served its exact content.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._seen: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def last_modified(self, url: str, etag: str) -> float:
+        """Timestamp since which url has served content with this etag"""
+        with self._lock:
+            seen = self._seen.get(url)
+            if seen is None or seen[0] != etag:
+                seen = (etag, float(int(time.time())))
+                self._seen[url] = seen
+            self._seen.move_to_end(url)
+            while len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+            return seen[1]
+
+
+def content_etag(data: bytes) -> str:
+    """Strong ETag value for a response body"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class PreparedPayload:
+    """A response body with its ETag and, once computed, its compressed forms"""
+
+    __slots__ = ('body', 'mimetype', 'etag', 'encoded')
+
+    def __init__(self, body: bytes, mimetype: str = 'application/json'):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = content_etag(body)
+        self.encoded: Dict[str, bytes] = {}
+
+    @property
+    def size(self) -> int:
+        """Bytes held, including compressed forms"""
+        return len(self.body) + sum(len(data) for data in self.encoded.values())
+
+
+class HTTPCache:
+    """Validators, conditional responses and content negotiation for JSON bodies"""
+
+    def __init__(self, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.tracker = LastModifiedTracker()
+
+    def encodings(self):
+        """Content codings this server can produce, best first"""
+        return ('br', 'gzip') if BROTLI_AVAILABLE else ('gzip',)
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        """Encode data with gzip or brotli"""
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def encode(self, payload: PreparedPayload, encoding: str) -> bytes:
+        """The payload body in the given coding, compressed on first use"""
+        data = payload.encoded.get(encoding)
+        if data is None:
+            data = payload.encoded[encoding] = self.compress(payload.body, encoding)
+        return data
+
+    def encode_all(self, payload: PreparedPayload) -> None:
+        """Compress the payload in every coding up front, e.g. before caching it"""
+        if len(payload.body) >= self.min_size:
+            for encoding in self.encodings():
+                self.encode(payload, encoding)
+
+    def choose_encoding(self, payload: PreparedPayload) -> Optional[str]:
+        """Best content coding the client accepts, or None for identity"""
+        if len(payload.body) < self.min_size:
+            return None
+        accepted = request.accept_encodings
+        if BROTLI_AVAILABLE and accepted['br'] > 0 and accepted['br'] >= accepted['gzip']:
+            return 'br'
+        if accepted['gzip'] > 0:
+            return 'gzip'
+        return None
+
+    def respond(self, payload: PreparedPayload, response: Optional[Response] = None) -> Response:
+        """Serve payload for the current request: 304, compressed or identity"""
+        if response is None:
+            response = Response(mimetype=payload.mimetype)
+        encoding = self.choose_encoding(payload)
+        response.vary.add('Accept-Encoding')
+        # Let clients keep the payload but check back on every poll
+        response.headers.setdefault('Cache-Control', 'no-cache')
+        response.last_modified = self.tracker.last_modified(request.full_path, payload.etag)
+        response.set_etag(payload.etag + ENCODING_SUFFIXES.get(encoding, ''))
+
+        if self.client_has_etag(payload.etag) or (
+                'If-None-Match' not in request.headers and request.if_modified_since is not None
+                and response.last_modified <= request.if_modified_since):
+            response.status_code = 304
+            response.set_data(b'')
+            for header in ('Content-Type', 'Content-Length', 'Content-Encoding'):
+                response.headers.pop(header, None)
+            return response
+
+        if encoding:
+            response.set_data(self.encode(payload, encoding))
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response.set_data(payload.body)
+        return response
+
+    @staticmethod
+    def client_has_etag(etag: str) -> bool:
+        """Whether If-None-Match names this content in any of its encodings"""
+        header = request.headers.get('If-None-Match')
+        if not header:
+            return False
+        if header.strip() == '*':
+            return True
+        for candidate in header.split(','):
+            candidate = candidate.strip()
+            if candidate.startswith('W/'):
+                candidate = candidate[2:]
+            candidate = candidate.strip('"')
+            for suffix in ENCODING_SUFFIXES.values():
+                if candidate.endswith(suffix):
+                    candidate = candidate[:-len(suffix)]
+                    break
+            if candidate == etag:
+                return True
+        return False
+
+    @staticmethod
+    def applies_to(response: Response) -> bool:
+        """Whether a response is a complete JSON (or Arrow) API body not yet handled"""
+        return (request.method == 'GET' and request.path.startswith('/api/')
+                and response.status_code == 200 and not response.is_streamed
+                and not response.direct_passthrough and response.mimetype in API_MIMETYPES
+                and 'ETag' not in response.headers and 'Content-Encoding' not in response.headers)
+
+
+def init_http_cache(app: Flask) -> HTTPCache:
+    """Register the validator and compression hook for /api/ responses"""
+    http_cache = HTTPCache(
+        min_size=int(os.environ.get('HTTP_COMPRESS_MIN_BYTES', 1024)),
+        gzip_level=int(os.environ.get('HTTP_GZIP_LEVEL', 6)),
+        brotli_quality=int(os.environ.get('HTTP_BROTLI_QUALITY', 5))
+    )
+    app.extensions['http_cache'] = http_cache
+
+    @app.after_request
+    def apply_http_cache(response: Response) -> Response:
+        if not http_cache.applies_to(response):
+            return response
+        return http_cache.respond(PreparedPayload(response.get_data(), response.mimetype), response)
+
+    return http_cache
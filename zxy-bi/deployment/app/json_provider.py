@@ -0,0 +1,118 @@
+"""
+JSON provider for ZXY Business Intelligence Dashboard
+
+Serializes API responses with orjson when it is installed, falling back to
+the standard library otherwise. Either way numpy scalars and arrays, pandas
+Timestamps, Series and DataFrames, Decimal values from pyodbc, and NaN / NaT /
+NA (as null) are encoded natively, so handlers can return query results
+without converting them by hand. Dates keep Flask's HTTP-date format and keys
+stay sorted, so responses keep their shape.
+"""
+
+import json
+import math
+import logging
+import decimal
+from datetime import date
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# json.dumps arguments the orjson path honours; any other argument (default,
+# ensure_ascii, separators, ...) goes through the standard library instead
+ORJSON_KWARGS = {'sort_keys', 'indent'}
+
+
+def encode_default(value: Any) -> Any:
+    """Convert numpy, pandas and Decimal values to JSON-native ones"""
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        return value
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, decimal.Decimal):
+        return None if not value.is_finite() else float(value)
+    if isinstance(value, pd.DataFrame):
+        return value.to_dict('records')
+    if isinstance(value, (pd.Series, pd.Index, pd.Categorical)):
+        return value.tolist()
+    if isinstance(value, pd.Timedelta):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+def replace_nan(value: Any) -> Any:
+    """Copy of value with non-finite floats replaced by None"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: replace_nan(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [replace_nan(item) for item in value]
+    return value
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with numpy/pandas support"""
+
+    default = staticmethod(encode_default)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize obj to a JSON string"""
+        if ORJSON_AVAILABLE and set(kwargs) <= ORJSON_KWARGS and kwargs.get('indent') in (None, 2):
+            return self._orjson_dumps(obj, kwargs).decode('utf-8')
+        return self._stdlib_dumps(obj, kwargs)
+
+    def _orjson_dumps(self, obj: Any, kwargs: dict) -> bytes:
+        """Serialize with orjson; NaN and infinity become null natively"""
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self._orjson_default, option=option)
+
+    @staticmethod
+    def _orjson_default(value: Any) -> Any:
+        """Fallback for types orjson leaves to us (dates are passed through for HTTP-date format)"""
+        if isinstance(value, date) and value is not pd.NaT:
+            return DefaultJSONProvider.default(value)
+        return encode_default(value)
+
+    def _stdlib_dumps(self, obj: Any, kwargs: dict) -> str:
+        """Serialize with Flask's json module path, mapping NaN to null"""
+        try:
+            return super().dumps(obj, allow_nan=False, **kwargs)
+        except ValueError:
+            # Only payloads that actually contain NaN pay for the extra pass
+            return super().dumps(replace_nan(json.loads(super().dumps(obj, **kwargs))), allow_nan=False, **kwargs)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        """Deserialize JSON from a string or bytes"""
+        if ORJSON_AVAILABLE and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """JSON response, built from bytes without a str round trip when orjson is available"""
+        if not ORJSON_AVAILABLE:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = self._orjson_dumps(obj, {'indent': 2} if indent else {})
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
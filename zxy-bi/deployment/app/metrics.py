@@ -0,0 +1,420 @@
+"""
+Prometheus metrics for ZXY Business Intelligence Dashboard
+
+A small in-process registry of counters, gauges and histograms rendered in
+the Prometheus text exposition format. Every series carries a pid label. A
+scrape reaches only one gunicorn worker, so when METRICS_DIR is set each
+worker also writes its samples there every few seconds, and /metrics renders
+the series of every live worker on the host.
+"""
+
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from functools import wraps
+from typing import Dict, List, Any, Optional, Callable, Iterable, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from cache hits to slow SQL Server queries
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Payload size buckets in bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+# Row count buckets
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LabelValues = Tuple[str, ...]
+
+
+class Metric:
+    """A metric family with a fixed set of label names"""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        """Label values in labelnames order"""
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """(name suffix, labels, value) for every series"""
+        with self._lock:
+            return [('', dict(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Add amount to the series with these labels"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        """Series exposed with the conventional _total suffix"""
+        return [('_total', labels, value) for _, labels, value in super().samples()]
+
+
+class Gauge(Metric):
+    """Value that can go up and down, set directly or read from a callback at scrape time"""
+
+    type = 'gauge'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        super().__init__(name, help_text, labelnames)
+        self.callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        """Set the series with these labels"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        """Set values, or the callback's values read now"""
+        if self.callback is None:
+            return super().samples()
+        try:
+            values = self.callback()
+        except Exception as e:
+            logger.debug(f"Gauge {self.name} callback failed: {e}")
+            return []
+        return [('', dict(zip(self.labelnames, key)), value) for key, value in values.items()]
+
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation in the series with these labels"""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (plus +Inf), then sum
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def samples(self):
+        """Cumulative _bucket series plus _sum and _count"""
+        samples = []
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        for key, state in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                samples.append(('_bucket', dict(labels, le=format_value(bound)), cumulative))
+            samples.append(('_sum', labels, state[-1]))
+            samples.append(('_count', labels, cumulative))
+        return samples
+
+    def time(self, **labels):
+        """Context manager observing the duration of its block"""
+        return _Timer(self, labels)
+
+
+class _Timer:
+    """Observes elapsed seconds into a histogram on exit"""
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+def format_value(value: float) -> str:
+    """Number formatted for the exposition format"""
+    if value == float('inf'):
+        return '+Inf'
+    if value == float('-inf'):
+        return '-Inf'
+    if value != value:
+        return 'NaN'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value for the exposition format"""
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """The metric families of this process, optionally merged with other workers'"""
+
+    def __init__(self, export_dir: Optional[str] = None, export_interval: float = 5.0):
+        self._metrics: Dict[str, Metric] = {}
+        self.export_dir = export_dir
+        self.export_interval = export_interval
+        self._export_thread: Optional[threading.Thread] = None
+        self._export_pid: Optional[int] = None
+        if export_dir:
+            os.makedirs(export_dir, exist_ok=True)
+
+    def _register(self, metric: Metric) -> Metric:
+        """Add a family; names must be unique"""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Register a counter (exposed as name_total)"""
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+              callback: Optional[Callable[[], Dict[LabelValues, float]]] = None) -> Gauge:
+        """Register a gauge, optionally read from callback at scrape time"""
+        return self._register(Gauge(name, help_text, labelnames, callback))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Register a histogram"""
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """This process's families with their samples, each labelled with the pid"""
+        pid = str(os.getpid())
+        return [
+            {
+                'name': metric.name,
+                'type': metric.type,
+                'help': metric.help,
+                'samples': [(suffix, dict(labels, pid=pid), value) for suffix, labels, value in metric.samples()]
+            }
+            for metric in self._metrics.values()
+        ]
+
+    def ensure_exporting(self) -> None:
+        """Start writing this process's samples to export_dir in the background"""
+        if not self.export_dir or (self._export_pid == os.getpid() and self._export_thread.is_alive()):
+            return
+        self._export_pid = os.getpid()
+        self._export_thread = threading.Thread(target=self._export_loop, name='metrics-export', daemon=True)
+        self._export_thread.start()
+
+    def _export_path(self, pid: int) -> str:
+        """Where a worker writes its samples"""
+        return os.path.join(self.export_dir, f'metrics-{pid}.json')
+
+    def _export_loop(self) -> None:
+        """Export every export_interval seconds for the life of the process"""
+        while True:
+            try:
+                self.export()
+            except Exception as e:
+                logger.warning(f"Failed to export metrics: {e}")
+            time.sleep(self.export_interval)
+
+    def export(self) -> None:
+        """Write this process's samples for the other workers to render"""
+        path = self._export_path(os.getpid())
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.collect(), f)
+        os.replace(tmp_path, path)
+
+    def _collect_workers(self) -> Iterable[List[Dict[str, Any]]]:
+        """Exported families of the other live workers; files of dead ones are removed"""
+        for filename in os.listdir(self.export_dir):
+            if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                continue
+            try:
+                pid = int(filename[len('metrics-'):-len('.json')])
+            except ValueError:
+                continue
+            if pid == os.getpid():
+                continue
+            path = os.path.join(self.export_dir, filename)
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                os.remove(path)
+                continue
+            except PermissionError:
+                pass
+            try:
+                with open(path) as f:
+                    yield json.load(f)
+            except Exception as e:
+                logger.debug(f"Skipping unreadable metrics file {path}: {e}")
+
+    def render(self) -> str:
+        """Prometheus text exposition of this process, plus other workers when exporting"""
+        families: Dict[str, Dict[str, Any]] = {}
+        sources = [self.collect()]
+        if self.export_dir:
+            sources.extend(self._collect_workers())
+        for source in sources:
+            for family in source:
+                merged = families.setdefault(family['name'], dict(family, samples=[]))
+                merged['samples'].extend(family['samples'])
+
+        lines = []
+        for family in families.values():
+            lines.append(f"# HELP {family['name']} {family['help']}")
+            lines.append(f"# TYPE {family['name']} {family['type']}")
+            for suffix, labels, value in family['samples']:
+                label_text = ','.join(f'{name}="{escape_label(str(label))}"' for name, label in labels.items())
+                lines.append(f"{family['name']}{suffix}{{{label_text}}} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def instrument_methods(obj, method_names: Iterable[str], wrapper: Callable[[str, Callable], Callable]) -> None:
+    """Replace the named bound methods of obj with wrapper(name, method)"""
+    for name in method_names:
+        method = getattr(obj, name, None)
+        if callable(method):
+            setattr(obj, name, wraps(method)(wrapper(name, method)))
+
+
+class DashboardMetrics:
+    """The dashboard's metric families and the hooks that feed them"""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry(
+            os.environ.get('METRICS_DIR') or None,
+            float(os.environ.get('METRICS_EXPORT_INTERVAL', 5))
+        )
+        registry = self.registry
+        self.request_duration = registry.histogram(
+            'dashboard_http_request_duration_seconds', 'Request latency by route',
+            ('endpoint', 'method', 'status'))
+        self.response_size = registry.histogram(
+            'dashboard_http_response_size_bytes', 'Response body size as sent, after compression',
+            ('endpoint',), SIZE_BUCKETS)
+        self.model_duration = registry.histogram(
+            'dashboard_model_duration_seconds', 'DashboardDataModel method latency, excluding cache hits',
+            ('method',))
+        self.fallbacks = registry.counter(
+            'dashboard_fallback', 'Responses or sections served from sample data',
+            ('endpoint', 'source'))
+        self.query_duration = registry.histogram(
+            'dashboard_db_query_duration_seconds', 'Database query execution time',
+            ('kind', 'status'))
+        self.query_rows = registry.histogram(
+            'dashboard_db_query_rows', 'Rows returned per database query', ('kind',), ROW_BUCKETS)
+        self.checkout_duration = registry.histogram(
+            'dashboard_db_pool_checkout_seconds', 'Time spent waiting for a pooled connection')
+        self.hold_duration = registry.histogram(
+            'dashboard_db_pool_hold_seconds', 'Time a pooled connection was checked out, until checkin')
+        self._stats_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        registry.gauge('dashboard_cache_stat', 'Cache counters and sizes by cache and statistic',
+                       ('cache', 'stat'), callback=self._cache_stats)
+
+    def init_app(self, app) -> None:
+        """Time every request and serve /metrics"""
+        from flask import Response, g, request
+
+        @app.before_request
+        def start_request_timer():
+            self.registry.ensure_exporting()
+            g.metrics_started = time.perf_counter()
+
+        @app.after_request
+        def observe_request(response):
+            started = g.pop('metrics_started', None)
+            if started is None:
+                return response
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            self.request_duration.observe(time.perf_counter() - started, endpoint=endpoint,
+                                          method=request.method, status=response.status_code)
+            if response.content_length is not None:
+                self.response_size.observe(response.content_length, endpoint=endpoint)
+            return response
+
+        @app.route('/metrics')
+        def metrics():
+            """Prometheus metrics endpoint"""
+            return Response(self.registry.render(), content_type=CONTENT_TYPE)
+
+    def instrument_database(self, db) -> None:
+        """Observe query timings, row counts, checkout waits, hold times and pool occupancy"""
+        def on_query(kind: str, seconds: float, rows: Optional[int], ok: bool) -> None:
+            self.query_duration.observe(seconds, kind=kind, status='ok' if ok else 'error')
+            if rows is not None:
+                self.query_rows.observe(rows, kind=kind)
+
+        db.query_observers.append(on_query)
+        db.checkout_observers.append(lambda seconds: self.checkout_duration.observe(seconds))
+        db.hold_observers.append(lambda seconds: self.hold_duration.observe(seconds))
+
+        def pool_connections() -> Dict[LabelValues, float]:
+            status = db.pool_status()
+            return {(state,): value for state, value in status.items()} if status else {}
+
+        self.registry.gauge('dashboard_db_pool_connections', 'QueuePool connections by state',
+                            ('state',), callback=pool_connections)
+
+    def instrument_model(self, model) -> None:
+        """Time the model's getters"""
+        def timed(name: str, method: Callable) -> Callable:
+            def call(*args, **kwargs):
+                with self.model_duration.time(method=name):
+                    return method(*args, **kwargs)
+            return call
+
+        instrument_methods(model, [name for name in dir(model) if name.startswith('get_')], timed)
+
+    def instrument_cache(self, cached_model) -> None:
+        """Count sample data served through the result cache, including cached fallbacks"""
+        cached_model.fallback_observers.append(self.record_fallback)
+
+    def instrument_sections(self, fanout) -> None:
+        """Count dashboard sections replaced by their fallback after failing"""
+        fanout.fallback_observers.append(self.record_fallback)
+
+    def record_fallback(self, source: str) -> None:
+        """Count sample data served in place of real data"""
+        from flask import has_request_context, request
+        if has_request_context() and request.url_rule:
+            endpoint = request.url_rule.rule
+        else:
+            endpoint = 'background'
+        self.fallbacks.inc(endpoint=endpoint, source=source)
+
+    def observe_stats(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        """Expose the numeric entries of a stats() dict under dashboard_cache_stat"""
+        self._stats_sources[name] = stats
+
+    def _cache_stats(self) -> Dict[LabelValues, float]:
+        """Values for dashboard_cache_stat, read at scrape time"""
+        values = {}
+        for name, stats in self._stats_sources.items():
+            for stat, value in stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    values[(name, stat)] = value
+        return values
@@ -4,98 +4,152 @@ Dashboard data models and queries for ZXY Business Intelligence Dashboard
 
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
+from functools import wraps
+import os
 import logging
+import threading
 from config.database import get_database
+from app.models.kpi_engine import KPIEngine
+from app.models.order_metrics import IncrementalOrderMetrics, WatermarkError
+from app.models.serializers import Field, serialize_frame
+from app.models.queries import QUERIES, KPI_QUERIES, cpo_query_name
 
 logger = logging.getLogger(__name__)
 
+
+class _FallbackCounter(threading.local):
+    """Sample-data fallbacks served on the current thread"""
+    count = 0
+
+
+_fallbacks = _FallbackCounter()
+
+
+def note_fallback() -> None:
+    """Record that sample data is being served on the current thread"""
+    _fallbacks.count += 1
+
+
+def sample_data(method):
+    """Mark a model method that builds sample data served in place of real data"""
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        note_fallback()
+        return method(*args, **kwargs)
+    return wrapper
+
+
+class FallbackScope:
+    """Whether sample data was served on the current thread since the scope opened
+
+    The getters return sample data rather than raising when the database
+    fails; callers that cache or publish results use this to tell them apart.
+    """
+
+    def __init__(self):
+        self._start = _fallbacks.count
+
+    @property
+    def used(self) -> bool:
+        """True if a sample-data method ran on this thread inside the scope"""
+        return _fallbacks.count != self._start
+
+
+# Column mappings used to serialize query results
+ALERT_FIELDS = [
+    Field('title', default=''),
+    Field('description', default=''),
+    Field('priority', default='low', transform=lambda values: values.astype(str).str.lower()),
+    Field('created_date', 'timestamp', kind='date', date_format='%H:%M', default='N/A'),
+]
+
+PIPELINE_FIELDS = [
+    Field('company_name', 'company'),
+    Field('contact_person', 'contact'),
+    Field('deal_value', 'value', kind='currency', default='$0'),
+    Field('stage'),
+    Field('probability', kind='percent', default='0%'),
+    Field('expected_close_date', 'close_date', kind='date', default='TBD'),
+    Field('source', default='Direct'),
+]
+
+FINANCIAL_YEAR_FIELDS = [
+    Field('FinancialYearID', 'id'),
+    Field('FinancialYearName', 'name', default='Unknown'),
+    Field('StartDate', 'start_date', kind='date'),
+    Field('EndDate', 'end_date', kind='date'),
+    Field('IsActive', 'is_active', kind='bool', default=False),
+]
+
+CUSTOMER_GROUP_FIELDS = [
+    Field('CustomerGroupID', 'id'),
+    Field('CustomerGroupName', 'name', default='Unknown'),
+    Field('Description', 'description', default=''),
+    Field('IsActive', 'is_active', kind='bool', default=True),
+]
+
+COUNTRY_FIELDS = [
+    Field('CountryID', 'id', kind='int'),
+    Field('CountryName', 'name', default='Unknown'),
+]
+
+CPO_FIELDS = [
+    Field('CPOID', 'cpo_id'),
+    Field('EmployeeNumber', 'employee_number', default=''),
+    Field('DepartmentName', 'department', default=''),
+    Field('DivisionName', 'division', default=''),
+    Field('CountryOfficeName', 'country_office', default=''),
+    Field('CPODate', 'cpo_date', kind='date', default=''),
+    Field('RecordStatus', 'record_status', default=''),
+    Field('CustomerOrderNumber', 'customer_order_number', default=''),
+    Field('CPOStyleQuantity', 'cpo_style_quantity', kind='int', default=0),
+    Field('CPOStyleValue', 'cpo_style_value', kind='float', default=0.0),
+    Field('FPOStyleQuantity', 'fpo_style_quantity', kind='int', default=0),
+    Field('FPOStyleValue', 'fpo_style_value', kind='float', default=0.0),
+    Field('CustomerName', 'customer_name', default=''),
+    Field('StyleCode', 'style_code', default=''),
+    Field('StyleName', 'style_name', default=''),
+    Field('ColourName', 'colour_name', default=''),
+    Field('FabricName', 'fabric_name', default=''),
+    Field('Brand', 'brand', default=''),
+]
+
+
 class DashboardDataModel:
     """Data model for dashboard operations"""
     
     def __init__(self):
         self.db = get_database()
+        self.kpi_engine = KPIEngine(self.db)
+        for kpi_name, query in KPI_QUERIES.items():
+            self.kpi_engine.register(kpi_name, query)
+        # Maintain order metrics from changed rows instead of re-aggregating the year
+        self.order_metrics = None
+        if os.environ.get('ORDER_METRICS_INCREMENTAL', 'false').lower() == 'true':
+            self.order_metrics = IncrementalOrderMetrics(self.db)
     
     def get_kpi_data(self) -> List[Dict[str, Any]]:
         """Get KPI data for the dashboard"""
         try:
-            # Sample KPI queries - adjust these based on your actual database schema
-            kpi_queries = {
-                'total_sales': """
-                    SELECT 
-                        COALESCE(SUM(amount), 0) as value,
-                        'Total Sales' as label,
-                        'sales' as icon_type,
-                        '+15%' as trend
-                    FROM sales_data 
-                    WHERE date >= DATEADD(month, -1, GETDATE())
-                """,
-                'active_prospects': """
-                    SELECT 
-                        COUNT(*) as value,
-                        'Active Prospects' as label,
-                        'sales' as icon_type,
-                        '+8%' as trend
-                    FROM prospects 
-                    WHERE status = 'active'
-                """,
-                'pipeline_value': """
-                    SELECT 
-                        COALESCE(SUM(value), 0) as value,
-                        'Pipeline Value' as label,
-                        'sales' as icon_type,
-                        '+23%' as trend
-                    FROM sales_pipeline 
-                    WHERE status IN ('qualified', 'proposal', 'negotiation')
-                """,
-                'factory_utilization': """
-                    SELECT 
-                        COALESCE(AVG(utilization_rate), 0) as value,
-                        'Factory Utilization' as label,
-                        'manufacturing' as icon_type,
-                        '+5%' as trend
-                    FROM manufacturing_metrics 
-                    WHERE date >= DATEADD(day, -7, GETDATE())
-                """,
-                'on_time_delivery': """
-                    SELECT 
-                        COALESCE(
-                            (COUNT(CASE WHEN delivery_date <= promised_date THEN 1 END) * 100.0 / COUNT(*)), 
-                            0
-                        ) as value,
-                        'On-Time Delivery' as label,
-                        'logistics' as icon_type,
-                        '+2%' as trend
-                    FROM shipments 
-                    WHERE delivery_date >= DATEADD(month, -1, GETDATE())
-                """,
-                'revenue_fytd': """
-                    SELECT 
-                        COALESCE(SUM(revenue), 0) as value,
-                        'Revenue (FYTD)' as label,
-                        'financial' as icon_type,
-                        '+18%' as trend
-                    FROM financial_data 
-                    WHERE fiscal_year = YEAR(GETDATE())
-                """
-            }
-            
             kpis = []
-            for kpi_name, query in kpi_queries.items():
+            for kpi_name, row in self.kpi_engine.run().items():
+                if row is None:
+                    # Failure already logged by the engine; fall back per KPI
+                    # (KPIs that returned no rows are not in the result at all)
+                    kpis.append(self._get_fallback_kpi(kpi_name))
+                    continue
                 try:
-                    result = self.db.execute_query(query)
-                    if not result.empty:
-                        row = result.iloc[0]
-                        kpi = {
-                            'id': kpi_name,
-                            'value': self._format_kpi_value(row['value'], kpi_name),
-                            'label': row['label'],
-                            'icon_type': row['icon_type'],
-                            'trend': row['trend']
-                        }
-                        kpis.append(kpi)
+                    kpi = {
+                        'id': kpi_name,
+                        'value': self._format_kpi_value(row['value'], kpi_name),
+                        'label': row['label'],
+                        'icon_type': row['icon_type'],
+                        'trend': row['trend']
+                    }
+                    kpis.append(kpi)
                 except Exception as e:
-                    logger.warning(f"Failed to fetch KPI {kpi_name}: {e}")
+                    logger.warning(f"Failed to format KPI {kpi_name}: {e}")
                     # Fallback to sample data
                     kpis.append(self._get_fallback_kpi(kpi_name))
             
@@ -108,30 +162,9 @@ class DashboardDataModel:
     def get_alerts_data(self) -> List[Dict[str, Any]]:
         """Get alerts data for the dashboard"""
         try:
-            query = """
-                SELECT 
-                    title,
-                    description,
-                    priority,
-                    created_date,
-                    status
-                FROM system_alerts 
-                WHERE status = 'active' 
-                ORDER BY priority DESC, created_date DESC
-                LIMIT 10
-            """
+            result = self.db.execute_query(QUERIES.get('alerts'))
             
-            result = self.db.execute_query(query)
-            
-            alerts = []
-            for _, row in result.iterrows():
-                alert = {
-                    'title': row['title'],
-                    'description': row['description'],
-                    'priority': row['priority'].lower(),
-                    'timestamp': row['created_date'].strftime('%H:%M') if pd.notna(row['created_date']) else 'N/A'
-                }
-                alerts.append(alert)
+            alerts = serialize_frame(result, ALERT_FIELDS)
             
             return alerts if alerts else self._get_sample_alerts()
             
@@ -142,35 +175,9 @@ class DashboardDataModel:
     def get_sales_pipeline_data(self) -> List[Dict[str, Any]]:
         """Get sales pipeline data"""
         try:
-            query = """
-                SELECT 
-                    company_name,
-                    contact_person,
-                    deal_value,
-                    stage,
-                    probability,
-                    expected_close_date,
-                    source
-                FROM sales_pipeline 
-                WHERE status = 'active'
-                ORDER BY deal_value DESC
-                LIMIT 20
-            """
-            
-            result = self.db.execute_query(query)
+            result = self.db.execute_query(QUERIES.get('sales_pipeline'))
             
-            pipeline = []
-            for _, row in result.iterrows():
-                deal = {
-                    'company': row['company_name'],
-                    'contact': row['contact_person'],
-                    'value': f"${row['deal_value']:,.0f}" if pd.notna(row['deal_value']) else '$0',
-                    'stage': row['stage'],
-                    'probability': f"{row['probability']}%" if pd.notna(row['probability']) else '0%',
-                    'close_date': row['expected_close_date'].strftime('%Y-%m-%d') if pd.notna(row['expected_close_date']) else 'TBD',
-                    'source': row['source'] if pd.notna(row['source']) else 'Direct'
-                }
-                pipeline.append(deal)
+            pipeline = serialize_frame(result, PIPELINE_FIELDS)
             
             return pipeline if pipeline else self._get_sample_pipeline()
             
@@ -181,29 +188,9 @@ class DashboardDataModel:
     def get_financial_years(self) -> List[Dict[str, Any]]:
         """Get financial year data for time selector"""
         try:
-            query = """
-                SELECT 
-                    FinancialYearName,
-                    FinancialYearID,
-                    StartDate,
-                    EndDate,
-                    IsActive
-                FROM zFINANCIAL_YEAR 
-                ORDER BY StartDate DESC
-            """
+            result = self.db.execute_query(QUERIES.get('financial_years'))
             
-            result = self.db.execute_query(query)
-            
-            financial_years = []
-            for _, row in result.iterrows():
-                fy = {
-                    'id': row['FinancialYearID'] if pd.notna(row['FinancialYearID']) else None,
-                    'name': row['FinancialYearName'] if pd.notna(row['FinancialYearName']) else 'Unknown',
-                    'start_date': row['StartDate'].strftime('%Y-%m-%d') if pd.notna(row['StartDate']) else None,
-                    'end_date': row['EndDate'].strftime('%Y-%m-%d') if pd.notna(row['EndDate']) else None,
-                    'is_active': bool(row['IsActive']) if pd.notna(row['IsActive']) else False
-                }
-                financial_years.append(fy)
+            financial_years = serialize_frame(result, FINANCIAL_YEAR_FIELDS)
             
             return financial_years if financial_years else self._get_sample_financial_years()
             
@@ -214,28 +201,9 @@ class DashboardDataModel:
     def get_customer_groups(self) -> List[Dict[str, Any]]:
         """Get customer group data for customer group selector"""
         try:
-            query = """
-                SELECT 
-                    CustomerGroupID,
-                    CustomerGroupName,
-                    Description,
-                    IsActive
-                FROM zCustomer_Group 
-                WHERE IsActive = 1
-                ORDER BY CustomerGroupName ASC
-            """
-            
-            result = self.db.execute_query(query)
+            result = self.db.execute_query(QUERIES.get('customer_groups'))
             
-            customer_groups = []
-            for _, row in result.iterrows():
-                cg = {
-                    'id': row['CustomerGroupID'] if pd.notna(row['CustomerGroupID']) else None,
-                    'name': row['CustomerGroupName'] if pd.notna(row['CustomerGroupName']) else 'Unknown',
-                    'description': row['Description'] if pd.notna(row['Description']) else '',
-                    'is_active': bool(row['IsActive']) if pd.notna(row['IsActive']) else True
-                }
-                customer_groups.append(cg)
+            customer_groups = serialize_frame(result, CUSTOMER_GROUP_FIELDS)
             
             return customer_groups if customer_groups else self._get_sample_customer_groups()
             
@@ -261,17 +229,7 @@ class DashboardDataModel:
     def _get_sales_trend_data(self) -> Dict[str, Any]:
         """Get sales trend chart data"""
         try:
-            query = """
-                SELECT 
-                    DATE_FORMAT(date, '%Y-%m') as month,
-                    SUM(amount) as sales
-                FROM sales_data 
-                WHERE date >= DATEADD(month, -12, GETDATE())
-                GROUP BY DATE_FORMAT(date, '%Y-%m')
-                ORDER BY month
-            """
-            
-            result = self.db.execute_query(query)
+            result = self.db.execute_query(QUERIES.get('sales_trend'))
             
             if not result.empty:
                 return {
@@ -289,17 +247,7 @@ class DashboardDataModel:
     def _get_manufacturing_efficiency_data(self) -> Dict[str, Any]:
         """Get manufacturing efficiency chart data"""
         try:
-            query = """
-                SELECT 
-                    factory_name,
-                    AVG(efficiency_rate) as efficiency
-                FROM manufacturing_metrics 
-                WHERE date >= DATEADD(month, -1, GETDATE())
-                GROUP BY factory_name
-                ORDER BY efficiency DESC
-            """
-            
-            result = self.db.execute_query(query)
+            result = self.db.execute_query(QUERIES.get('manufacturing_efficiency'))
             
             if not result.empty:
                 return {
@@ -317,18 +265,7 @@ class DashboardDataModel:
     def _get_logistics_performance_data(self) -> Dict[str, Any]:
         """Get logistics performance chart data"""
         try:
-            query = """
-                SELECT 
-                    region,
-                    AVG(delivery_time) as avg_delivery_time,
-                    COUNT(*) as shipment_count
-                FROM shipments 
-                WHERE delivery_date >= DATEADD(month, -1, GETDATE())
-                GROUP BY region
-                ORDER BY avg_delivery_time
-            """
-            
-            result = self.db.execute_query(query)
+            result = self.db.execute_query(QUERIES.get('logistics_performance'))
             
             if not result.empty:
                 return {
@@ -357,6 +294,7 @@ class DashboardDataModel:
         else:
             return f"{value:.0f}"
     
+    @sample_data
     def _get_fallback_kpi(self, kpi_name: str) -> Dict[str, Any]:
         """Get fallback KPI data when database query fails"""
         fallback_kpis = {
@@ -369,6 +307,7 @@ class DashboardDataModel:
         }
         return fallback_kpis.get(kpi_name, {'id': kpi_name, 'value': 'N/A', 'label': 'Unknown', 'icon_type': 'sales', 'trend': '0%'})
     
+    @sample_data
     def _get_sample_kpis(self) -> List[Dict[str, Any]]:
         """Get sample KPI data as fallback"""
         return [
@@ -380,6 +319,7 @@ class DashboardDataModel:
             {'id': 'revenue_fytd', 'value': '$45.2M', 'label': 'Revenue (FYTD)', 'icon_type': 'financial', 'trend': '+18%'}
         ]
     
+    @sample_data
     def _get_sample_alerts(self) -> List[Dict[str, Any]]:
         """Get sample alerts data as fallback"""
         return [
@@ -389,6 +329,7 @@ class DashboardDataModel:
             {'title': 'System Update', 'description': 'Scheduled maintenance completed successfully', 'priority': 'low', 'timestamp': '11:00'}
         ]
     
+    @sample_data
     def _get_sample_pipeline(self) -> List[Dict[str, Any]]:
         """Get sample pipeline data as fallback"""
         return [
@@ -398,6 +339,7 @@ class DashboardDataModel:
             {'company': 'Asian Markets Co.', 'contact': 'David Kim', 'value': '$380,000', 'stage': 'Discovery', 'probability': '25%', 'close_date': '2024-03-20', 'source': 'Cold Call'}
         ]
     
+    @sample_data
     def _get_sample_financial_years(self) -> List[Dict[str, Any]]:
         """Get sample financial years data as fallback"""
         return [
@@ -407,6 +349,7 @@ class DashboardDataModel:
             {'id': 4, 'name': 'FY 2021-22', 'start_date': '2021-04-01', 'end_date': '2022-03-31', 'is_active': False}
         ]
 
+    @sample_data
     def _get_sample_customer_groups(self) -> List[Dict[str, Any]]:
         """Get sample customer groups data as fallback"""
         return [
@@ -417,6 +360,7 @@ class DashboardDataModel:
             {'id': 5, 'name': 'Retail Customers', 'description': 'Individual retail customers', 'is_active': True}
         ]
 
+    @sample_data
     def _get_sample_chart_data(self, chart_type: str) -> Dict[str, Any]:
         """Get sample chart data as fallback"""
         if chart_type == 'sales_trend':
@@ -443,25 +387,14 @@ class DashboardDataModel:
     def get_countries(self) -> List[Dict[str, Any]]:
         """Get country list from zCountry_Office table"""
         try:
-            query = """
-                SELECT DISTINCT
-                    CountryID,
-                    CountryName
-                FROM zCountry_Office
-                ORDER BY CountryName
-            """
-            result = self.db.execute_query(query)
-            countries: List[Dict[str, Any]] = []
-            for _, row in result.iterrows():
-                countries.append({
-                    'id': int(row['CountryID']) if 'CountryID' in result.columns and pd.notna(row['CountryID']) else None,
-                    'name': row['CountryName'] if 'CountryName' in result.columns and pd.notna(row['CountryName']) else 'Unknown'
-                })
+            result = self.db.execute_query(QUERIES.get('countries'))
+            countries = serialize_frame(result, COUNTRY_FIELDS)
             return countries if countries else self._get_sample_countries()
         except Exception as e:
             logger.error(f"Error fetching countries: {e}")
             return self._get_sample_countries()
 
+    @sample_data
     def _get_sample_countries(self) -> List[Dict[str, Any]]:
         """Fallback country list when database unavailable"""
         return [
@@ -475,20 +408,16 @@ class DashboardDataModel:
     def get_customer_order_metrics(self) -> Dict[str, Any]:
         """Get Customer Order metrics from zinfotrek database"""
         try:
-            # Query for Customer Order data from the current fiscal year
-            query = """
-                SELECT 
-                    COUNT(DISTINCT co.CustomerOrderID) as order_count,
-                    COALESCE(SUM(co.TotalOrderValue), 0) as total_value,
-                    COALESCE(AVG(co.MarginPercentage), 0) as avg_margin,
-                    COALESCE(SUM(co.TotalQuantity), 0) as total_quantity
-                FROM zCustomer_Order co
-                INNER JOIN zFINANCIAL_YEAR fy ON co.FinancialYearID = fy.FinancialYearID
-                WHERE fy.IsActive = 1
-                    AND co.OrderStatus IN ('Active', 'Confirmed', 'Processing')
-            """
+            if self.order_metrics is not None:
+                try:
+                    return self.order_metrics.refresh()
+                except WatermarkError as e:
+                    # Deltas cannot work with this column; stop trying and aggregate in full
+                    logger.error(f"Disabling incremental customer order metrics: {e}")
+                    self.order_metrics = None
             
-            result = self.db.execute_query(query)
+            # Query for Customer Order data from the current fiscal year
+            result = self.db.execute_query(QUERIES.get('customer_order_metrics'))
             
             if not result.empty:
                 row = result.iloc[0]
@@ -505,6 +434,7 @@ class DashboardDataModel:
             logger.error(f"Error fetching customer order metrics: {e}")
             return self._get_sample_customer_order_metrics()
 
+    @sample_data
     def _get_sample_customer_order_metrics(self) -> Dict[str, Any]:
         """Fallback customer order metrics when database unavailable"""
         return {
@@ -517,87 +447,74 @@ class DashboardDataModel:
     def get_cpo_detailed_data(self, customer_name: str = None) -> List[Dict[str, Any]]:
         """Get detailed CPO data using the provided complex query"""
         try:
-            # Base query structure from the provided SQL
-            base_query = """
-                SELECT TOP 100
-                    c.CPOID, 
-                    emp.EmployeeNumber, 
-                    dept.DepartmentName, 
-                    div.DivisionName, 
-                    co.CountryOfficeName, 
-                    c.CPODate, 
-                    c.RecordStatus, 
-                    c.CustomerOrderNumber,
-                    cst.CPOStyleQuantity, 
-                    cst.CPOStyleValue, 
-                    cst.FPOStyleQuantity, 
-                    cst.FPOStyleValue,
-                    sku.CPOSKUCustomerPrice, 
-                    sku.CPOSKUQuantity, 
-                    sku.FPOSKUQuantity,
-                    sku.FPOSKUVendorPrice, 
-                    cust.CustomerName, 
-                    style.StyleCode, 
-                    style.CustomerStyleNumber,
-                    style.StyleName, 
-                    style.StyleDescription, 
-                    colour.ColourName,
-                    fabric.FabricName, 
-                    fabric.Composition, 
-                    brand.MasterValue AS Brand, 
-                    style.CollectionNumber
-                FROM zCPO c
-                INNER JOIN zCPO_STYLE cst ON c.CPOID = cst.CPOID
-                INNER JOIN zCPO_SKU sku ON cst.CPOStyleID = sku.CPOStyleID
-                INNER JOIN zCUSTOMER cust ON c.CustomerID = cust.CustomerID
-                INNER JOIN zSTYLE style ON cst.StyleID = style.StyleID
-                INNER JOIN zCOLOUR colour ON sku.ColourID = colour.ColourID
-                INNER JOIN zFABRIC fabric ON colour.FabricID = fabric.FabricID
-                LEFT JOIN zMASTER_DETAIL brand ON style.BrandID = brand.MasterDetailID
-                LEFT JOIN zUSER usr ON c.CreatedByUserID = usr.UserID
-                LEFT JOIN zEMPLOYEE emp ON usr.EmployeeID = emp.EmployeeID
-                LEFT JOIN zORGANISATION_STRUCTURE org ON emp.DefaultOrgStructureID = org.OrganisationStructureID
-                LEFT JOIN zDEPARTMENT dept ON org.DepartmentID = dept.DepartmentID
-                LEFT JOIN zDIVISION div ON org.DivisionID = div.DivisionID
-                LEFT JOIN zCOUNTRY_OFFICE co ON org.CountryOfficeID = co.CountryOfficeID
-                WHERE c.RecordStatus = 'Active'
-            """
-            
-            # Add customer filter if specified
+            # Customer filter is a bound parameter on its own statement variant
             if customer_name:
-                base_query += f" AND cust.CustomerName = '{customer_name}'"
-            
-            # Add ordering
-            base_query += " ORDER BY c.CPODate DESC"
-            
-            result = self.db.execute_query(base_query)
+                result = self.db.execute_query(
+                    QUERIES.get(cpo_query_name('latest', by_customer=True)),
+                    {'customer_name': customer_name}
+                )
+            else:
+                result = self.db.execute_query(QUERIES.get(cpo_query_name('latest')))
             
-            cpo_data = []
-            for _, row in result.iterrows():
-                cpo_record = {
-                    'cpo_id': row['CPOID'] if pd.notna(row['CPOID']) else None,
-                    'employee_number': row['EmployeeNumber'] if pd.notna(row['EmployeeNumber']) else '',
-                    'department': row['DepartmentName'] if pd.notna(row['DepartmentName']) else '',
-                    'division': row['DivisionName'] if pd.notna(row['DivisionName']) else '',
-                    'country_office': row['CountryOfficeName'] if pd.notna(row['CountryOfficeName']) else '',
-                    'cpo_date': row['CPODate'].strftime('%Y-%m-%d') if pd.notna(row['CPODate']) else '',
-                    'record_status': row['RecordStatus'] if pd.notna(row['RecordStatus']) else '',
-                    'customer_order_number': row['CustomerOrderNumber'] if pd.notna(row['CustomerOrderNumber']) else '',
-                    'cpo_style_quantity': int(row['CPOStyleQuantity']) if pd.notna(row['CPOStyleQuantity']) else 0,
-                    'cpo_style_value': float(row['CPOStyleValue']) if pd.notna(row['CPOStyleValue']) else 0.0,
-                    'fpo_style_quantity': int(row['FPOStyleQuantity']) if pd.notna(row['FPOStyleQuantity']) else 0,
-                    'fpo_style_value': float(row['FPOStyleValue']) if pd.notna(row['FPOStyleValue']) else 0.0,
-                    'customer_name': row['CustomerName'] if pd.notna(row['CustomerName']) else '',
-                    'style_code': row['StyleCode'] if pd.notna(row['StyleCode']) else '',
-                    'style_name': row['StyleName'] if pd.notna(row['StyleName']) else '',
-                    'colour_name': row['ColourName'] if pd.notna(row['ColourName']) else '',
-                    'fabric_name': row['FabricName'] if pd.notna(row['FabricName']) else '',
-                    'brand': row['Brand'] if pd.notna(row['Brand']) else ''
-                }
-                cpo_data.append(cpo_record)
+            cpo_data = serialize_frame(result, CPO_FIELDS)
             
             return cpo_data if cpo_data else []
             
         except Exception as e:
             logger.error(f"Error fetching CPO detailed data: {e}")
-            return []
\ No newline at end of file
+            return self._get_sample_cpo_data()
+
+    @sample_data
+    def _get_sample_cpo_data(self) -> List[Dict[str, Any]]:
+        """Fallback CPO detail rows (none) when database unavailable"""
+        return []
+
+    @staticmethod
+    def _cpo_keyset_params(customer_name: Optional[str], after_date: Optional[datetime],
+                           after_id: Optional[int]) -> Dict[str, Any]:
+        """Bound parameters for the keyset CPO statements"""
+        params: Dict[str, Any] = {}
+        if customer_name:
+            params['customer_name'] = customer_name
+        if after_date is not None:
+            params['after_date'] = after_date
+            params['after_id'] = after_id
+        return params
+
+    def get_cpo_page(self, customer_name: Optional[str] = None, after_date: Optional[datetime] = None,
+                     after_id: Optional[int] = None, page_size: int = 100) -> Dict[str, Any]:
+        """Get one keyset page of CPO detail rows, page_size CPOs at a time
+        
+        Pages are cut on whole CPOs so a CPO's style and SKU rows never span
+        two pages. Pass the returned next_cursor back as after_date/after_id
+        to fetch the following page.
+        """
+        statement = QUERIES.get(cpo_query_name('page', bool(customer_name), after_date is not None))
+        params = self._cpo_keyset_params(customer_name, after_date, after_id)
+        params['page_size'] = page_size
+        
+        result = self.db.execute_query(statement, params)
+        
+        # The page's keys only include CPOs that have detail rows, so a full
+        # page has page_size distinct CPOs and its last row is the last key
+        next_cursor = None
+        if not result.empty and result['CPOID'].nunique() >= page_size:
+            last = result.iloc[-1]
+            next_cursor = {
+                'after_date': pd.Timestamp(last['CPODate']).isoformat(),
+                'after_id': int(last['CPOID'])
+            }
+        return {
+            'data': serialize_frame(result, CPO_FIELDS),
+            'page_size': page_size,
+            'next_cursor': next_cursor
+        }
+
+    def iter_cpo_detailed_data(self, customer_name: Optional[str] = None,
+                               after_date: Optional[datetime] = None, after_id: Optional[int] = None,
+                               chunk_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Stream the full CPO detail history as serialized chunks of up to chunk_size rows"""
+        statement = QUERIES.get(cpo_query_name('stream', bool(customer_name), after_date is not None))
+        params = self._cpo_keyset_params(customer_name, after_date, after_id)
+        for chunk in self.db.stream_query(statement, params, chunk_size=chunk_size):
+            yield serialize_frame(chunk, CPO_FIELDS)
@@ -0,0 +1,155 @@
+"""
+KPI engine for ZXY Business Intelligence Dashboard
+
+Runs every registered KPI definition in a single batched statement so a
+dashboard load costs one database round trip instead of one per KPI. When
+the batch fails the KPIs run one by one, and the engine remembers why for a
+backoff period: KPIs that failed on their own are left out of the batch, and
+a batch that fails while every KPI succeeds alone is not retried.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+logger = logging.getLogger(__name__)
+
+# Seconds a failing KPI stays out of the batch, or the batch stays disabled
+DEFAULT_FAILURE_BACKOFF = 300.0
+
+
+class KPIDefinition:
+    """A KPI statement returning a single row of value, label, icon_type and trend"""
+
+    def __init__(self, kpi_id: str, query: str):
+        self.kpi_id = kpi_id
+        self.query = query.strip()
+        self.statement = text(self.query)
+
+
+class KPIEngine:
+    """Executes registered KPI definitions together and returns all values at once"""
+
+    RESULT_COLUMNS = ('value', 'label', 'icon_type', 'trend')
+
+    def __init__(self, db, max_workers: int = 6, failure_backoff: float = DEFAULT_FAILURE_BACKOFF):
+        self.db = db
+        self.max_workers = max_workers
+        self.failure_backoff = failure_backoff
+        self._definitions: Dict[str, KPIDefinition] = {}
+        self._batched_statements: Dict[Tuple[str, ...], TextClause] = {}
+        self._lock = threading.Lock()
+        # KPI id -> monotonic time until which it is reported as failed without running
+        self._excluded_until: Dict[str, float] = {}
+        self._batch_disabled_until = 0.0
+
+    def register(self, kpi_id: str, query: str) -> None:
+        """Register (or replace) a KPI definition"""
+        self._definitions[kpi_id] = KPIDefinition(kpi_id, query)
+        with self._lock:
+            self._batched_statements.clear()
+            self._excluded_until.pop(kpi_id, None)
+
+    @property
+    def kpi_ids(self) -> List[str]:
+        """KPI ids in registration order"""
+        return list(self._definitions)
+
+    def _get_batched_statement(self, definitions: List[KPIDefinition]) -> TextClause:
+        """Combine definitions into one UNION ALL statement tagged by position, built once per set"""
+        key = tuple(definition.kpi_id for definition in definitions)
+        with self._lock:
+            statement = self._batched_statements.get(key)
+        if statement is None:
+            columns = ', '.join(f"k.{column}" for column in self.RESULT_COLUMNS)
+            parts = [
+                f"SELECT {position} AS kpi_position, {columns} FROM ({definition.query}) k"
+                for position, definition in enumerate(definitions)
+            ]
+            statement = text("\nUNION ALL\n".join(parts))
+            with self._lock:
+                self._batched_statements[key] = statement
+        return statement
+
+    def run(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Run every KPI and return a row per KPI id, or None for KPIs that failed
+
+        KPIs whose statement ran but returned no rows are left out. KPIs still
+        in their failure backoff are reported as failed without running.
+        """
+        if not self._definitions:
+            return {}
+
+        now = time.monotonic()
+        with self._lock:
+            excluded = {kpi_id for kpi_id, until in self._excluded_until.items() if until > now}
+            batch_disabled = now < self._batch_disabled_until
+        definitions = [definition for definition in self._definitions.values() if definition.kpi_id not in excluded]
+
+        rows: Dict[str, Optional[Dict[str, Any]]] = {kpi_id: None for kpi_id in excluded}
+        if batch_disabled or len(definitions) == 1:
+            rows.update(self._run_concurrently(definitions))
+        elif definitions:
+            try:
+                rows.update(self._run_batched(definitions))
+            except Exception as e:
+                rows.update(self._run_after_batch_failure(definitions, e))
+        return {kpi_id: rows[kpi_id] for kpi_id in self.kpi_ids if kpi_id in rows}
+
+    def _run_after_batch_failure(self, definitions: List[KPIDefinition],
+                                 error: Exception) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Run the KPIs one by one and remember what made the batch fail"""
+        rows = self._run_concurrently(definitions)
+        failed = [kpi_id for kpi_id, row in rows.items() if row is None]
+        until = time.monotonic() + self.failure_backoff
+        if not failed:
+            with self._lock:
+                self._batch_disabled_until = until
+            logger.warning(f"Batched KPI query failed although every KPI runs on its own; "
+                           f"running KPIs individually for {self.failure_backoff:.0f}s: {error}")
+        elif len(failed) < len(definitions):
+            with self._lock:
+                self._excluded_until.update({kpi_id: until for kpi_id in failed})
+            logger.warning(f"Batched KPI query failed; leaving {', '.join(failed)} out of the batch "
+                           f"for {self.failure_backoff:.0f}s: {error}")
+        else:
+            # Nothing ran: the database itself is failing, which the circuit breaker handles
+            logger.warning(f"Batched KPI query failed and no KPI ran individually: {error}")
+        return rows
+
+    def _run_batched(self, definitions: List[KPIDefinition]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch the KPIs in a single round trip"""
+        result = self.db.execute_query(self._get_batched_statement(definitions))
+        rows: Dict[str, Dict[str, Any]] = {}
+        for row in result.to_dict('records'):
+            kpi_id = definitions[int(row['kpi_position'])].kpi_id
+            rows[kpi_id] = {column: row[column] for column in self.RESULT_COLUMNS}
+        return rows
+
+    def _run_concurrently(self, definitions: List[KPIDefinition]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch each KPI on its own statement so one bad KPI cannot sink the rest"""
+        workers = max(1, min(self.max_workers, len(definitions)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='kpi') as executor:
+            results = list(executor.map(self._run_single, definitions))
+        return {
+            definition.kpi_id: row
+            for definition, (succeeded, row) in zip(definitions, results)
+            if not succeeded or row is not None
+        }
+
+    def _run_single(self, definition: KPIDefinition) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Fetch one KPI as (succeeded, row); row is None when it failed or came back empty"""
+        try:
+            result = self.db.execute_query(definition.statement)
+            if result.empty:
+                return True, None
+            row = result.iloc[0]
+            return True, {column: row[column] for column in self.RESULT_COLUMNS}
+        except Exception as e:
+            logger.warning(f"Failed to fetch KPI {definition.kpi_id}: {e}")
+            return False, None
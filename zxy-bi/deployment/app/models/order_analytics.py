@@ -0,0 +1,376 @@
+"""
+Order table analytics for ZXY Business Intelligence Dashboard
+
+Ad-hoc filtering, grouping, top-N and search over the order table extract.
+When DuckDB is installed each loaded version of the table is copied once
+into an in-process DuckDB database (an earlier version's copy is dropped
+when no query is reading it) and queries run there, vectorized and across
+all cores; otherwise the same queries run as vectorized pandas over the
+resident snapshot. Both engines return identical results.
+"""
+
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Iterator, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.models.rollup_cube import DIMENSION_KEYS, ROLLUP_DIMENSIONS, ROLLUP_MEASURES, ROW_COUNT
+from app.models.table_store import OrderTableStore, OrderTableSnapshot
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Short names accepted for the min_/max_ range filters
+MEASURE_KEYS = {
+    'value': 'Order Value',
+    'quantity': 'Order Quantity',
+    'margin': 'Margin',
+}
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def _quote(name: str) -> str:
+    """SQL identifier for a column name (they contain spaces)"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+class OrderQuery:
+    """A validated analytics request over the order table
+
+    filters hold the accepted values per dimension, ranges the (min, max)
+    bounds per measure. Without group_by the matching rows themselves are
+    returned, best first by sort.
+    """
+
+    def __init__(self, group_by: Sequence[str] = (), filters: Optional[Dict[str, Sequence[str]]] = None,
+                 ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+                 q: Optional[str] = None, sort: Optional[str] = None, order: str = 'desc',
+                 limit: int = DEFAULT_LIMIT):
+        self.group_by = [self.resolve_dimension(name) for name in group_by]
+        if len(set(self.group_by)) != len(self.group_by):
+            raise ValueError("group_by contains a dimension more than once")
+        self.filters = {self.resolve_dimension(name): list(values) for name, values in (filters or {}).items() if values}
+        self.ranges = {self.resolve_measure(name): bounds for name, bounds in (ranges or {}).items()}
+        self.q = q.lower() if q else None
+
+        sortable = list(ROLLUP_MEASURES) + ([ROW_COUNT] + self.group_by if self.group_by else list(ROLLUP_DIMENSIONS))
+        self.sort = MEASURE_KEYS.get(sort, DIMENSION_KEYS.get(sort, sort)) if sort else 'Order Value'
+        if self.sort not in sortable:
+            raise ValueError(f"Cannot sort by {sort}")
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be 'asc' or 'desc'")
+        self.order = order
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+        self.limit = limit
+
+    @classmethod
+    def from_args(cls, args) -> 'OrderQuery':
+        """Build a query from request arguments
+
+        group_by takes customer_group, customer and factory; those keys are
+        also filters (repeat a key to accept several values); min_value,
+        max_value, min_quantity, max_quantity, min_margin and max_margin
+        bound the measures; q searches the dimension columns; sort, order
+        and limit pick the top-N.
+        """
+        ranges = {}
+        for key in MEASURE_KEYS:
+            bounds = (args.get(f'min_{key}', type=float), args.get(f'max_{key}', type=float))
+            if bounds != (None, None):
+                ranges[key] = bounds
+        return cls(
+            group_by=[name.strip() for name in args.get('group_by', '').split(',') if name.strip()],
+            filters={key: args.getlist(key) for key in DIMENSION_KEYS if args.get(key)},
+            ranges=ranges,
+            q=args.get('q', '').strip() or None,
+            sort=args.get('sort') or None,
+            order=args.get('order', 'desc'),
+            limit=args.get('limit', DEFAULT_LIMIT, type=int)
+        )
+
+    @staticmethod
+    def resolve_dimension(name: str) -> str:
+        """Map a dimension key or column name to a dimension column"""
+        dimension = DIMENSION_KEYS.get(name, name)
+        if dimension not in ROLLUP_DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {name}")
+        return dimension
+
+    @staticmethod
+    def resolve_measure(name: str) -> str:
+        """Map a measure key or column name to a measure column"""
+        measure = MEASURE_KEYS.get(name, name)
+        if measure not in ROLLUP_MEASURES:
+            raise ValueError(f"Unknown measure: {name}")
+        return measure
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The normalized query, echoed in responses"""
+        return {
+            'group_by': self.group_by,
+            'filters': self.filters,
+            'ranges': {measure: list(bounds) for measure, bounds in self.ranges.items()},
+            'q': self.q,
+            'sort': self.sort,
+            'order': self.order,
+            'limit': self.limit
+        }
+
+
+class DuckDBOrderEngine:
+    """Runs order queries in an in-process DuckDB database holding the current table version"""
+
+    name = 'duckdb'
+
+    def __init__(self, threads: Optional[int] = None):
+        config = {'threads': threads} if threads else {}
+        self._conn = duckdb.connect(':memory:', config=config)
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        # Table name -> queries currently reading it; only the current
+        # version's table and tables still being read are kept
+        self._readers: Dict[str, int] = {}
+        self._local = threading.local()
+
+    def _cursor(self):
+        """This thread's cursor; cursors share the database and run concurrently"""
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            cursor = self._local.cursor = self._conn.cursor()
+        return cursor
+
+    @contextmanager
+    def _table(self, snapshot: OrderTableSnapshot) -> Iterator[str]:
+        """Name of the table holding snapshot, copied into DuckDB on first use
+
+        The table is not dropped while the block runs, even if a newer
+        version is loaded meanwhile.
+        """
+        table = f"orders_v{snapshot.version}"
+        with self._lock:
+            if table not in self._readers:
+                self._load(snapshot, table)
+            self._readers[table] += 1
+            self._drop_unused()
+        try:
+            yield table
+        finally:
+            with self._lock:
+                self._readers[table] -= 1
+                self._drop_unused()
+
+    def _load(self, snapshot: OrderTableSnapshot, table: str) -> None:
+        """Copy snapshot into table; called with the lock held"""
+        # Categorical columns arrive as ENUMs, so filters and group-bys
+        # compare dictionary codes rather than strings
+        self._conn.register('order_frame', snapshot.frame)
+        try:
+            self._conn.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM order_frame")
+        finally:
+            self._conn.unregister('order_frame')
+        self._readers[table] = 0
+        if self._version is None or snapshot.version > self._version:
+            self._version = snapshot.version
+        logger.info(f"Loaded {snapshot.row_count} order rows into DuckDB ({table})")
+
+    def _drop_unused(self) -> None:
+        """Drop tables of earlier versions that no query is reading; called with the lock held"""
+        current = f"orders_v{self._version}"
+        for table, readers in list(self._readers.items()):
+            if table != current and readers == 0:
+                self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+                del self._readers[table]
+
+    def _where(self, query: OrderQuery) -> Tuple[str, List[Any]]:
+        """WHERE clause and parameters for the query's filters, ranges and search"""
+        conditions, params = [], []
+        for dimension, values in query.filters.items():
+            conditions.append(f"{_quote(dimension)} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        for measure, (low, high) in query.ranges.items():
+            if low is not None:
+                conditions.append(f"{_quote(measure)} >= ?")
+                params.append(low)
+            if high is not None:
+                conditions.append(f"{_quote(measure)} <= ?")
+                params.append(high)
+        if query.q:
+            conditions.append('(' + ' OR '.join(
+                f"contains(lower({_quote(dimension)}), ?)" for dimension in ROLLUP_DIMENSIONS) + ')')
+            params.extend([query.q] * len(ROLLUP_DIMENSIONS))
+        return ('WHERE ' + ' AND '.join(conditions)) if conditions else '', params
+
+    @staticmethod
+    def _sum(snapshot: OrderTableSnapshot, measure: str) -> str:
+        """Aggregate expression for a measure, keeping integer columns integral"""
+        cast = 'BIGINT' if pd.api.types.is_integer_dtype(snapshot.frame[measure]) else 'DOUBLE'
+        return f"CAST(COALESCE(SUM({_quote(measure)}), 0) AS {cast}) AS {_quote(measure)}"
+
+    @staticmethod
+    def _sort_key(name: str) -> str:
+        """ORDER BY expression; dimensions sort by their text, not their ENUM position"""
+        return f"CAST({_quote(name)} AS VARCHAR)" if name in ROLLUP_DIMENSIONS else _quote(name)
+
+    def run(self, snapshot: OrderTableSnapshot, query: OrderQuery) -> Dict[str, Any]:
+        """Rows (or groups) and totals for the query"""
+        with self._table(snapshot) as table:
+            return self._query(snapshot, table, query)
+
+    def _query(self, snapshot: OrderTableSnapshot, table: str, query: OrderQuery) -> Dict[str, Any]:
+        """Run query against the DuckDB table holding snapshot"""
+        where, params = self._where(query)
+        cursor = self._cursor()
+        sums = ', '.join(self._sum(snapshot, measure) for measure in ROLLUP_MEASURES)
+        direction = 'ASC' if query.order == 'asc' else 'DESC'
+
+        totals_row = cursor.execute(f"SELECT {sums}, COUNT(*) FROM {table} {where}", params).fetchone()
+        totals = dict(zip(list(ROLLUP_MEASURES) + [ROW_COUNT], totals_row))
+
+        if query.group_by:
+            dimensions = ', '.join(_quote(name) for name in query.group_by)
+            statement = (
+                f"SELECT {dimensions}, {sums}, COUNT(*) AS {_quote(ROW_COUNT)}, COUNT(*) OVER () AS total_groups "
+                f"FROM {table} {where} GROUP BY {dimensions} "
+                f"ORDER BY {self._sort_key(query.sort)} {direction}, "
+                f"{', '.join(self._sort_key(name) for name in query.group_by)} LIMIT ?"
+            )
+            names = query.group_by + list(ROLLUP_MEASURES) + [ROW_COUNT]
+        else:
+            columns = ', '.join(_quote(name) for name in snapshot.frame.columns)
+            # rowid keeps ties in table order, as the pandas engine's stable sort does
+            statement = (
+                f"SELECT {columns}, 0 AS total_groups FROM {table} {where} "
+                f"ORDER BY {self._sort_key(query.sort)} {direction}, rowid LIMIT ?"
+            )
+            names = list(snapshot.frame.columns)
+        result = cursor.execute(statement, params + [query.limit]).fetchall()
+        rows = [dict(zip(names, row[:-1])) for row in result]
+        matched = result[0][-1] if query.group_by and result else (0 if query.group_by else totals[ROW_COUNT])
+        return {'rows': rows, 'matched': matched, 'totals': totals}
+
+
+class PandasOrderEngine:
+    """Runs order queries as vectorized pandas operations over the resident snapshot"""
+
+    name = 'pandas'
+
+    def _mask(self, snapshot: OrderTableSnapshot, query: OrderQuery) -> np.ndarray:
+        """Rows matching the query's filters, ranges and search"""
+        mask = np.ones(snapshot.row_count, dtype=bool)
+        for dimension, values in query.filters.items():
+            matched = np.zeros(snapshot.row_count, dtype=bool)
+            for value in values:
+                matched |= snapshot.equals(dimension, value)
+            mask &= matched
+        for measure, (low, high) in query.ranges.items():
+            column = snapshot.frame[measure].to_numpy()
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        if query.q:
+            searched = np.zeros(snapshot.row_count, dtype=bool)
+            for dimension in ROLLUP_DIMENSIONS:
+                codes, values = snapshot.search_keys[dimension]
+                matched = np.flatnonzero(values.str.contains(query.q, regex=False).to_numpy())
+                if len(matched):
+                    searched |= np.isin(codes, matched)
+            mask &= searched
+        return mask
+
+    def run(self, snapshot: OrderTableSnapshot, query: OrderQuery) -> Dict[str, Any]:
+        """Rows (or groups) and totals for the query"""
+        frame = snapshot.frame[self._mask(snapshot, query)]
+        measures = list(ROLLUP_MEASURES)
+        totals = {name: frame[name].sum().item() for name in measures}
+        totals[ROW_COUNT] = len(frame)
+        ascending = query.order == 'asc'
+
+        if query.group_by:
+            grouped = frame.groupby(query.group_by, observed=True, sort=True)
+            result = grouped[measures].sum()
+            result[ROW_COUNT] = grouped.size()
+            result = result.reset_index()
+            for dimension in query.group_by:
+                result[dimension] = result[dimension].astype(object)
+            matched = len(result)
+            result = result.sort_values(query.sort, ascending=ascending, kind='stable').head(query.limit)
+            names = query.group_by + measures + [ROW_COUNT]
+            rows = [dict(zip(names, row)) for row in zip(*(result[name].tolist() for name in names))]
+        else:
+            matched = len(frame)
+            # Categoricals sort by category position; sort dimensions by their text instead
+            result = frame.sort_values(query.sort, ascending=ascending, kind='stable',
+                                       key=lambda column: column.astype(object)).head(query.limit)
+            rows = OrderTableStore.to_records(result)
+        return {'rows': rows, 'matched': matched, 'totals': totals}
+
+
+class OrderAnalytics:
+    """Analytics queries over an OrderTableStore on the best available engine"""
+
+    def __init__(self, store: OrderTableStore, engine: str = 'auto', threads: Optional[int] = None):
+        if engine not in ('auto', 'duckdb', 'pandas'):
+            raise ValueError(f"Unknown analytics engine: {engine}")
+        if engine == 'duckdb' and not DUCKDB_AVAILABLE:
+            raise ValueError("TABLE_ANALYTICS_ENGINE=duckdb but duckdb is not installed")
+        self.store = store
+        self.threads = threads
+        self.use_duckdb = DUCKDB_AVAILABLE and engine != 'pandas'
+        self._engine = None
+        self._engine_pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._pandas = PandasOrderEngine()
+
+    @property
+    def engine(self):
+        """The engine for this process; DuckDB connections are never shared across a fork"""
+        if not self.use_duckdb:
+            return self._pandas
+        if self._engine is None or self._engine_pid != os.getpid():
+            with self._lock:
+                if self._engine is None or self._engine_pid != os.getpid():
+                    self._engine = DuckDBOrderEngine(self.threads)
+                    self._engine_pid = os.getpid()
+        return self._engine
+
+    def query(self, query: OrderQuery) -> Dict[str, Any]:
+        """Run a query against the current table version"""
+        snapshot = self.store.snapshot()
+        engine = self.engine
+        try:
+            result = engine.run(snapshot, query)
+        except Exception as e:
+            if engine is self._pandas:
+                raise
+            logger.warning(f"DuckDB order query failed, using pandas: {e}")
+            engine = self._pandas
+            result = engine.run(snapshot, query)
+        result.update({
+            'query': query.to_dict(),
+            'engine': engine.name,
+            'version': snapshot.version
+        })
+        return result
+
+
+def order_analytics_from_env(store: OrderTableStore) -> OrderAnalytics:
+    """Analytics configured by TABLE_ANALYTICS_ENGINE and TABLE_ANALYTICS_THREADS"""
+    threads = os.environ.get('TABLE_ANALYTICS_THREADS')
+    return OrderAnalytics(
+        store,
+        engine=os.environ.get('TABLE_ANALYTICS_ENGINE', 'auto').lower(),
+        threads=int(threads) if threads else None
+    )
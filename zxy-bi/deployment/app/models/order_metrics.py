@@ -0,0 +1,189 @@
+"""
+Incremental customer order metrics for ZXY Business Intelligence Dashboard
+
+Keeps the active fiscal year's order aggregates in memory and, on each
+refresh, reads only the zCustomer_Order rows changed since the last
+watermark, so a refresh costs in proportion to the changes rather than to the
+size of the year. Averages are kept as sum and count so contributions can be
+added and removed. The watermark column is either a datetime (e.g.
+ModifiedDate) or a rowversion.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import pandas as pd
+
+from app.models.queries import QUERIES
+
+logger = logging.getLogger(__name__)
+
+# Order statuses counted by the metrics, as in the full customer_order_metrics query
+ACTIVE_ORDER_STATUSES = frozenset(('Active', 'Confirmed', 'Processing'))
+
+# (value, quantity, margin sum, margin count) contributed by one order
+Contribution = Tuple[float, float, float, int]
+
+
+class WatermarkError(ValueError):
+    """Raised when the watermark column cannot order changes, so deltas would miss them"""
+
+
+def max_watermark(values: pd.Series) -> Any:
+    """Latest watermark in values: a datetime, or the bytes of a rowversion
+
+    Raises WatermarkError if there are rows but none has a usable watermark,
+    or a value is neither a rowversion nor a date.
+    """
+    present = values.dropna()
+    if present.empty:
+        raise WatermarkError(f"Watermark column is NULL in all {len(values)} rows")
+    if len(present) < len(values):
+        logger.warning(f"{len(values) - len(present)} orders have a NULL watermark; "
+                       f"their changes are only seen by full resyncs")
+    if all(isinstance(value, (bytes, bytearray)) for value in present):
+        # rowversion: fixed-width big-endian counters, ordered bytewise like the server orders them
+        return max(bytes(value) for value in present)
+    parsed = pd.to_datetime(present, errors='coerce')
+    if parsed.isna().any():
+        raise WatermarkError(f"Watermark value {present[parsed.isna()].iloc[0]!r} is neither a date "
+                             f"nor a rowversion")
+    return parsed.max().to_pydatetime()
+
+
+class IncrementalOrderMetrics:
+    """Running customer order aggregates maintained from watermarked deltas
+
+    A full resync runs on first use, when the active fiscal year changes, and
+    every resync_interval seconds to pick up hard deletes, which a watermark
+    cannot see.
+    """
+
+    def __init__(self, db, resync_interval: Optional[float] = None):
+        self.db = db
+        self.resync_interval = resync_interval or float(os.environ.get('ORDER_METRICS_RESYNC_INTERVAL', 3600))
+        self._lock = threading.Lock()
+        self._financial_year_id = None
+        self._watermark = None
+        self._synced_at = 0.0
+        self._contributions: Dict[Any, Contribution] = {}
+        self._value = 0.0
+        self._quantity = 0.0
+        self._margin_sum = 0.0
+        self._margin_count = 0
+        self.resyncs = 0
+        self.deltas = 0
+        self.rows_applied = 0
+
+    def refresh(self) -> Dict[str, Any]:
+        """Bring the aggregates up to date and return the metrics"""
+        with self._lock:
+            try:
+                financial_year_id = self.db.execute_scalar(QUERIES.get('customer_order_metrics.active_year'))
+                if (financial_year_id != self._financial_year_id or self._watermark is None
+                        or time.monotonic() - self._synced_at > self.resync_interval):
+                    self._resync(financial_year_id)
+                else:
+                    self._apply_delta()
+            except Exception:
+                # The aggregates may be half-updated; rebuild them next time
+                self._watermark = None
+                raise
+            return self.metrics()
+
+    def _resync(self, financial_year_id) -> None:
+        """Rebuild the aggregates from every order of the fiscal year"""
+        rows = self.db.execute_query(
+            QUERIES.get('customer_order_metrics.rows'),
+            {'financial_year_id': financial_year_id}
+        )
+        self._contributions = {}
+        self._value = self._quantity = self._margin_sum = 0.0
+        self._margin_count = 0
+        self._apply_rows(rows)
+        self._financial_year_id = financial_year_id
+        self._synced_at = time.monotonic()
+        self.resyncs += 1
+        logger.info(f"Resynced customer order metrics for financial year {financial_year_id} "
+                    f"({len(self._contributions)} orders)")
+
+    def _apply_delta(self) -> None:
+        """Fold in the orders changed since the watermark"""
+        rows = self.db.execute_query(
+            QUERIES.get('customer_order_metrics.delta'),
+            {'financial_year_id': self._financial_year_id, 'watermark': self._watermark}
+        )
+        self._apply_rows(rows)
+        self.deltas += 1
+        logger.info(f"Applied {len(rows)} changed customer orders since {self._watermark}")
+
+    def _apply_rows(self, rows: pd.DataFrame) -> None:
+        """Replace the contribution of each order in rows"""
+        if rows.empty:
+            return
+        values = pd.to_numeric(rows['TotalOrderValue'], errors='coerce').fillna(0.0).tolist()
+        quantities = pd.to_numeric(rows['TotalQuantity'], errors='coerce').fillna(0.0).tolist()
+        margins = pd.to_numeric(rows['MarginPercentage'], errors='coerce')
+        has_margin = margins.notna().tolist()
+        margins = margins.fillna(0.0).tolist()
+        active = rows['OrderStatus'].isin(ACTIVE_ORDER_STATUSES).tolist()
+
+        for order_id, value, quantity, margin, counted, is_active in zip(
+                rows['CustomerOrderID'].tolist(), values, quantities, margins, has_margin, active):
+            self._remove(order_id)
+            if is_active:
+                self._add(order_id, (value, quantity, margin if counted else 0.0, 1 if counted else 0))
+
+        watermark = max_watermark(rows['watermark'])
+        if self._watermark is None or watermark > self._watermark:
+            self._watermark = watermark
+        self.rows_applied += len(rows)
+
+    def _add(self, order_id, contribution: Contribution) -> None:
+        """Count an order into the running totals"""
+        self._contributions[order_id] = contribution
+        self._value += contribution[0]
+        self._quantity += contribution[1]
+        self._margin_sum += contribution[2]
+        self._margin_count += contribution[3]
+
+    def _remove(self, order_id) -> None:
+        """Take an order's previous contribution back out of the running totals"""
+        contribution = self._contributions.pop(order_id, None)
+        if contribution is not None:
+            self._value -= contribution[0]
+            self._quantity -= contribution[1]
+            self._margin_sum -= contribution[2]
+            self._margin_count -= contribution[3]
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current metrics in the shape of get_customer_order_metrics"""
+        return {
+            'quantity': len(self._contributions),
+            'value': float(self._value),
+            'margin': self._margin_sum / self._margin_count if self._margin_count else 0.0,
+            'total_quantity': int(self._quantity)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Maintenance counters for diagnostics"""
+        return {
+            'financial_year_id': self._financial_year_id,
+            'watermark': _format_watermark(self._watermark),
+            'orders': len(self._contributions),
+            'resyncs': self.resyncs,
+            'deltas': self.deltas,
+            'rows_applied': self.rows_applied
+        }
+
+
+def _format_watermark(watermark: Any) -> Optional[str]:
+    """Watermark for diagnostics: ISO date, or rowversion as 0x-prefixed hex"""
+    if watermark is None:
+        return None
+    if isinstance(watermark, bytes):
+        return '0x' + watermark.hex().upper()
+    return watermark.isoformat()
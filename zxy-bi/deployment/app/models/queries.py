@@ -0,0 +1,378 @@
+"""
+Query registry for ZXY Business Intelligence Dashboard
+
+Every statement DashboardDataModel runs is registered here by name, built
+once with text() and bound parameters. Values are never spliced into the SQL,
+so each statement has one text and SQL Server can reuse its cached plan.
+"""
+
+import os
+import re
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+
+class QueryRegistry:
+    """Named, parameterized statements compiled once per process"""
+
+    def __init__(self):
+        self._statements: Dict[str, TextClause] = {}
+
+    def register(self, name: str, sql: str) -> TextClause:
+        """Build and register a statement; names must be unique"""
+        if name in self._statements:
+            raise ValueError(f"Query already registered: {name}")
+        statement = text(sql.strip())
+        self._statements[name] = statement
+        return statement
+
+    def get(self, name: str) -> TextClause:
+        """Look up a registered statement"""
+        try:
+            return self._statements[name]
+        except KeyError:
+            raise KeyError(f"Unknown query: {name}") from None
+
+    def names(self) -> List[str]:
+        """Names of all registered statements"""
+        return sorted(self._statements)
+
+
+QUERIES = QueryRegistry()
+
+# KPI statements executed together by the KPI engine, in display order
+# (adjust these based on your actual database schema). The engine compiles
+# them into its own batched statement.
+KPI_QUERIES = {
+    'total_sales': """
+        SELECT 
+            COALESCE(SUM(amount), 0) as value,
+            'Total Sales' as label,
+            'sales' as icon_type,
+            '+15%' as trend
+        FROM sales_data 
+        WHERE date >= DATEADD(month, -1, GETDATE())
+    """,
+    'active_prospects': """
+        SELECT 
+            COUNT(*) as value,
+            'Active Prospects' as label,
+            'sales' as icon_type,
+            '+8%' as trend
+        FROM prospects 
+        WHERE status = 'active'
+    """,
+    'pipeline_value': """
+        SELECT 
+            COALESCE(SUM(value), 0) as value,
+            'Pipeline Value' as label,
+            'sales' as icon_type,
+            '+23%' as trend
+        FROM sales_pipeline 
+        WHERE status IN ('qualified', 'proposal', 'negotiation')
+    """,
+    'factory_utilization': """
+        SELECT 
+            COALESCE(AVG(utilization_rate), 0) as value,
+            'Factory Utilization' as label,
+            'manufacturing' as icon_type,
+            '+5%' as trend
+        FROM manufacturing_metrics 
+        WHERE date >= DATEADD(day, -7, GETDATE())
+    """,
+    'on_time_delivery': """
+        SELECT 
+            COALESCE(
+                (COUNT(CASE WHEN delivery_date <= promised_date THEN 1 END) * 100.0 / COUNT(*)), 
+                0
+            ) as value,
+            'On-Time Delivery' as label,
+            'logistics' as icon_type,
+            '+2%' as trend
+        FROM shipments 
+        WHERE delivery_date >= DATEADD(month, -1, GETDATE())
+    """,
+    'revenue_fytd': """
+        SELECT 
+            COALESCE(SUM(revenue), 0) as value,
+            'Revenue (FYTD)' as label,
+            'financial' as icon_type,
+            '+18%' as trend
+        FROM financial_data 
+        WHERE fiscal_year = YEAR(GETDATE())
+    """
+}
+
+QUERIES.register('alerts', """
+    SELECT 
+        title,
+        description,
+        priority,
+        created_date,
+        status
+    FROM system_alerts 
+    WHERE status = 'active' 
+    ORDER BY priority DESC, created_date DESC
+    LIMIT 10
+""")
+
+QUERIES.register('sales_pipeline', """
+    SELECT 
+        company_name,
+        contact_person,
+        deal_value,
+        stage,
+        probability,
+        expected_close_date,
+        source
+    FROM sales_pipeline 
+    WHERE status = 'active'
+    ORDER BY deal_value DESC
+    LIMIT 20
+""")
+
+QUERIES.register('financial_years', """
+    SELECT 
+        FinancialYearName,
+        FinancialYearID,
+        StartDate,
+        EndDate,
+        IsActive
+    FROM zFINANCIAL_YEAR 
+    ORDER BY StartDate DESC
+""")
+
+QUERIES.register('customer_groups', """
+    SELECT 
+        CustomerGroupID,
+        CustomerGroupName,
+        Description,
+        IsActive
+    FROM zCustomer_Group 
+    WHERE IsActive = 1
+    ORDER BY CustomerGroupName ASC
+""")
+
+QUERIES.register('sales_trend', """
+    SELECT 
+        DATE_FORMAT(date, '%Y-%m') as month,
+        SUM(amount) as sales
+    FROM sales_data 
+    WHERE date >= DATEADD(month, -12, GETDATE())
+    GROUP BY DATE_FORMAT(date, '%Y-%m')
+    ORDER BY month
+""")
+
+QUERIES.register('manufacturing_efficiency', """
+    SELECT 
+        factory_name,
+        AVG(efficiency_rate) as efficiency
+    FROM manufacturing_metrics 
+    WHERE date >= DATEADD(month, -1, GETDATE())
+    GROUP BY factory_name
+    ORDER BY efficiency DESC
+""")
+
+QUERIES.register('logistics_performance', """
+    SELECT 
+        region,
+        AVG(delivery_time) as avg_delivery_time,
+        COUNT(*) as shipment_count
+    FROM shipments 
+    WHERE delivery_date >= DATEADD(month, -1, GETDATE())
+    GROUP BY region
+    ORDER BY avg_delivery_time
+""")
+
+QUERIES.register('countries', """
+    SELECT DISTINCT
+        CountryID,
+        CountryName
+    FROM zCountry_Office
+    ORDER BY CountryName
+""")
+
+QUERIES.register('customer_order_metrics', """
+    SELECT 
+        COUNT(DISTINCT co.CustomerOrderID) as order_count,
+        COALESCE(SUM(co.TotalOrderValue), 0) as total_value,
+        COALESCE(AVG(co.MarginPercentage), 0) as avg_margin,
+        COALESCE(SUM(co.TotalQuantity), 0) as total_quantity
+    FROM zCustomer_Order co
+    INNER JOIN zFINANCIAL_YEAR fy ON co.FinancialYearID = fy.FinancialYearID
+    WHERE fy.IsActive = 1
+        AND co.OrderStatus IN ('Active', 'Confirmed', 'Processing')
+""")
+
+# Incremental customer order metrics: per-order rows of the active fiscal
+# year, either all of them (resync) or those changed since a watermark
+ORDER_METRICS_WATERMARK_COLUMN = os.environ.get('ORDER_METRICS_WATERMARK_COLUMN', 'ModifiedDate')
+if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', ORDER_METRICS_WATERMARK_COLUMN):
+    raise ValueError(f"Invalid ORDER_METRICS_WATERMARK_COLUMN: {ORDER_METRICS_WATERMARK_COLUMN}")
+
+QUERIES.register('customer_order_metrics.active_year', """
+    SELECT TOP 1 fy.FinancialYearID
+    FROM zFINANCIAL_YEAR fy
+    WHERE fy.IsActive = 1
+    ORDER BY fy.FinancialYearID DESC
+""")
+
+ORDER_METRICS_ROW_COLUMNS = f"""
+    co.CustomerOrderID,
+    co.TotalOrderValue,
+    co.TotalQuantity,
+    co.MarginPercentage,
+    co.OrderStatus,
+    co.{ORDER_METRICS_WATERMARK_COLUMN} AS watermark
+"""
+
+QUERIES.register('customer_order_metrics.rows', f"""
+    SELECT {ORDER_METRICS_ROW_COLUMNS}
+    FROM zCustomer_Order co
+    WHERE co.FinancialYearID = :financial_year_id
+        AND co.OrderStatus IN ('Active', 'Confirmed', 'Processing')
+""")
+
+# >= rather than >: rows sharing the watermark timestamp may commit after it
+# was read; re-reading them is harmless because each row replaces its order
+QUERIES.register('customer_order_metrics.delta', f"""
+    SELECT {ORDER_METRICS_ROW_COLUMNS}
+    FROM zCustomer_Order co
+    WHERE co.FinancialYearID = :financial_year_id
+        AND co.{ORDER_METRICS_WATERMARK_COLUMN} >= :watermark
+""")
+
+# Column list and joins of the CPO detail query (the provided complex query)
+CPO_DETAIL_COLUMNS = """
+    c.CPOID,
+    emp.EmployeeNumber,
+    dept.DepartmentName,
+    div.DivisionName,
+    co.CountryOfficeName,
+    c.CPODate,
+    c.RecordStatus,
+    c.CustomerOrderNumber,
+    cst.CPOStyleQuantity,
+    cst.CPOStyleValue,
+    cst.FPOStyleQuantity,
+    cst.FPOStyleValue,
+    sku.CPOSKUCustomerPrice,
+    sku.CPOSKUQuantity,
+    sku.FPOSKUQuantity,
+    sku.FPOSKUVendorPrice,
+    cust.CustomerName,
+    style.StyleCode,
+    style.CustomerStyleNumber,
+    style.StyleName,
+    style.StyleDescription,
+    colour.ColourName,
+    fabric.FabricName,
+    fabric.Composition,
+    brand.MasterValue AS Brand,
+    style.CollectionNumber
+"""
+
+CPO_DETAIL_JOINS = """
+INNER JOIN zCPO_STYLE cst ON c.CPOID = cst.CPOID
+INNER JOIN zCPO_SKU sku ON cst.CPOStyleID = sku.CPOStyleID
+INNER JOIN zCUSTOMER cust ON c.CustomerID = cust.CustomerID
+INNER JOIN zSTYLE style ON cst.StyleID = style.StyleID
+INNER JOIN zCOLOUR colour ON sku.ColourID = colour.ColourID
+INNER JOIN zFABRIC fabric ON colour.FabricID = fabric.FabricID
+LEFT JOIN zMASTER_DETAIL brand ON style.BrandID = brand.MasterDetailID
+LEFT JOIN zUSER usr ON c.CreatedByUserID = usr.UserID
+LEFT JOIN zEMPLOYEE emp ON usr.EmployeeID = emp.EmployeeID
+LEFT JOIN zORGANISATION_STRUCTURE org ON emp.DefaultOrgStructureID = org.OrganisationStructureID
+LEFT JOIN zDEPARTMENT dept ON org.DepartmentID = dept.DepartmentID
+LEFT JOIN zDIVISION div ON org.DivisionID = div.DivisionID
+LEFT JOIN zCOUNTRY_OFFICE co ON org.CountryOfficeID = co.CountryOfficeID
+"""
+
+# Newest CPOs first; CPOID breaks ties so (CPODate, CPOID) is a stable keyset
+CPO_KEYSET_ORDER = "ORDER BY c.CPODate DESC, c.CPOID DESC"
+CPO_KEYSET_FILTER = "AND (c.CPODate < :after_date OR (c.CPODate = :after_date AND c.CPOID < :after_id))"
+CPO_CUSTOMER_FILTER = "AND cust.CustomerName = :customer_name"
+
+# CPOs with at least one row through the inner joins of CPO_DETAIL_JOINS (the
+# customer join is in the page query itself), so every key a page selects
+# yields detail rows
+CPO_HAS_DETAIL_FILTER = """
+    AND EXISTS (
+        SELECT 1
+        FROM zCPO_STYLE cst
+        INNER JOIN zCPO_SKU sku ON cst.CPOStyleID = sku.CPOStyleID
+        INNER JOIN zSTYLE style ON cst.StyleID = style.StyleID
+        INNER JOIN zCOLOUR colour ON sku.ColourID = colour.ColourID
+        INNER JOIN zFABRIC fabric ON colour.FabricID = fabric.FabricID
+        WHERE cst.CPOID = c.CPOID
+    )
+"""
+
+
+def cpo_query_name(kind: str, by_customer: bool = False, after_cursor: bool = False) -> str:
+    """Name of a CPO detail statement variant; kind is latest, page or stream"""
+    name = f"cpo_detail.{kind}"
+    if by_customer:
+        name += '.by_customer'
+    if after_cursor:
+        name += '.after'
+    return name
+
+
+def _register_cpo_queries() -> None:
+    """Register one CPO detail statement per combination of filters
+
+    A separate statement per filter shape, rather than optional predicates
+    such as (:customer_name IS NULL OR ...), gives each shape of the join its
+    own tight plan.
+    """
+    for by_customer in (False, True):
+        customer_filter = CPO_CUSTOMER_FILTER if by_customer else ""
+        QUERIES.register(cpo_query_name('latest', by_customer), f"""
+            SELECT TOP 100
+                {CPO_DETAIL_COLUMNS}
+            FROM zCPO c
+            {CPO_DETAIL_JOINS}
+            WHERE c.RecordStatus = 'Active'
+                {customer_filter}
+            ORDER BY c.CPODate DESC
+        """)
+
+        for after_cursor in (False, True):
+            keyset_filter = CPO_KEYSET_FILTER if after_cursor else ""
+            # Pages are cut on whole CPOs so a CPO's style and SKU rows never span
+            # two pages. The keys apply the same inner joins as the detail rows,
+            # so a page of page_size keys always has page_size CPOs in it.
+            QUERIES.register(cpo_query_name('page', by_customer, after_cursor), f"""
+                WITH cpo_page AS (
+                    SELECT TOP (:page_size) c.CPOID
+                    FROM zCPO c
+                    INNER JOIN zCUSTOMER cust ON c.CustomerID = cust.CustomerID
+                    WHERE c.RecordStatus = 'Active'
+                        {customer_filter}
+                        {keyset_filter}
+                        {CPO_HAS_DETAIL_FILTER}
+                    {CPO_KEYSET_ORDER}
+                )
+                SELECT
+                    {CPO_DETAIL_COLUMNS}
+                FROM cpo_page p
+                INNER JOIN zCPO c ON c.CPOID = p.CPOID
+                {CPO_DETAIL_JOINS}
+                {CPO_KEYSET_ORDER}
+            """)
+            QUERIES.register(cpo_query_name('stream', by_customer, after_cursor), f"""
+                SELECT
+                    {CPO_DETAIL_COLUMNS}
+                FROM zCPO c
+                {CPO_DETAIL_JOINS}
+                WHERE c.RecordStatus = 'Active'
+                    {customer_filter}
+                    {keyset_filter}
+                {CPO_KEYSET_ORDER}
+            """)
+
+
+_register_cpo_queries()
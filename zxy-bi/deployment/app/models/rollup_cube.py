@@ -0,0 +1,107 @@
+"""
+Pre-aggregated rollup cube for ZXY Business Intelligence Dashboard
+
+Holds subtotals of the order table for every combination of Customer Group,
+CustomerName and FactoryName so drill-down views are lookups, not scans.
+"""
+
+from itertools import combinations
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import pandas as pd
+
+ROLLUP_DIMENSIONS = ('Customer Group', 'CustomerName', 'FactoryName')
+ROLLUP_MEASURES = ('Order Value', 'Order Quantity', 'Margin')
+ROW_COUNT = 'Row Count'
+
+# Short names accepted for group_by and as drill-down filter parameters
+DIMENSION_KEYS = {
+    'customer_group': 'Customer Group',
+    'customer': 'CustomerName',
+    'factory': 'FactoryName',
+}
+
+
+class OrderRollupCube:
+    """Subtotals of the order measures for every subset of the rollup dimensions"""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.cuboids: Dict[Tuple[str, ...], pd.DataFrame] = {}
+
+        # Aggregate the rows once at the finest grain, then roll coarser
+        # cuboids up from that instead of rescanning the table
+        base = frame.groupby(list(ROLLUP_DIMENSIONS), observed=True, sort=False)[list(ROLLUP_MEASURES)].sum()
+        base[ROW_COUNT] = frame.groupby(list(ROLLUP_DIMENSIONS), observed=True, sort=False).size()
+        base = base.reset_index()
+        for size in range(len(ROLLUP_DIMENSIONS) + 1):
+            for dimensions in combinations(ROLLUP_DIMENSIONS, size):
+                self.cuboids[dimensions] = self._aggregate(base, dimensions)
+
+    @staticmethod
+    def _aggregate(base: pd.DataFrame, dimensions: Tuple[str, ...]) -> pd.DataFrame:
+        """Roll the base cuboid up to the given dimensions"""
+        measures = list(ROLLUP_MEASURES) + [ROW_COUNT]
+        if not dimensions:
+            return base[measures].sum().to_frame().T
+        cuboid = base.groupby(list(dimensions), observed=True, sort=True)[measures].sum().reset_index()
+        for dimension in dimensions:
+            cuboid[dimension] = cuboid[dimension].astype(object)
+        return cuboid
+
+    @staticmethod
+    def resolve_dimension(name: str) -> str:
+        """Map a dimension key or column name to a rollup dimension"""
+        dimension = DIMENSION_KEYS.get(name, name)
+        if dimension not in ROLLUP_DIMENSIONS:
+            raise ValueError(f"Unknown rollup dimension: {name}")
+        return dimension
+
+    def lookup(self, group_by: Sequence[str], filters: Optional[Dict[str, str]] = None,
+               sort: Optional[str] = None, order: str = 'asc') -> Dict[str, Any]:
+        """Subtotals grouped by group_by within the filtered slice, plus the slice totals"""
+        group_by = [self.resolve_dimension(name) for name in group_by]
+        filters = {self.resolve_dimension(name): value for name, value in (filters or {}).items()}
+        if len(set(group_by)) != len(group_by):
+            raise ValueError("group_by contains a dimension more than once")
+        if sort and sort not in ROLLUP_MEASURES + (ROW_COUNT,) and sort not in group_by:
+            raise ValueError(f"Cannot sort rollup by {sort}")
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be 'asc' or 'desc'")
+
+        rows = self._slice(tuple(group_by), filters)
+        if sort:
+            rows = rows.sort_values(sort, ascending=(order == 'asc'), kind='stable')
+        totals = self._slice((), filters)
+
+        return {
+            'group_by': group_by,
+            'filters': filters,
+            'rows': self._to_records(rows, group_by),
+            'totals': self._to_records(totals, [])[0] if len(totals) else self._empty_totals()
+        }
+
+    def _slice(self, group_by: Tuple[str, ...], filters: Dict[str, str]) -> pd.DataFrame:
+        """Rows of the smallest cuboid covering group_by and the filter dimensions"""
+        needed = set(group_by) | set(filters)
+        dimensions = tuple(dimension for dimension in ROLLUP_DIMENSIONS if dimension in needed)
+        cuboid = self.cuboids[dimensions]
+        if not filters:
+            return cuboid
+        mask = pd.Series(True, index=cuboid.index)
+        for dimension, value in filters.items():
+            mask &= cuboid[dimension] == value
+        # Cuboid rows are unique per dimension combination, so fixing the
+        # filter dimensions leaves at most one row per group_by key
+        return cuboid[mask]
+
+    @staticmethod
+    def _to_records(frame: pd.DataFrame, group_by: List[str]) -> List[Dict[str, Any]]:
+        """Serialize cuboid rows with native Python values"""
+        names = group_by + list(ROLLUP_MEASURES) + [ROW_COUNT]
+        columns = [frame[name].tolist() for name in names]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    @staticmethod
+    def _empty_totals() -> Dict[str, Any]:
+        """Totals for a slice with no rows"""
+        return {name: 0 for name in ROLLUP_MEASURES + (ROW_COUNT,)}
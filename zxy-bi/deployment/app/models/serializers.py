@@ -0,0 +1,92 @@
+"""
+DataFrame serialization for ZXY Business Intelligence Dashboard
+
+Declarative column mappings that turn query results into JSON-ready records.
+Each field is converted a whole column at a time; rows are only assembled at
+the end.
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Sequence
+
+import pandas as pd
+
+FIELD_KINDS = ('raw', 'int', 'float', 'bool', 'date', 'currency', 'percent')
+
+
+class Field:
+    """Maps a result column to an output key with a type and a null default
+
+    kind is one of:
+        raw      - the value as returned, with nulls replaced by default
+        int      - cast to int
+        float    - cast to float
+        bool     - cast to bool
+        date     - formatted with date_format (default %Y-%m-%d)
+        currency - formatted as "$1,234" (override with number_format)
+        percent  - the value followed by "%"
+    transform, if given, is applied to the non-null values as a Series
+    before the kind conversion (e.g. lambda s: s.str.lower()).
+    """
+
+    def __init__(self, source: str, name: Optional[str] = None, kind: str = 'raw',
+                 default: Any = None, date_format: str = '%Y-%m-%d',
+                 number_format: str = '${:,.0f}',
+                 transform: Optional[Callable[[pd.Series], pd.Series]] = None):
+        if kind not in FIELD_KINDS:
+            raise ValueError(f"Unknown field kind: {kind}")
+        self.source = source
+        self.name = name or source
+        self.kind = kind
+        self.default = default
+        self.date_format = date_format
+        self.number_format = number_format
+        self.transform = transform
+
+    def column_values(self, frame: pd.DataFrame) -> List[Any]:
+        """Convert the source column of frame into a list of output values"""
+        if self.source not in frame.columns:
+            return [self.default] * len(frame)
+
+        column = frame[self.source]
+        if self.kind == 'date':
+            column = pd.to_datetime(column, errors='coerce')
+        elif self.kind in ('int', 'float', 'currency'):
+            column = pd.to_numeric(column, errors='coerce')
+        present = column.notna()
+        if not present.any():
+            return [self.default] * len(frame)
+
+        values = column[present]
+        if self.transform is not None:
+            values = self.transform(values)
+        values = self._convert(values)
+
+        if present.all():
+            return values.tolist()
+        return values.astype(object).reindex(column.index).where(present, self.default).tolist()
+
+    def _convert(self, values: pd.Series) -> pd.Series:
+        """Apply the kind conversion to the non-null values"""
+        if self.kind == 'int':
+            return values.astype('int64')
+        if self.kind == 'float':
+            return values.astype('float64')
+        if self.kind == 'bool':
+            return values.astype(bool)
+        if self.kind == 'date':
+            return values.dt.strftime(self.date_format)
+        if self.kind == 'currency':
+            return values.map(self.number_format.format)
+        if self.kind == 'percent':
+            return values.astype(str) + '%'
+        # Box as Python objects so numpy scalars do not leak into the output
+        return values.astype(object)
+
+
+def serialize_frame(frame: pd.DataFrame, fields: Sequence[Field]) -> List[Dict[str, Any]]:
+    """Serialize a result frame into records according to fields"""
+    if frame.empty:
+        return []
+    names = [field.name for field in fields]
+    columns = [field.column_values(frame) for field in fields]
+    return [dict(zip(names, row)) for row in zip(*columns)]
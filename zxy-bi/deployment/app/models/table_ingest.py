@@ -0,0 +1,98 @@
+"""
+Order table ingestion for ZXY Business Intelligence Dashboard
+
+Converts an order table extract (data/data.csv) into a typed Arrow IPC file
+or Parquet file for the table store. Arrow files are written uncompressed so
+workers can memory-map them and share the column buffers; Parquet is smaller
+on disk but is decoded on load. Files are written next to the destination and
+renamed into place, so a worker never sees a partly written extract.
+
+    python -m app.models.table_ingest ../data/data.csv
+    python -m app.models.table_ingest ../data/data.csv --output ../data/data.parquet
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from typing import Dict, List, Any, Optional, Tuple
+
+from app.models.table_store import ORDER_TABLE_SCHEMA, PYARROW_AVAILABLE, read_order_table, table_format
+
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+logger = logging.getLogger(__name__)
+
+
+def default_destination(source: str, file_format: str = 'arrow') -> str:
+    """Path next to source with the extension of file_format"""
+    return os.path.splitext(source)[0] + f".{file_format}"
+
+
+def ingest_order_table(source: str, destination: Optional[str] = None,
+                       schema: Optional[Dict[str, Tuple[str, Any]]] = None) -> Dict[str, Any]:
+    """Convert source into the Arrow or Parquet file named by destination"""
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required to ingest the order table")
+    destination = destination or default_destination(source)
+    file_format = table_format(destination)
+    if file_format == 'csv':
+        raise ValueError(f"Destination must be an Arrow or Parquet file: {destination}")
+
+    started = time.perf_counter()
+    frame = read_order_table(source, schema or ORDER_TABLE_SCHEMA)
+    # Categoricals become dictionary-encoded columns, read back as categoricals
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+
+    directory = os.path.dirname(os.path.abspath(destination))
+    handle, temporary = tempfile.mkstemp(prefix='.ingest-', suffix=os.path.splitext(destination)[1], dir=directory)
+    os.close(handle)
+    try:
+        if file_format == 'arrow':
+            # One record batch: pandas can only view a column that is a single chunk
+            with pa.OSFile(temporary, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table.combine_chunks())
+        else:
+            pa.parquet.write_table(table, temporary)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, destination)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+    result = {
+        'source': source,
+        'destination': destination,
+        'format': file_format,
+        'rows': table.num_rows,
+        'bytes': os.path.getsize(destination),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+    logger.info(f"Ingested {result['rows']} rows from {source} into {destination} ({result['bytes']} bytes)")
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point: convert an extract for the table store"""
+    parser = argparse.ArgumentParser(description='Convert the order table extract to Arrow IPC or Parquet')
+    parser.add_argument('source', help='order table extract (CSV, Arrow or Parquet)')
+    parser.add_argument('--output', help='destination .arrow, .feather or .parquet file '
+                                         '(default: source with an .arrow extension)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        result = ingest_order_table(args.source, args.output)
+    except (OSError, ValueError, RuntimeError) as e:
+        logger.error(f"Ingestion failed: {e}")
+        sys.exit(1)
+    print(f"{result['rows']} rows -> {result['destination']} ({result['bytes']} bytes, {result['seconds']}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+"""
+In-memory order table store for ZXY Business Intelligence Dashboard
+
+Keeps the data table extract (data/data.csv) parsed and resident per worker
+and re-reads it only when the file on disk changes. Sort orders, search
+dictionaries and the rollup cube are precomputed on load so paging, sorting,
+filtering and subtotals run as vectorized lookups.
+
+The extract may also be an Arrow IPC file or Parquet file written by
+app.models.table_ingest. Arrow files are memory-mapped rather than parsed,
+so the columns of every worker are views of the same page cache.
+"""
+
+import os
+import math
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.models.rollup_cube import OrderRollupCube
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Column name -> (kind, value used for missing cells). String columns are
+# held dictionary-encoded as pandas categoricals.
+ORDER_TABLE_SCHEMA: Dict[str, Tuple[str, Any]] = {
+    'Customer Group': ('category', ''),
+    'CustomerName': ('category', ''),
+    'FactoryName': ('category', ''),
+    'Order Value': ('number', 0),
+    'Order Quantity': ('number', 0),
+    'Margin': ('number', 0),
+}
+
+# Column keys used by the dashboard table headers
+COLUMN_ALIASES = {
+    'customerGroup': 'Customer Group',
+    'customerName': 'CustomerName',
+    'factoryName': 'FactoryName',
+    'orderValue': 'Order Value',
+    'orderQuantity': 'Order Quantity',
+    'margin': 'Margin',
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+# File extension -> extract format
+TABLE_FORMATS = {
+    '.csv': 'csv',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.parquet': 'parquet',
+}
+
+
+def table_format(path: str) -> str:
+    """Extract format of a file, from its extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in TABLE_FORMATS:
+        raise ValueError(f"Unsupported order table format: {path}")
+    return TABLE_FORMATS[extension]
+
+
+def conform_frame(frame: pd.DataFrame, schema: Dict[str, Tuple[str, Any]]) -> pd.DataFrame:
+    """Fill missing cells and fix column types in place, leaving conforming columns untouched"""
+    for name, (kind, fill_value) in schema.items():
+        original = column = frame[name]
+        if kind == 'category':
+            if not isinstance(column.dtype, pd.CategoricalDtype):
+                column = column.astype('category')
+            if fill_value not in column.cat.categories:
+                column = column.cat.add_categories([fill_value])
+            if column.hasnans:
+                column = column.fillna(fill_value)
+        else:
+            if column.hasnans:
+                column = column.fillna(fill_value)
+            # Keep whole-number columns as integers so they serialize without ".0"
+            if column.dtype.kind == 'f' and np.array_equal(column.to_numpy(), np.round(column.to_numpy())):
+                column = column.astype('int64')
+        # Reassigning an unchanged column would copy an Arrow-backed buffer
+        if column is not original:
+            frame[name] = column
+    return frame
+
+
+def read_order_table(path: str, schema: Optional[Dict[str, Tuple[str, Any]]] = None) -> pd.DataFrame:
+    """Read a CSV, Arrow IPC or Parquet extract conformed to the schema"""
+    schema = schema or ORDER_TABLE_SCHEMA
+    file_format = table_format(path)
+    if file_format == 'csv':
+        dtypes = {
+            name: 'category' if kind == 'category' else 'float64'
+            for name, (kind, _) in schema.items()
+        }
+        frame = pd.read_csv(path, encoding='utf-8-sig', usecols=list(schema), dtype=dtypes)
+        return conform_frame(frame, schema)[list(schema)]
+
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError(f"pyarrow is required to read {path}")
+    if file_format == 'arrow':
+        # Zero-copy: column buffers point into the mapped file, which stays
+        # valid after the path is replaced by a newer extract
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    else:
+        table = pa.parquet.read_table(path, columns=list(schema))
+    # Select at the Arrow level; selecting from the frame would copy every column
+    table = table.select(list(schema))
+    frame = table.to_pandas(split_blocks=True)
+    return conform_frame(frame, schema)
+
+
+class OrderTableSnapshot:
+    """One loaded version of the order table with its precomputed indexes"""
+
+    def __init__(self, frame: pd.DataFrame, version: int):
+        self.frame = frame
+        self.version = version
+        self.loaded_at = datetime.now()
+        self.row_count = len(frame)
+        self.sort_orders: Dict[str, np.ndarray] = {}
+        self.search_keys: Dict[str, Tuple[np.ndarray, pd.Series]] = {}
+        self._records: Optional[List[Dict[str, Any]]] = None
+        self.cube = OrderRollupCube(frame)
+        for name in frame.columns:
+            codes, uniques = self._factorize(frame[name])
+            # Case-insensitive, stable ordering computed over the distinct values only
+            if pd.api.types.is_string_dtype(uniques):
+                ranks = np.argsort(np.argsort(uniques.str.lower().to_numpy(), kind='stable'), kind='stable')
+            else:
+                ranks = np.argsort(np.argsort(np.asarray(uniques), kind='stable'), kind='stable')
+            self.sort_orders[name] = np.argsort(ranks[codes], kind='stable')
+            self.search_keys[name] = (codes, pd.Series(uniques.astype(str)).str.lower())
+
+    @staticmethod
+    def _factorize(column: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+        """Split a column into integer codes and its distinct values"""
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            return column.cat.codes.to_numpy(), column.cat.categories
+        codes, uniques = pd.factorize(column)
+        return codes, pd.Index(uniques)
+
+    def records(self) -> List[Dict[str, Any]]:
+        """All rows as records, built once per snapshot"""
+        if self._records is None:
+            self._records = OrderTableStore.to_records(self.frame)
+        return self._records
+
+    def match(self, term: str) -> np.ndarray:
+        """Rows where any column contains term, case-insensitively"""
+        term = term.lower()
+        mask = np.zeros(self.row_count, dtype=bool)
+        for codes, values in self.search_keys.values():
+            matched = np.flatnonzero(values.str.contains(term, regex=False).to_numpy())
+            if len(matched):
+                mask |= np.isin(codes, matched)
+        return mask
+
+    def equals(self, column: str, value: str) -> np.ndarray:
+        """Rows where column equals value exactly"""
+        series = self.frame[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            position = series.cat.categories.get_indexer([value])[0]
+            return series.cat.codes.to_numpy() == position
+        return (series == value).to_numpy()
+
+
+class OrderTableStore:
+    """Parsed order table kept in memory and reloaded when the file changes"""
+
+    def __init__(self, path: str, schema: Optional[Dict[str, Tuple[str, Any]]] = None):
+        self.path = path
+        self.schema = schema or ORDER_TABLE_SCHEMA
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[int, int]] = None
+        self._snapshot: Optional[OrderTableSnapshot] = None
+
+    @property
+    def version(self) -> int:
+        """Load counter, bumped each time the file is re-read"""
+        return self._snapshot.version if self._snapshot else 0
+
+    @property
+    def loaded_at(self) -> Optional[datetime]:
+        """When the current version was loaded"""
+        return self._snapshot.loaded_at if self._snapshot else None
+
+    def _file_signature(self) -> Tuple[int, int]:
+        """Identify the file contents by modification time and size"""
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def snapshot(self) -> OrderTableSnapshot:
+        """The current table version, loading it first if the file has changed"""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return self._snapshot
+        with self._lock:
+            if signature != self._signature:
+                frame = self._load()
+                self._snapshot = OrderTableSnapshot(frame, self.version + 1)
+                self._signature = signature
+                logger.info(f"Loaded {len(frame)} rows from {self.path} (version {self._snapshot.version})")
+            return self._snapshot
+
+    def _load(self) -> pd.DataFrame:
+        """Read the extract against the schema"""
+        return read_order_table(self.path, self.schema)
+
+    def frame(self) -> pd.DataFrame:
+        """The current table; callers must treat it as read-only"""
+        return self.snapshot().frame
+
+    def records(self) -> List[Dict[str, Any]]:
+        """All rows as records, serialized straight from the columns"""
+        return self.snapshot().records()
+
+    def resolve_column(self, name: str) -> str:
+        """Map a column name or dashboard column key to a schema column"""
+        column = COLUMN_ALIASES.get(name, name)
+        if column not in self.schema:
+            raise ValueError(f"Unknown column: {name}")
+        return column
+
+    def query(self, page: int = 1, page_size: int = DEFAULT_PAGE_SIZE,
+              sort: Optional[str] = None, order: str = 'asc',
+              q: Optional[str] = None, customer_group: Optional[str] = None) -> Dict[str, Any]:
+        """Filter, sort and page the table, returning one page plus the total count"""
+        if page < 1:
+            raise ValueError("page must be 1 or greater")
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be 'asc' or 'desc'")
+
+        snapshot = self.snapshot()
+        mask = np.ones(snapshot.row_count, dtype=bool)
+        if customer_group:
+            mask &= snapshot.equals('Customer Group', customer_group)
+        if q:
+            mask &= snapshot.match(q)
+
+        if sort:
+            ordering = snapshot.sort_orders[self.resolve_column(sort)]
+            if order == 'desc':
+                ordering = ordering[::-1]
+            rows = ordering[mask[ordering]]
+        else:
+            rows = np.flatnonzero(mask)
+
+        total = len(rows)
+        start = (page - 1) * page_size
+        page_rows = rows[start:start + page_size]
+        return {
+            'data': self.to_records(snapshot.frame.iloc[page_rows]),
+            'total': total,
+            'page': page,
+            'page_size': page_size,
+            'pages': math.ceil(total / page_size),
+            'customer_groups': sorted(snapshot.frame['Customer Group'].cat.categories.drop('', errors='ignore'))
+        }
+
+    def rollup(self, group_by: List[str], filters: Optional[Dict[str, str]] = None,
+               sort: Optional[str] = None, order: str = 'asc') -> Dict[str, Any]:
+        """Subtotals from the rollup cube built when the current version loaded"""
+        snapshot = self.snapshot()
+        result = snapshot.cube.lookup(group_by, filters, sort=sort, order=order)
+        result['version'] = snapshot.version
+        return result
+
+    @staticmethod
+    def column_values(column: pd.Series) -> List[Any]:
+        """Native Python values of a column, decoding categoricals by code"""
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            categories = np.asarray(column.cat.categories, dtype=object)
+            return categories[column.cat.codes.to_numpy()].tolist()
+        return column.tolist()
+
+    @classmethod
+    def to_records(cls, frame: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Build row records from whole columns without per-cell pandas calls"""
+        names = list(frame.columns)
+        columns = [cls.column_values(frame[name]) for name in names]
+        return [dict(zip(names, row)) for row in zip(*columns)]
@@ -0,0 +1,118 @@
+"""
+Encoded payload cache for ZXY Business Intelligence Dashboard
+
+Keeps the final JSON bytes of API responses, already compressed, keyed by
+endpoint, query parameters and the version of the data they were built from.
+A hit skips the view, jsonify and compression entirely; a change in the data
+version makes the old bytes unreachable.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict, Any, Optional, Callable, Hashable, Tuple
+
+from flask import request
+
+from app.http_cache import HTTPCache, PreparedPayload
+
+logger = logging.getLogger(__name__)
+
+
+class PayloadCache:
+    """Byte-bounded LRU of prepared responses for the JSON API"""
+
+    def __init__(self, http_cache: HTTPCache, max_bytes: int = 32 * 1024 * 1024):
+        self.http_cache = http_cache
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, Tuple[PreparedPayload, Optional[float]]]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[PreparedPayload]:
+        """The cached payload for key, unless missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[1] is not None and time.monotonic() >= entry[1]):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, payload: PreparedPayload, ttl: Optional[float] = None) -> None:
+        """Store a payload, compressing it up front so hits never compress"""
+        self.http_cache.encode_all(payload)
+        if payload.size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[0].size
+            self._entries[key] = (payload, expires_at)
+            self._size += payload.size
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+    def clear(self) -> int:
+        """Drop every payload"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._size = 0
+            return count
+
+    def cached(self, version: Callable[[], Hashable], ttl: Optional[Callable[[], float]] = None):
+        """Decorator serving a JSON view from the cache while version() is unchanged
+
+        version returns the version of the data the view reads, or None when
+        it cannot tell, in which case the view runs uncached; ttl, if given,
+        bounds how long a payload is served without calling the view, so the
+        data source gets the chance to notice its own expiry.
+        """
+        def decorator(view):
+            @wraps(view)
+            def cached_view(*args, **kwargs):
+                data_version = version()
+                if data_version is None:
+                    return view(*args, **kwargs)
+                key = (
+                    request.path,
+                    tuple(sorted(request.args.items(multi=True))),
+                    data_version
+                )
+                payload = self.get(key)
+                if payload is not None:
+                    return self.http_cache.respond(payload)
+
+                response = view(*args, **kwargs)
+                if not hasattr(response, 'get_data') or not self.http_cache.applies_to(response):
+                    return response
+                payload = PreparedPayload(response.get_data(), response.mimetype)
+                self.put(key, payload, ttl() if ttl else None)
+                return self.http_cache.respond(payload, response)
+            return cached_view
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        """Payload cache counters for diagnostics"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+def payload_cache_from_env(http_cache: HTTPCache) -> PayloadCache:
+    """Payload cache sized by PAYLOAD_CACHE_MAX_MB"""
+    return PayloadCache(http_cache, int(os.environ.get('PAYLOAD_CACHE_MAX_MB', 32)) * 1024 * 1024)
@@ -0,0 +1,152 @@
+"""
+Dashboard sections for ZXY Business Intelligence Dashboard
+
+Names every payload the dashboard page loads, with the loader that computes
+it and the fallback served when the loader fails, and fetches any set of them
+concurrently on a bounded thread pool. A loader that answers with the data
+model's sample data counts as failed, though its payload is still served.
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Any, Callable, Iterable, Tuple
+
+from app.models.dashboard_data import FallbackScope
+from app.models.table_store import DEFAULT_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Chart sections, keyed by the chart type used in /api/chart-data/<type>
+CHART_TYPES = {
+    'sales-trend': 'sales_trend',
+    'manufacturing-efficiency': 'manufacturing_efficiency',
+    'logistics-performance': 'logistics_performance',
+}
+
+
+class DashboardSection:
+    """A named dashboard payload with its loader and fallback"""
+
+    def __init__(self, name: str, loader: Callable[[], Any], fallback: Callable[[], Any]):
+        self.name = name
+        self.loader = loader
+        self.fallback = fallback
+
+
+def build_sections(model, order_table) -> Dict[str, DashboardSection]:
+    """Sections keyed like their API routes, backed by the data model and order table"""
+    sections = [
+        DashboardSection('kpis', model.get_kpi_data, model._get_sample_kpis),
+        DashboardSection('alerts', model.get_alerts_data, model._get_sample_alerts),
+        DashboardSection('sales-pipeline', model.get_sales_pipeline_data, model._get_sample_pipeline),
+        DashboardSection('financial-years', model.get_financial_years, model._get_sample_financial_years),
+        DashboardSection('customer-groups', model.get_customer_groups, model._get_sample_customer_groups),
+        DashboardSection('countries', model.get_countries, model._get_sample_countries),
+        DashboardSection('customer-order-metrics', model.get_customer_order_metrics,
+                         model._get_sample_customer_order_metrics),
+        DashboardSection('table-data', lambda: order_table.query(), _empty_table_page),
+    ]
+    for chart_type, model_chart_type in CHART_TYPES.items():
+        sections.append(DashboardSection(
+            f'chart-data/{chart_type}',
+            _chart_loader(model, model_chart_type),
+            lambda chart_type=model_chart_type: model._get_sample_chart_data(chart_type)
+        ))
+    return {section.name: section for section in sections}
+
+
+def _empty_table_page() -> Dict[str, Any]:
+    """First table page when the order table cannot be read"""
+    return {'data': [], 'total': 0, 'page': 1, 'page_size': DEFAULT_PAGE_SIZE, 'pages': 0, 'customer_groups': []}
+
+
+def _load_section(section: DashboardSection) -> Tuple[Any, bool]:
+    """Run a section's loader, returning its payload and whether it was sample data"""
+    scope = FallbackScope()
+    payload = section.loader()
+    return payload, scope.used
+
+
+def _chart_loader(model, chart_type: str) -> Callable[[], Dict[str, Any]]:
+    """Chart loader that raises instead of returning the model's error payload"""
+    def load():
+        data = model.get_chart_data(chart_type)
+        if 'error' in data:
+            raise RuntimeError(data['error'])
+        return data
+    return load
+
+
+class SectionFanout:
+    """Fetches dashboard sections concurrently on a bounded, per-process thread pool"""
+
+    def __init__(self, sections: Dict[str, DashboardSection], max_workers: int = None,
+                 timeout: float = None):
+        self.sections = sections
+        self.max_workers = max_workers or int(os.environ.get('DASHBOARD_FANOUT_WORKERS', 8))
+        self.timeout = timeout or float(os.environ.get('DASHBOARD_SECTION_TIMEOUT', 30))
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        # Called with the section name when a failed section is replaced by its fallback
+        self.fallback_observers: List[Callable[[str], None]] = []
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Thread pool for this process; threads do not survive a fork"""
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='dashboard-section'
+                    )
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def fetch(self, names: Iterable[str]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Load the named sections concurrently, returning payloads and per-section errors
+
+        Sections that failed or were answered with sample data are listed in
+        errors; their payload is the sample data.
+        """
+        names = list(names)
+        unknown = [name for name in names if name not in self.sections]
+        if unknown:
+            raise ValueError(f"Unknown dashboard sections: {', '.join(unknown)}")
+
+        executor = self._get_executor()
+        futures = {name: executor.submit(_load_section, self.sections[name]) for name in names}
+        wait(futures.values(), timeout=self.timeout)
+
+        payloads: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        for name, future in futures.items():
+            if not future.done():
+                future.cancel()
+                errors[name] = f'Timed out after {self.timeout:.0f}s'
+            elif future.exception() is not None:
+                errors[name] = str(future.exception())
+            else:
+                payloads[name], fell_back = future.result()
+                if fell_back:
+                    errors[name] = 'Database unavailable, served sample data'
+                    logger.warning(f"Dashboard section {name} was served from sample data")
+                continue
+            logger.error(f"Error fetching dashboard section {name}: {errors[name]}")
+            payloads[name] = self.sections[name].fallback()
+            self._notify_fallback(name)
+        return payloads, errors
+
+    def _notify_fallback(self, name: str) -> None:
+        """Call the fallback observers, never letting them break a response"""
+        for observer in self.fallback_observers:
+            try:
+                observer(name)
+            except Exception as e:
+                logger.debug(f"Section fallback observer failed: {e}")
+
+    def names(self) -> List[str]:
+        """All section names"""
+        return list(self.sections)
@@ -0,0 +1,193 @@
+"""
+Cross-worker result cache for ZXY Business Intelligence Dashboard
+
+A SQLite file shared by every gunicorn worker on the host, used as a second
+tier behind each worker's in-process cache. A result loaded by one worker is
+served to the others from the file, so the database sees one query per host
+rather than one per worker, and the cache size does not grow with the worker
+count. Values are pickled, so the file must be in a directory private to the
+user the workers run as; writes and evictions are single transactions.
+"""
+
+import os
+import time
+import pickle
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Optional, Hashable, Tuple
+
+from config.private_directory import ensure_private_directory
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    fresh_until REAL NOT NULL,
+    stale_until REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_entries_last_access ON cache_entries (last_access);
+CREATE INDEX IF NOT EXISTS cache_entries_name ON cache_entries (name);
+CREATE TABLE IF NOT EXISTS cache_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    generation INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_meta (id, generation) VALUES (1, 0);
+"""
+
+# Recording every hit would make readers contend for the write lock, so
+# access times are only refreshed when older than this many seconds
+ACCESS_RESOLUTION = 5.0
+
+
+class SharedCache:
+    """Size-bounded LRU cache with TTLs in a SQLite file shared between processes"""
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, timeout: float = 5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._local = threading.local()
+        # Entries are unpickled, so nobody else may be able to write the file
+        ensure_private_directory(os.path.dirname(os.path.abspath(path)))
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection; connections are never shared across threads or a fork"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _key(key: Hashable) -> Tuple[str, str]:
+        """Text key for the table and the name used for invalidation"""
+        name = key[0] if isinstance(key, tuple) and key else key
+        return repr(key), str(name)
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, float, float]]:
+        """(value, seconds still fresh, seconds still servable) for key, or None"""
+        text_key, _ = self._key(key)
+        now = time.time()
+        try:
+            connection = self._connect()
+            row = connection.execute(
+                'SELECT value, fresh_until, stale_until, last_access FROM cache_entries WHERE key = ?',
+                (text_key,)
+            ).fetchone()
+            if row is None or row[2] <= now:
+                self.misses += 1
+                return None
+            if now - row[3] > ACCESS_RESOLUTION:
+                connection.execute('UPDATE cache_entries SET last_access = ? WHERE key = ?', (now, text_key))
+            self.hits += 1
+            return pickle.loads(row[0]), row[1] - now, row[2] - now
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Shared cache read failed for {text_key}: {e}")
+            return None
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0) -> None:
+        """Store value for key and evict least recently used entries beyond max_bytes"""
+        text_key, name = self._key(key)
+        now = time.time()
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            if len(blob) > self.max_bytes:
+                logger.warning(f"Not sharing {text_key}: {len(blob)} bytes exceeds the cache size")
+                return
+            connection = self._connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute(
+                    'INSERT OR REPLACE INTO cache_entries '
+                    '(key, name, value, size, stored_at, fresh_until, stale_until, last_access) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (text_key, name, blob, len(blob), now, now + ttl, now + ttl + stale_ttl, now)
+                )
+                self._evict(connection, now)
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Shared cache write failed for {text_key}: {e}")
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        connection.execute('DELETE FROM cache_entries WHERE stale_until <= ?', (now,))
+        total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM cache_entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in connection.execute('SELECT key, size FROM cache_entries ORDER BY last_access'):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        connection.executemany('DELETE FROM cache_entries WHERE key = ?', victims)
+
+    def invalidate(self, name: Optional[str] = None) -> int:
+        """Drop every entry, or those of one name, and bump the generation"""
+        try:
+            connection = self._connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                if name is None:
+                    count = connection.execute('DELETE FROM cache_entries').rowcount
+                else:
+                    count = connection.execute('DELETE FROM cache_entries WHERE name = ?', (name,)).rowcount
+                connection.execute('UPDATE cache_meta SET generation = generation + 1 WHERE id = 1')
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+            return count
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Shared cache invalidation failed: {e}")
+            return 0
+
+    def generation(self) -> Optional[int]:
+        """Counter bumped by every invalidation, so workers can drop their own copies"""
+        try:
+            return self._connect().execute('SELECT generation FROM cache_meta WHERE id = 1').fetchone()[0]
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Shared cache generation read failed: {e}")
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Shared cache counters for diagnostics"""
+        try:
+            entries, size = self._connect().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries'
+            ).fetchone()
+        except Exception:
+            entries, size = None, None
+        return {
+            'path': self.path,
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors
+        }
@@ -0,0 +1,287 @@
+"""
+Dashboard snapshots for ZXY Business Intelligence Dashboard
+
+A background scheduler recomputes the dashboard sections on a fixed cadence
+and writes them to a versioned SQLite snapshot that the API serves from, so
+request latency does not depend on the database and the last good snapshot
+keeps being served while the database is down. One worker per host is elected
+(by file lock) to run the scheduler; every worker reads the snapshot, and any
+worker can ask the leader for an early run through the snapshot file. Payloads
+are pickled, so the file must be in a directory private to the workers' user.
+"""
+
+import os
+import time
+import pickle
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Callable
+
+from config.private_directory import ensure_private_directory
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot_runs (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    sections INTEGER NOT NULL,
+    errors TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshot_sections (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    generated_at REAL NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshot_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    refresh_generation INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO snapshot_meta (id, refresh_generation) VALUES (1, 0);
+"""
+
+# Runs kept for diagnostics; sections always hold the last good payload
+RUN_HISTORY = 100
+
+
+class Snapshot:
+    """A section payload with the snapshot version and time it was computed"""
+
+    __slots__ = ('name', 'payload', 'version', 'generated_at')
+
+    def __init__(self, name: str, payload: Any, version: int, generated_at: float):
+        self.name = name
+        self.payload = payload
+        self.version = version
+        self.generated_at = generated_at
+
+    def headers(self) -> Dict[str, str]:
+        """Freshness headers for responses served from this snapshot"""
+        return {
+            'X-Snapshot-Version': str(self.version),
+            'X-Snapshot-Generated-At': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.generated_at))
+        }
+
+
+class SnapshotStore:
+    """Versioned section payloads in a SQLite file shared by all workers"""
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        # Payloads are unpickled, so nobody else may be able to write the file
+        ensure_private_directory(os.path.dirname(os.path.abspath(path)))
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection; connections are never shared across threads or a fork"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def write(self, payloads: Dict[str, Any], errors: Dict[str, str], started_at: float) -> int:
+        """Record a run and replace the sections that loaded successfully, atomically"""
+        finished_at = time.time()
+        blobs = [
+            (name, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+            for name, payload in payloads.items() if name not in errors
+        ]
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            version = connection.execute(
+                'INSERT INTO snapshot_runs (started_at, finished_at, sections, errors) VALUES (?, ?, ?, ?)',
+                (started_at, finished_at, len(blobs), repr(errors))
+            ).lastrowid
+            connection.executemany(
+                'INSERT OR REPLACE INTO snapshot_sections (name, version, generated_at, payload) VALUES (?, ?, ?, ?)',
+                [(name, version, finished_at, blob) for name, blob in blobs]
+            )
+            connection.execute('DELETE FROM snapshot_runs WHERE version <= ?', (version - RUN_HISTORY,))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return version
+
+    def read(self, name: str) -> Optional[Snapshot]:
+        """The last good snapshot of a section, or None"""
+        try:
+            row = self._connect().execute(
+                'SELECT version, generated_at, payload FROM snapshot_sections WHERE name = ?', (name,)
+            ).fetchone()
+        except Exception as e:
+            logger.warning(f"Failed to read snapshot {name}: {e}")
+            return None
+        if row is None:
+            return None
+        return Snapshot(name, pickle.loads(row[2]), row[0], row[1])
+
+    def request_refresh(self) -> int:
+        """Drop every section and ask the leader, in whichever worker, to recompute them now
+
+        Requests are answered live until the new snapshot is written.
+        """
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            dropped = connection.execute('DELETE FROM snapshot_sections').rowcount
+            connection.execute('UPDATE snapshot_meta SET refresh_generation = refresh_generation + 1')
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return dropped
+
+    def refresh_generation(self) -> int:
+        """Changes whenever request_refresh() is called"""
+        return self._connect().execute('SELECT refresh_generation FROM snapshot_meta').fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Latest run and section versions for diagnostics"""
+        connection = self._connect()
+        run = connection.execute(
+            'SELECT version, started_at, finished_at, sections, errors FROM snapshot_runs '
+            'ORDER BY version DESC LIMIT 1'
+        ).fetchone()
+        sections = connection.execute('SELECT name, version, generated_at FROM snapshot_sections').fetchall()
+        return {
+            'path': self.path,
+            'latest_run': dict(zip(('version', 'started_at', 'finished_at', 'sections', 'errors'), run)) if run else None,
+            'sections': {name: {'version': version, 'generated_at': generated_at}
+                         for name, version, generated_at in sections}
+        }
+
+
+class SnapshotScheduler:
+    """Recomputes sections into a SnapshotStore from the worker holding the leader lock"""
+
+    def __init__(self, store: SnapshotStore, fanout, names: List[str], interval: float = 60.0,
+                 lock_path: Optional[str] = None, healthcheck: Optional[Callable[[], bool]] = None,
+                 poll_interval: float = 1.0):
+        self.store = store
+        self.fanout = fanout
+        self.names = names
+        self.interval = interval
+        self.poll_interval = poll_interval
+        self.lock_path = lock_path or f'{store.path}.lock'
+        self.healthcheck = healthcheck
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._lock_file = None
+        self._start_lock = threading.Lock()
+        self._seen_generation: Optional[int] = None
+        self.runs = 0
+        self.skipped = 0
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process currently runs the scheduler"""
+        return self._lock_file is not None and self._thread_pid == os.getpid()
+
+    def ensure_started(self) -> None:
+        """Start the scheduler thread in this process if it is not running"""
+        if self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive():
+                return
+            # A lock file inherited from the parent is not ours to hold
+            self._lock_file = None
+            self._thread = threading.Thread(target=self._loop, name='snapshot-scheduler', daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _try_become_leader(self) -> bool:
+        """Take the leader lock without blocking; held until the process exits"""
+        if self._lock_file is not None:
+            return True
+        if not FCNTL_AVAILABLE:
+            # Without file locks every process refreshes its own snapshot
+            self._lock_file = True
+            return True
+        lock_file = open(self.lock_path, 'a+b')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info(f"Process {os.getpid()} elected to compute dashboard snapshots")
+        return True
+
+    def _loop(self) -> None:
+        """Refresh the snapshot every interval while leader, otherwise wait for the lock"""
+        while True:
+            started = time.monotonic()
+            try:
+                if self._try_become_leader():
+                    # Read first, so a refresh requested during the run triggers another
+                    self._seen_generation = self.store.refresh_generation()
+                    self.run_once()
+            except Exception as e:
+                logger.error(f"Dashboard snapshot run failed: {e}")
+            self._wait_for_next_run(started)
+
+    def _wait_for_next_run(self, started: float) -> None:
+        """Sleep out the interval, returning early if any worker requested a refresh"""
+        while True:
+            remaining = self.interval - (time.monotonic() - started)
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, self.poll_interval))
+            if self.is_leader and self._refresh_requested():
+                return
+
+    def _refresh_requested(self) -> bool:
+        """Whether request_refresh() was called since the last run started"""
+        try:
+            return self.store.refresh_generation() != self._seen_generation
+        except Exception as e:
+            logger.warning(f"Failed to read the snapshot refresh generation: {e}")
+            return False
+
+    def run_once(self) -> Optional[int]:
+        """Compute every section and write a new snapshot version
+
+        Skipped while the healthcheck fails, since the data model answers with
+        sample data when the database is down and that must not replace the
+        last good snapshot. For the same reason a section whose loader fell
+        back to sample data keeps its earlier snapshot.
+        """
+        if self.healthcheck is not None and not self.healthcheck():
+            self.skipped += 1
+            logger.warning("Database unavailable, keeping the previous dashboard snapshot")
+            return None
+        started_at = time.time()
+        payloads, errors = self.fanout.fetch(self.names)
+        version = self.store.write(payloads, errors, started_at)
+        self.runs += 1
+        logger.info(
+            f"Wrote dashboard snapshot v{version} ({len(payloads) - len(errors)} sections, "
+            f"{len(errors)} kept from earlier snapshots) in {time.time() - started_at:.2f}s"
+        )
+        return version
+
+    def stats(self) -> Dict[str, Any]:
+        """Scheduler counters for diagnostics"""
+        return {
+            'leader': self.is_leader,
+            'interval': self.interval,
+            'runs': self.runs,
+            'skipped': self.skipped
+        }
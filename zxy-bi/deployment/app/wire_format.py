@@ -0,0 +1,127 @@
+"""
+Columnar wire formats for ZXY Business Intelligence Dashboard
+
+Encodings for large table responses, chosen with the format query parameter.
+json (the default) is the usual array of row objects. columnar sends one
+array per column under a schema header, with repeated strings replaced by
+integer codes into a per-column dictionary. arrow sends an Arrow IPC stream
+and needs pyarrow; fields of a paged response other than the rows travel as
+JSON in the stream's schema metadata.
+"""
+
+import logging
+from typing import Dict, List, Any, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+
+from app.http_cache import ARROW_STREAM_MIMETYPE
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+WIRE_FORMATS = ('json', 'columnar', 'arrow')
+
+# String columns are dictionary-encoded when at most this share of their values is distinct
+DICTIONARY_MAX_RATIO = 0.5
+
+
+def requested_format(args) -> str:
+    """The wire format named by the format argument, json if absent"""
+    wire_format = args.get('format', 'json').lower()
+    if wire_format not in WIRE_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(WIRE_FORMATS)}")
+    if wire_format == 'arrow' and not PYARROW_AVAILABLE:
+        raise ValueError("format=arrow is not available on this server")
+    return wire_format
+
+
+def frame_from_records(records: List[Dict[str, Any]], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Rows as a frame, keeping the column order even when there are no rows"""
+    return pd.DataFrame.from_records(records, columns=list(columns) if columns else None)
+
+
+def dictionary_encode(frame: pd.DataFrame) -> pd.DataFrame:
+    """Turn string columns with repeated values into categoricals"""
+    encoded = {}
+    for name in frame.columns:
+        column = frame[name]
+        if column.dtype != object or pd.api.types.infer_dtype(column, skipna=True) != 'string':
+            continue
+        distinct = column.nunique()
+        if distinct <= DICTIONARY_MAX_RATIO * len(column):
+            encoded[name] = column.astype('category')
+    return frame.assign(**encoded) if encoded else frame
+
+
+def _column_type(column: pd.Series) -> str:
+    """Schema type of a column: string, int, float, bool or date"""
+    dtype = column.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return _column_type(pd.Series(dtype.categories))
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'int'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'float'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'date'
+    inferred = pd.api.types.infer_dtype(column, skipna=True)
+    if inferred == 'integer':
+        return 'int'
+    if inferred in ('floating', 'mixed-integer-float', 'decimal'):
+        return 'float'
+    if inferred == 'boolean':
+        return 'bool'
+    return 'string'
+
+
+def _values(column: pd.Series) -> List[Any]:
+    """Native Python values of a column, with missing cells as None"""
+    if pd.api.types.is_datetime64_any_dtype(column.dtype):
+        return [None if pd.isna(value) else value.isoformat() for value in column]
+    if column.hasnans:
+        return column.astype(object).where(column.notna(), None).tolist()
+    return column.tolist()
+
+
+def to_columnar(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Encode frame as a schema header plus one array per column"""
+    frame = dictionary_encode(frame)
+    schema = []
+    columns = []
+    for name in frame.columns:
+        column = frame[name]
+        field = {'name': name, 'type': _column_type(column)}
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.codes.to_numpy()
+            field['dictionary'] = column.cat.categories.tolist()
+            if (codes < 0).any():
+                columns.append(np.where(codes < 0, None, codes).tolist())
+            else:
+                columns.append(codes.tolist())
+        else:
+            columns.append(_values(column))
+        schema.append(field)
+    return {'length': len(frame), 'schema': schema, 'columns': columns}
+
+
+def to_arrow_stream(frame: pd.DataFrame, metadata: Optional[Dict[str, Any]] = None) -> bytes:
+    """Encode frame as an Arrow IPC stream, with metadata values as JSON"""
+    table = pa.Table.from_pandas(dictionary_encode(frame), preserve_index=False)
+    # Replace the pandas metadata, which only a pandas reader can use
+    table = table.replace_schema_metadata({
+        key: current_app.json.dumps(value) for key, value in (metadata or {}).items()
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
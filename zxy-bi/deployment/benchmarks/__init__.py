@@ -0,0 +1,14 @@
+"""
+Benchmarks for ZXY Business Intelligence Dashboard
+
+Load and latency benchmarks that run the dashboard against a local SQLite
+stand-in for the SQL Server database, so a change can be measured without
+access to production:
+
+    python -m benchmarks.standin --db /tmp/zxy-standin.sqlite --scale 1
+    python -m benchmarks.loadtest run --scale 1 --duration 30 --output head.json
+    python -m benchmarks.loadtest compare base.json head.json
+
+Run from the deployment directory. These are measurements, not tests; they
+are not collected by pytest.
+"""
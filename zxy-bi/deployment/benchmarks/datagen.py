@@ -0,0 +1,369 @@
+"""
+Synthetic data generator for ZXY Business Intelligence Dashboard benchmarks
+
+Generates order tables in the shape of data/data.csv at any size (10K to
+tens of millions of rows) and the customer, style, colour, fabric and CPO /
+CPO style / CPO SKU tables of the stand-in database, with every foreign key
+pointing at an existing row. Customers, factories, styles and colours are
+drawn with Zipf skew, so as in production a few large accounts and
+factories carry most of the volume.
+
+Everything is vectorized with numpy and produced in fixed-size blocks, each
+from its own seed, so memory stays flat at any size and the output depends
+only on the seed:
+
+    python -m benchmarks.datagen --rows 10000000 --output /tmp/orders-10m.csv
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import argparse
+from datetime import datetime
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Iterator, Sequence, Tuple, Deque
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Rows generated per block; each block has its own seed so the output does
+# not depend on how it is consumed
+BLOCK_ROWS = 1_000_000
+CPO_BLOCK = 100_000
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Columns of data/data.csv, in file order
+ORDER_COLUMNS = ['Customer Group', 'CustomerName', 'FactoryName', 'Order Value', 'Order Quantity', 'Margin']
+
+# Seed streams, so each table draws from independent generators
+DIMENSIONS_STREAM = 0
+ORDERS_STREAM = 1
+CPO_STREAM = 2
+
+GROUP_PREFIXES = [
+    'ABC', 'Apex', 'Atlas', 'Aurora', 'Bluebird', 'Cedar', 'Coral', 'Crescent', 'Delta', 'Ember',
+    'Evergreen', 'Falcon', 'Granite', 'Harbor', 'Horizon', 'Indigo', 'Juniper', 'Keystone', 'Lumen',
+    'Maple', 'Meridian', 'Nova', 'Orchid', 'Pacific', 'Pinnacle', 'Quartz', 'Redwood', 'Sierra',
+    'Summit', 'Willow',
+]
+GROUP_SUFFIXES = ['S.A.', 'Ltd.', 'Inc.', 'GmbH', 'Apparel', 'Retail', 'Group', 'Brands', 'Fashion', 'Stores']
+CUSTOMER_DIVISIONS = ['Europe', 'USA', 'Asia', 'UK', 'Kids', 'Outlet', 'Online', 'Sport']
+FACTORY_PREFIXES = [
+    'Apparels Village', 'Bongo Stitches', 'Delta Knit', 'Eastern Garments', 'Harbour Textiles',
+    'Lakeside Apparel', 'Meridian Sewing', 'Riverbank Fashions', 'Summit Knitwear', 'Unity Garments',
+    'Golden Thread', 'Silk Route', 'Northern Mills', 'Coastal Stitch', 'Royal Weave',
+]
+FACTORY_SUFFIXES = ['Limited', 'Ltd.', 'Co.', 'Industries', 'Works', 'Manufacturing']
+COLOUR_NAMES = [
+    'Black', 'White', 'Navy', 'Heather Grey', 'Charcoal', 'Red', 'Burgundy', 'Olive', 'Khaki', 'Sand',
+    'Sky Blue', 'Royal Blue', 'Forest Green', 'Mustard', 'Coral', 'Blush', 'Lavender', 'Teal', 'Rust', 'Ivory',
+]
+FABRIC_COMPOSITIONS = [
+    '100% Cotton', '60% Cotton 40% Polyester', '100% Polyester', '95% Cotton 5% Elastane', '100% Linen',
+    '80% Nylon 20% Elastane', '70% Viscose 30% Linen',
+]
+GARMENTS = ['Tee', 'Polo', 'Hoodie', 'Jogger', 'Chino', 'Shirt', 'Dress', 'Jacket', 'Short', 'Legging']
+
+
+def rng_for(seed: int, stream: int, block: int = 0) -> np.random.Generator:
+    """Generator for one block of one stream, independent of every other block"""
+    return np.random.default_rng([seed, stream, block])
+
+
+def zipf_cdf(count: int, exponent: float, rng: np.random.Generator) -> np.ndarray:
+    """Cumulative distribution of a Zipf law over count items in random rank order"""
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    weights = weights[rng.permutation(count)]
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def sample(rng: np.random.Generator, cdf: np.ndarray, size: int) -> np.ndarray:
+    """size item indexes drawn from a cumulative distribution"""
+    return np.minimum(np.searchsorted(cdf, rng.random(size), side='right'), len(cdf) - 1)
+
+
+def combined_names(prefixes: Sequence[str], suffixes: Sequence[str], count: int) -> List[str]:
+    """count distinct 'prefix suffix' names, numbered once the combinations run out"""
+    combinations = len(prefixes) * len(suffixes)
+    names = []
+    for index in range(count):
+        name = f"{prefixes[index % len(prefixes)]} {suffixes[(index // len(prefixes)) % len(suffixes)]}"
+        names.append(name if index < combinations else f"{name} {index // combinations + 1}")
+    return names
+
+
+def random_timestamps(rng: np.random.Generator, count: int, now: datetime,
+                      days_back: float, days_forward: float = 0) -> np.ndarray:
+    """count 'YYYY-MM-DD HH:MM:SS' timestamps between days_back before now and days_forward after it"""
+    offsets = rng.integers(int(-days_forward * 86400), int(days_back * 86400) + 1, count)
+    moments = np.datetime64(now.replace(microsecond=0), 's') - offsets.astype('timedelta64[s]')
+    return format_timestamps(moments)
+
+
+def format_timestamps(moments: np.ndarray) -> np.ndarray:
+    """datetime64 values as 'YYYY-MM-DD HH:MM:SS' strings"""
+    text = np.datetime_as_string(moments.astype('datetime64[s]'), unit='s')
+    # Swap the ISO 'T' separator in place through a per-character view
+    text.view('<U1').reshape(len(text), -1)[:, 10] = ' '
+    return text
+
+
+def insert_columns(conn: sqlite3.Connection, table: str, columns: Dict[str, Sequence[Any]]) -> int:
+    """Bulk insert whole columns into a table"""
+    names = list(columns)
+    values = [column.tolist() if isinstance(column, np.ndarray) else list(column) for column in columns.values()]
+    placeholders = ', '.join('?' for _ in names)
+    conn.executemany(f"INSERT INTO {table} ({', '.join(names)}) VALUES ({placeholders})", zip(*values))
+    return len(values[0]) if values else 0
+
+
+class Dimensions:
+    """Customers, customer groups, factories, styles and colours shared by every generated table
+
+    Customers belong to groups; the first customer of a group carries the
+    group's name and the rest a division of it (e.g. 'Apex Retail Europe').
+    Each dimension has a Zipf popularity used when drawing facts.
+    """
+
+    def __init__(self, seed: int = 42, customers: int = 200, factories: int = 20,
+                 styles: int = 1000, colours: int = 300, fabrics: int = 40,
+                 customer_skew: float = 1.1, factory_skew: float = 0.9, style_skew: float = 0.8):
+        rng = rng_for(seed, DIMENSIONS_STREAM)
+        groups = max(1, min(customers, customers // 4))
+        self.group_names = np.asarray(combined_names(GROUP_PREFIXES, GROUP_SUFFIXES, groups), dtype=object)
+
+        # Every group gets one customer, the rest are spread with skew
+        group_cdf = zipf_cdf(groups, 1.0, rng)
+        self.customer_group = np.concatenate([np.arange(groups), sample(rng, group_cdf, customers - groups)])
+        rank = pd.Series(self.customer_group).groupby(self.customer_group).cumcount().to_numpy()
+        names = []
+        for group, position in zip(self.customer_group.tolist(), rank.tolist()):
+            name = self.group_names[group]
+            if position:
+                division = CUSTOMER_DIVISIONS[(position - 1) % len(CUSTOMER_DIVISIONS)]
+                round_ = (position - 1) // len(CUSTOMER_DIVISIONS)
+                name = f"{name} {division}" + (f" {round_ + 1}" if round_ else '')
+            names.append(name)
+        self.customer_names = np.asarray(names, dtype=object)
+        self.factory_names = np.asarray(combined_names(FACTORY_PREFIXES, FACTORY_SUFFIXES, factories), dtype=object)
+
+        self.styles = styles
+        self.colours = colours
+        self.fabrics = fabrics
+        self.customer_cdf = zipf_cdf(customers, customer_skew, rng)
+        self.factory_cdf = zipf_cdf(factories, factory_skew, rng)
+        self.style_cdf = zipf_cdf(styles, style_skew, rng)
+        self.colour_cdf = zipf_cdf(colours, 1.0, rng)
+        # Typical unit price per factory, so values and quantities stay consistent per factory
+        self.factory_unit_price = np.round(rng.uniform(2.5, 12.0, factories), 2)
+        self.colour_fabric = rng.integers(0, fabrics, colours)
+        self.style_brand_draw = rng.random(styles)
+        self.fabric_composition = rng.choice(FABRIC_COMPOSITIONS, fabrics)
+
+    @classmethod
+    def for_rows(cls, rows: int, seed: int = 42) -> 'Dimensions':
+        """Dimensions sized for an order table of rows rows"""
+        customers = int(np.clip(2 * np.sqrt(rows), 50, 20000))
+        factories = int(np.clip(rows ** 0.3, 10, 400))
+        return cls(seed, customers=customers, factories=factories)
+
+    @property
+    def customers(self) -> int:
+        """Number of customers"""
+        return len(self.customer_names)
+
+
+def order_block(dimensions: Dimensions, seed: int, block: int, size: int) -> pd.DataFrame:
+    """One block of order table rows in the data/data.csv schema"""
+    rng = rng_for(seed, ORDERS_STREAM, block)
+    customers = sample(rng, dimensions.customer_cdf, size)
+    factories = sample(rng, dimensions.factory_cdf, size)
+
+    value = np.maximum(1, rng.lognormal(9.8, 1.1, size)).round()
+    unit_price = dimensions.factory_unit_price[factories] * rng.uniform(0.7, 1.4, size)
+    quantity = np.maximum(1, value / unit_price).round()
+    margin = (value * np.clip(rng.normal(0.08, 0.04, size), -0.05, 0.3)).round()
+
+    return pd.DataFrame({
+        'Customer Group': pd.Categorical.from_codes(dimensions.customer_group[customers],
+                                                    categories=pd.Index(dimensions.group_names)),
+        'CustomerName': pd.Categorical.from_codes(customers, categories=pd.Index(dimensions.customer_names)),
+        'FactoryName': pd.Categorical.from_codes(factories, categories=pd.Index(dimensions.factory_names)),
+        'Order Value': value.astype('int64'),
+        'Order Quantity': quantity.astype('int64'),
+        'Margin': margin.astype('int64'),
+    })
+
+
+def _blocks(rows: int) -> List[Tuple[int, int]]:
+    """(block index, size) pairs covering rows"""
+    return [(block, min(BLOCK_ROWS, rows - start)) for block, start in enumerate(range(0, rows, BLOCK_ROWS))]
+
+
+def generate_orders(rows: int, seed: int = 42, dimensions: Optional[Dimensions] = None) -> Iterator[pd.DataFrame]:
+    """Order table rows in the data/data.csv schema, one block of up to BLOCK_ROWS at a time"""
+    dimensions = dimensions or Dimensions.for_rows(rows, seed)
+    for block, size in _blocks(rows):
+        yield order_block(dimensions, seed, block, size)
+
+
+def _order_block_csv(dimensions: Dimensions, seed: int, block: int, size: int) -> str:
+    """One block formatted as CSV lines without a header (runs in worker processes)"""
+    return order_block(dimensions, seed, block, size).to_csv(index=False, header=False)
+
+
+def write_orders_csv(path: str, rows: int, seed: int = 42, dimensions: Optional[Dimensions] = None,
+                     workers: Optional[int] = None) -> int:
+    """Write a generated order table as CSV in the data/data.csv format; returns rows written
+
+    CSV formatting costs more than generating the numbers, so blocks are
+    formatted on up to workers processes (default: one per CPU) and written
+    in order, with at most two blocks per worker in flight.
+    """
+    dimensions = dimensions or Dimensions.for_rows(rows, seed)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(_blocks(rows)) or 1))
+    started = time.perf_counter()
+    # utf-8-sig like the extract; one handle so the BOM is written once
+    with open(path, 'w', encoding='utf-8-sig', newline='') as output:
+        output.write(','.join(ORDER_COLUMNS) + '\n')
+        if workers == 1:
+            for block, size in _blocks(rows):
+                output.write(_order_block_csv(dimensions, seed, block, size))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending: Deque[Future] = deque()
+                for block, size in _blocks(rows):
+                    pending.append(executor.submit(_order_block_csv, dimensions, seed, block, size))
+                    if len(pending) >= 2 * workers:
+                        output.write(pending.popleft().result())
+                while pending:
+                    output.write(pending.popleft().result())
+    logger.info(f"Wrote {rows} order rows to {path} in {time.perf_counter() - started:.1f}s "
+                f"({workers} worker{'s' if workers > 1 else ''})")
+    return rows
+
+
+def insert_dimensions(conn: sqlite3.Connection, dimensions: Dimensions, brands: int) -> Dict[str, int]:
+    """Fill the customer group, customer, fabric, colour and style tables (ids start at 1)"""
+    counts = {}
+    groups = len(dimensions.group_names)
+    counts['zCustomer_Group'] = insert_columns(conn, 'zCustomer_Group', {
+        'CustomerGroupID': np.arange(1, groups + 1),
+        'CustomerGroupName': dimensions.group_names,
+        'Description': [f"{name} customer group" for name in dimensions.group_names],
+        'IsActive': np.ones(groups, dtype=int),
+    })
+    counts['zCUSTOMER'] = insert_columns(conn, 'zCUSTOMER', {
+        'CustomerID': np.arange(1, dimensions.customers + 1),
+        'CustomerName': dimensions.customer_names,
+        'CustomerGroupID': dimensions.customer_group + 1,
+    })
+    fabric_ids = np.arange(1, dimensions.fabrics + 1)
+    counts['zFABRIC'] = insert_columns(conn, 'zFABRIC', {
+        'FabricID': fabric_ids,
+        'FabricName': [f"Fabric {value:03d}" for value in fabric_ids.tolist()],
+        'Composition': dimensions.fabric_composition,
+    })
+    colour_ids = np.arange(dimensions.colours)
+    counts['zCOLOUR'] = insert_columns(conn, 'zCOLOUR', {
+        'ColourID': colour_ids + 1,
+        'ColourName': [f"{COLOUR_NAMES[index % len(COLOUR_NAMES)]} {index // len(COLOUR_NAMES) + 1:02d}"
+                       for index in colour_ids.tolist()],
+        'FabricID': dimensions.colour_fabric + 1,
+    })
+    style_ids = np.arange(1, dimensions.styles + 1)
+    counts['zSTYLE'] = insert_columns(conn, 'zSTYLE', {
+        'StyleID': style_ids,
+        'StyleCode': [f"ST{value:06d}" for value in style_ids.tolist()],
+        'CustomerStyleNumber': [f"CS-{value:06d}" for value in style_ids.tolist()],
+        'StyleName': [f"{GARMENTS[value % len(GARMENTS)]} {value:05d}" for value in style_ids.tolist()],
+        'StyleDescription': [f"{GARMENTS[value % len(GARMENTS)]} style {value}" for value in style_ids.tolist()],
+        'CollectionNumber': [f"COL-{value % 40 + 1:03d}" for value in style_ids.tolist()],
+        'BrandID': (dimensions.style_brand_draw * brands).astype(int) + 1,
+    })
+    return counts
+
+
+def insert_cpos(conn: sqlite3.Connection, cpos: int, dimensions: Dimensions, now: datetime,
+                users: int, seed: int = 42, days_back: float = 730) -> Dict[str, int]:
+    """Fill zCPO, zCPO_STYLE and zCPO_SKU with cpos orders, CPO_BLOCK at a time
+
+    Expects insert_dimensions (or equivalent rows) for the referenced
+    customers, styles and colours, and users rows in zUSER.
+    """
+    counts = {'zCPO': 0, 'zCPO_STYLE': 0, 'zCPO_SKU': 0}
+    for block, start in enumerate(range(0, cpos, CPO_BLOCK)):
+        size = min(CPO_BLOCK, cpos - start)
+        rng = rng_for(seed, CPO_STREAM, block)
+        cpo_ids = np.arange(start + 1, start + size + 1)
+        counts['zCPO'] += insert_columns(conn, 'zCPO', {
+            'CPOID': cpo_ids,
+            'CustomerID': sample(rng, dimensions.customer_cdf, size) + 1,
+            'CreatedByUserID': rng.integers(1, users + 1, size),
+            'CPODate': random_timestamps(rng, size, now, days_back),
+            'RecordStatus': np.where(rng.random(size) < 0.9, 'Active', 'Inactive'),
+            'CustomerOrderNumber': [f"PO-{value:08d}" for value in cpo_ids.tolist()],
+        })
+
+        styles_per_cpo = rng.integers(1, 5, size)
+        style_rows = int(styles_per_cpo.sum())
+        first_style_id = counts['zCPO_STYLE'] + 1
+        style_ids = np.arange(first_style_id, first_style_id + style_rows)
+        quantity = rng.integers(100, 5000, style_rows)
+        value = np.round(quantity * rng.uniform(3, 30, style_rows), 2)
+        counts['zCPO_STYLE'] += insert_columns(conn, 'zCPO_STYLE', {
+            'CPOStyleID': style_ids,
+            'CPOID': np.repeat(cpo_ids, styles_per_cpo),
+            'StyleID': sample(rng, dimensions.style_cdf, style_rows) + 1,
+            'CPOStyleQuantity': quantity,
+            'CPOStyleValue': value,
+            'FPOStyleQuantity': (quantity * rng.uniform(0.9, 1.0, style_rows)).astype(int),
+            'FPOStyleValue': np.round(value * rng.uniform(0.7, 0.9, style_rows), 2),
+        })
+
+        skus_per_style = rng.integers(1, 6, style_rows)
+        sku_rows = int(skus_per_style.sum())
+        first_sku_id = counts['zCPO_SKU'] + 1
+        sku_quantity = rng.integers(10, 2000, sku_rows)
+        price = np.round(rng.uniform(3, 30, sku_rows), 2)
+        counts['zCPO_SKU'] += insert_columns(conn, 'zCPO_SKU', {
+            'CPOSKUID': np.arange(first_sku_id, first_sku_id + sku_rows),
+            'CPOStyleID': np.repeat(style_ids, skus_per_style),
+            'ColourID': sample(rng, dimensions.colour_cdf, sku_rows) + 1,
+            'CPOSKUCustomerPrice': price,
+            'CPOSKUQuantity': sku_quantity,
+            'FPOSKUQuantity': (sku_quantity * rng.uniform(0.9, 1.0, sku_rows)).astype(int),
+            'FPOSKUVendorPrice': np.round(price * rng.uniform(0.6, 0.85, sku_rows), 2),
+        })
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point: write a generated order table"""
+    parser = argparse.ArgumentParser(description='Generate an order table in the data/data.csv format')
+    parser.add_argument('--rows', type=int, required=True, help='rows to generate')
+    parser.add_argument('--output', required=True, help='CSV file to write')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--customers', type=int, help='distinct customers (default grows with --rows)')
+    parser.add_argument('--factories', type=int, help='distinct factories (default grows with --rows)')
+    parser.add_argument('--workers', type=int, help='formatting processes (default: one per CPU)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    dimensions = Dimensions.for_rows(args.rows, args.seed)
+    if args.customers or args.factories:
+        dimensions = Dimensions(args.seed, customers=args.customers or dimensions.customers,
+                                factories=args.factories or len(dimensions.factory_names))
+    write_orders_csv(args.output, args.rows, args.seed, dimensions, args.workers)
+    print(f"{args.rows} rows, {dimensions.customers} customers in {len(dimensions.group_names)} groups, "
+          f"{len(dimensions.factory_names)} factories -> {os.path.abspath(args.output)}")
+
+
+if __name__ == '__main__':
+    main()
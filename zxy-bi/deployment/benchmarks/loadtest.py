@@ -0,0 +1,419 @@
+"""
+Load driver for ZXY Business Intelligence Dashboard benchmarks
+
+Drives the /api/* routes with a weighted, seeded mix of requests from
+concurrent keep-alive clients and reports latency percentiles (p50 / p95 /
+p99), throughput and the server's peak RSS per route and overall. Results
+are written as JSON so two runs can be compared:
+
+    python -m benchmarks.loadtest run --scale 1 --output base.json
+    (make a change)
+    python -m benchmarks.loadtest run --scale 1 --output head.json
+    python -m benchmarks.loadtest compare base.json head.json
+
+By default run seeds (or reuses) a stand-in database and starts
+benchmarks.server on it in a subprocess; --url targets a running server
+instead (pass --pid to also report its peak RSS). --order-rows serves a
+generated order table (benchmarks.datagen) of that size from /api/table-data.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import http.client
+from datetime import datetime
+from urllib.parse import urlsplit
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+DEPLOYMENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+logger = logging.getLogger(__name__)
+
+# Route name -> (path template, weight). Templates are filled per request
+# from ROUTE_PARAMS so paging and search vary the way a user's clicks do.
+ROUTES: Dict[str, Tuple[str, int]] = {
+    'dashboard': ('/api/dashboard', 2),
+    'kpis': ('/api/kpis', 3),
+    'alerts': ('/api/alerts', 2),
+    'sales-pipeline': ('/api/sales-pipeline', 2),
+    'chart-sales-trend': ('/api/chart-data/sales-trend', 2),
+    'chart-manufacturing-efficiency': ('/api/chart-data/manufacturing-efficiency', 1),
+    'chart-logistics-performance': ('/api/chart-data/logistics-performance', 1),
+    'financial-years': ('/api/financial-years', 1),
+    'customer-groups': ('/api/customer-groups', 1),
+    'countries': ('/api/countries', 1),
+    'customer-order-metrics': ('/api/customer-order-metrics', 2),
+    'table-data': ('/api/table-data', 1),
+    'table-data-page': ('/api/table-data?page={page}&page_size=50&sort={sort}&order={order}', 3),
+    'table-data-search': ('/api/table-data?q={term}', 1),
+    'table-data-rollup': ('/api/table-data/rollup?group_by={group_by}', 1),
+    'table-data-query': ('/api/table-data/query?group_by={group_by}&q={term}&limit=20', 1),
+    'cpo-latest': ('/api/cpo-detailed-data', 1),
+    'cpo-page': ('/api/cpo-detailed-data?page_size=100', 1),
+    # Off by default (select with --routes): the whole CPO history, wire formats, admin
+    'cpo-stream': ('/api/cpo-detailed-data?stream=ndjson', 0),
+    'table-data-columnar': ('/api/table-data?page={page}&page_size=1000&sort={sort}&order={order}&format=columnar', 0),
+    'table-data-arrow': ('/api/table-data?page={page}&page_size=1000&sort={sort}&order={order}&format=arrow', 0),
+    'query-stats': ('/api/admin/query-stats?limit=20', 0),
+}
+
+ROUTE_PARAMS = {
+    'page': [str(page) for page in range(1, 11)],
+    'sort': ['orderValue', 'customerName', 'factoryName', 'margin'],
+    'order': ['asc', 'desc'],
+    'term': ['abc', 'ltd', 'apparel', 'stitch', 'a'],
+    'group_by': ['customer_group', 'factory', 'customer_group,factory', 'customer_group,customer'],
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+class RequestLog:
+    """Latencies, statuses and sizes recorded by the client threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.bytes: Dict[str, int] = {}
+
+    def record(self, route: str, seconds: float, size: int, ok: bool) -> None:
+        """Add one completed request"""
+        with self._lock:
+            self.samples.setdefault(route, []).append(seconds)
+            self.bytes[route] = self.bytes.get(route, 0) + size
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+
+def summarize(samples: List[float], errors: int, size: int, elapsed: float) -> Dict[str, Any]:
+    """Latency percentiles in milliseconds plus throughput for one set of samples"""
+    latencies = np.asarray(samples) * 1000
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(float(latencies.mean()), 3) if len(latencies) else None,
+        'max_ms': round(float(latencies.max()), 3) if len(latencies) else None,
+        'bytes_per_request': int(size / len(samples)) if samples else 0,
+    }
+    for percentile in PERCENTILES:
+        value = np.percentile(latencies, percentile) if len(latencies) else None
+        summary[f'p{percentile}_ms'] = round(float(value), 3) if value is not None else None
+    return summary
+
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """Peak resident set size of a process (Linux /proc), in MiB"""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+class LoadDriver:
+    """Concurrent clients issuing a weighted mix of dashboard requests"""
+
+    def __init__(self, base_url: str, routes: Dict[str, Tuple[str, int]], concurrency: int = 8,
+                 seed: int = 42, accept_encoding: str = 'gzip', timeout: float = 60.0):
+        self.base = urlsplit(base_url)
+        self.routes = {name: route for name, route in routes.items() if route[1] > 0}
+        if not self.routes:
+            raise ValueError("No routes with a positive weight selected")
+        self.concurrency = concurrency
+        self.seed = seed
+        self.timeout = timeout
+        self.headers = {'Accept': 'application/json'}
+        if accept_encoding:
+            self.headers['Accept-Encoding'] = accept_encoding
+
+    def _connect(self) -> http.client.HTTPConnection:
+        """A keep-alive connection to the server"""
+        return http.client.HTTPConnection(self.base.hostname, self.base.port or 80, timeout=self.timeout)
+
+    def _path(self, template: str, rng: random.Random) -> str:
+        """Fill a route template with random parameters"""
+        if '{' not in template:
+            return template
+        return template.format(**{name: rng.choice(values) for name, values in ROUTE_PARAMS.items()})
+
+    def _client(self, index: int, deadline: float, max_requests: Optional[int],
+                log: Optional[RequestLog]) -> None:
+        """One client: request, read the whole body, repeat until the deadline"""
+        rng = random.Random(self.seed * 1000 + index)
+        names = list(self.routes)
+        weights = [self.routes[name][1] for name in names]
+        connection = self._connect()
+        sent = 0
+        try:
+            while time.perf_counter() < deadline and (max_requests is None or sent < max_requests):
+                name = rng.choices(names, weights)[0]
+                path = self.base.path.rstrip('/') + self._path(self.routes[name][0], rng)
+                started = time.perf_counter()
+                size, ok = 0, False
+                try:
+                    connection.request('GET', path, headers=self.headers)
+                    response = connection.getresponse()
+                    size = len(response.read())
+                    ok = response.status < 400
+                    if response.getheader('Connection', '').lower() == 'close':
+                        connection.close()
+                        connection = self._connect()
+                except (OSError, http.client.HTTPException) as e:
+                    logger.debug(f"Request to {path} failed: {e}")
+                    connection.close()
+                    connection = self._connect()
+                if log is not None:
+                    log.record(name, time.perf_counter() - started, size, ok)
+                sent += 1
+        finally:
+            connection.close()
+
+    def _run_clients(self, seconds: float, max_requests: Optional[int], log: Optional[RequestLog]) -> float:
+        """Run every client until the deadline; returns the elapsed time"""
+        deadline = time.perf_counter() + seconds
+        if max_requests is None:
+            quotas = [None] * self.concurrency
+        else:
+            # The first max_requests % concurrency clients send one extra request
+            share, extra = divmod(max_requests, self.concurrency)
+            quotas = [share + (index < extra) for index in range(self.concurrency)]
+        threads = [
+            threading.Thread(target=self._client, args=(index, deadline, quotas[index], log), daemon=True)
+            for index in range(self.concurrency)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+    def run(self, duration: float, warmup: float = 5.0, max_requests: Optional[int] = None) -> Dict[str, Any]:
+        """Warm up without recording, then measure for duration seconds (or max_requests)"""
+        if warmup > 0:
+            self._run_clients(warmup, None, None)
+        log = RequestLog()
+        elapsed = self._run_clients(duration if max_requests is None else float('inf'), max_requests, log)
+
+        routes = {
+            name: summarize(samples, log.errors.get(name, 0), log.bytes.get(name, 0), elapsed)
+            for name, samples in sorted(log.samples.items())
+        }
+        all_samples = [sample for samples in log.samples.values() for sample in samples]
+        overall = summarize(all_samples, sum(log.errors.values()), sum(log.bytes.values()), elapsed)
+        overall['elapsed_s'] = round(elapsed, 3)
+        return {'routes': routes, 'overall': overall}
+
+
+def _free_port() -> int:
+    """An unused local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(process: subprocess.Popen, url: str, timeout: float = 120.0) -> None:
+    """Block until the server answers, or fail if it exits first"""
+    target = urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Benchmark server exited with status {process.returncode}")
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=5)
+        try:
+            connection.request('GET', '/api/countries')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        finally:
+            connection.close()
+        time.sleep(0.2)
+    raise RuntimeError(f"Benchmark server did not answer within {timeout:.0f}s")
+
+
+def _git_revision() -> Optional[str]:
+    """Commit of the working tree being measured, if available"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DEPLOYMENT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def select_routes(names: Optional[str]) -> Dict[str, Tuple[str, int]]:
+    """ROUTES, or just the comma-separated names given (weight 1 if they are off by default)"""
+    if not names:
+        return dict(ROUTES)
+    selected = {}
+    for name in (name.strip() for name in names.split(',') if name.strip()):
+        if name not in ROUTES:
+            raise SystemExit(f"Unknown route: {name} (choose from {', '.join(ROUTES)})")
+        template, weight = ROUTES[name]
+        selected[name] = (template, max(weight, 1))
+    return selected
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    """Start (or attach to) a server, drive it and collect the report"""
+    process = None
+    url, pid = args.url, args.pid
+    if not url:
+        from benchmarks.standin import seed_standin
+
+        db_path = args.db or os.path.join(tempfile.gettempdir(), f'zxy-standin-{args.scale:g}-{args.seed}.sqlite')
+        if args.reseed or not os.path.exists(db_path):
+            seed_standin(db_path, args.scale, args.seed)
+        port = _free_port()
+        command = [sys.executable, '-m', 'benchmarks.server', '--db', db_path, '--port', str(port)]
+        order_table = args.order_table
+        if args.order_rows and not order_table:
+            from benchmarks.datagen import write_orders_csv
+
+            order_table = os.path.join(tempfile.gettempdir(), f'zxy-orders-{args.order_rows}-{args.seed}.csv')
+            if args.reseed or not os.path.exists(order_table):
+                write_orders_csv(order_table, args.order_rows, args.seed)
+        if order_table:
+            command += ['--order-table', order_table]
+        process = subprocess.Popen(command, cwd=DEPLOYMENT_DIR)
+        url, pid = f'http://127.0.0.1:{port}', process.pid
+        _wait_until_ready(process, url)
+
+    try:
+        driver = LoadDriver(url, select_routes(args.routes), args.concurrency, args.seed, args.accept_encoding)
+        report = driver.run(args.duration, args.warmup, args.requests)
+        report['overall']['server_peak_rss_mb'] = peak_rss_mb(pid) if pid else None
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report['meta'] = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'url': args.url or 'stand-in',
+        'scale': args.scale,
+        'order_rows': args.order_rows,
+        'seed': args.seed,
+        'concurrency': args.concurrency,
+        'duration_s': args.duration,
+        'accept_encoding': args.accept_encoding,
+        'python': platform.python_version(),
+        'host': platform.node(),
+    }
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Human-readable table of a run"""
+    header = f"{'route':<32}{'requests':>9}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print('-' * len(header))
+    rows = list(report['routes'].items()) + [('overall', report['overall'])]
+    for name, stats in rows:
+        print(f"{name:<32}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput_rps']:>9.1f}"
+              f"{stats['p50_ms'] or 0:>10.1f}{stats['p95_ms'] or 0:>10.1f}{stats['p99_ms'] or 0:>10.1f}")
+    rss = report['overall'].get('server_peak_rss_mb')
+    print(f"\nserver peak RSS: {rss if rss is not None else 'n/a'} MiB")
+
+
+def compare_reports(base: Dict[str, Any], head: Dict[str, Any], threshold: float) -> List[str]:
+    """Print per-route changes from base to head; returns the regressions beyond threshold percent"""
+    regressions = []
+    metrics = [(f'p{percentile}_ms', True) for percentile in PERCENTILES] + [('throughput_rps', False)]
+    header = f"{'route':<32}" + ''.join(f"{name:>22}" for name, _ in metrics)
+    print(header)
+    print('-' * len(header))
+
+    names = [name for name in head['routes'] if name in base['routes']] + ['overall']
+    for name in names:
+        before = base['overall'] if name == 'overall' else base['routes'][name]
+        after = head['overall'] if name == 'overall' else head['routes'][name]
+        cells = []
+        for metric, lower_is_better in metrics:
+            old, new = before.get(metric), after.get(metric)
+            if not old or new is None:
+                cells.append(f"{'n/a':>22}")
+                continue
+            change = (new - old) / old * 100
+            worse = change > threshold if lower_is_better else change < -threshold
+            if worse:
+                regressions.append(f"{name} {metric}: {old} -> {new} ({change:+.1f}%)")
+            cells.append(f"{f'{old:.1f} -> {new:.1f} ({change:+.0f}%)':>21}{'!' if worse else ' '}")
+        print(f"{name:<32}" + ''.join(cells))
+
+    old_rss = base['overall'].get('server_peak_rss_mb')
+    new_rss = head['overall'].get('server_peak_rss_mb')
+    if old_rss and new_rss:
+        change = (new_rss - old_rss) / old_rss * 100
+        print(f"\nserver peak RSS: {old_rss} -> {new_rss} MiB ({change:+.1f}%)")
+        if change > threshold:
+            regressions.append(f"server peak RSS: {old_rss} -> {new_rss} MiB ({change:+.1f}%)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Dashboard load and latency benchmark')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='drive the API and report latency, throughput and RSS')
+    run.add_argument('--url', help='benchmark a running server instead of starting one on the stand-in')
+    run.add_argument('--pid', type=int, help='pid of the --url server, to report its peak RSS')
+    run.add_argument('--db', help='stand-in database (default: a per-scale file in the temp directory)')
+    run.add_argument('--reseed', action='store_true', help='recreate the stand-in database first')
+    run.add_argument('--scale', type=float, default=1.0, help='stand-in row count multiplier')
+    run.add_argument('--order-table', help='order table CSV served by /api/table-data')
+    run.add_argument('--order-rows', type=int, help='generate an order table of this many rows to serve')
+    run.add_argument('--seed', type=int, default=42, help='seed for the data and the request mix')
+    run.add_argument('--concurrency', type=int, default=8)
+    run.add_argument('--duration', type=float, default=30.0, help='measured seconds')
+    run.add_argument('--requests', type=int, help='stop after this many requests instead of --duration')
+    run.add_argument('--warmup', type=float, default=5.0, help='unmeasured seconds before the run')
+    run.add_argument('--routes', help=f"comma-separated subset of: {', '.join(ROUTES)}")
+    run.add_argument('--accept-encoding', default='gzip', help="Accept-Encoding header ('' for identity)")
+    run.add_argument('--output', help='write the JSON report here')
+
+    compare = commands.add_parser('compare', help='compare two JSON reports')
+    compare.add_argument('base')
+    compare.add_argument('head')
+    compare.add_argument('--threshold', type=float, default=10.0,
+                         help='percent change counted as a regression (exit status 1)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'run':
+        report = run_benchmark(args)
+        print_report(report)
+        if args.output:
+            with open(args.output, 'w') as output:
+                json.dump(report, output, indent=2)
+            print(f"Report written to {args.output}")
+    else:
+        with open(args.base) as base, open(args.head) as head:
+            regressions = compare_reports(json.load(base), json.load(head), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:g}%:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
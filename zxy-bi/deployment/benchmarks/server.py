@@ -0,0 +1,71 @@
+"""
+Benchmark server for ZXY Business Intelligence Dashboard
+
+Serves app.py with its database pointed at the local stand-in, on
+werkzeug's threaded server with HTTP/1.1 keep-alive. It is a single process,
+so results compare one run with another rather than predict the capacity
+of the gunicorn deployment. Settings such as the cache sizes come from the
+environment exactly as in production.
+"""
+
+import os
+import sys
+import logging
+import argparse
+import importlib.util
+from typing import List, Optional
+
+DEPLOYMENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+logger = logging.getLogger(__name__)
+
+
+def load_dashboard_app():
+    """Import app.py as a module (the app package shadows it by name)"""
+    if DEPLOYMENT_DIR not in sys.path:
+        sys.path.insert(0, DEPLOYMENT_DIR)
+    spec = importlib.util.spec_from_file_location('dashboard_app', os.path.join(DEPLOYMENT_DIR, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point: serve the dashboard on a stand-in database"""
+    parser = argparse.ArgumentParser(description='Serve the dashboard against the SQLite stand-in')
+    parser.add_argument('--db', required=True, help='seeded stand-in database (see benchmarks.standin)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--order-table', help='order table CSV (default: ORDER_TABLE_PATH or data/data.csv)')
+    parser.add_argument('--log-level', default='WARNING', help='log level; INFO logs every query')
+    args = parser.parse_args(argv)
+
+    if args.order_table:
+        os.environ['ORDER_TABLE_PATH'] = os.path.abspath(args.order_table)
+    # Debug mode pretty-prints JSON; measure the production encoding
+    os.environ.setdefault('FLASK_DEBUG', '')
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from benchmarks.standin import install_standin
+
+    dashboard = load_dashboard_app()
+    # config.database configures logging at INFO on import
+    logging.getLogger().setLevel(args.log_level.upper())
+    logging.getLogger('werkzeug').setLevel(args.log_level.upper())
+    install_standin(dashboard.data_model.db, os.path.abspath(args.db))
+    dashboard.dashboard_data.invalidate()
+
+    WSGIRequestHandler.protocol_version = 'HTTP/1.1'
+    server = make_server(args.host, args.port, dashboard.app, threaded=True)
+    print(f"Serving dashboard on http://{args.host}:{server.port} (stand-in {args.db}, pid {os.getpid()})",
+          flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,501 @@
+"""
+Local SQL stand-in for ZXY Business Intelligence Dashboard benchmarks
+
+A SQLite database with the tables DashboardDataModel queries, seeded with
+deterministic data at a configurable scale (customers, styles and CPOs come
+from benchmarks.datagen, with the same skew as generated order tables), plus
+an engine that accepts the registered T-SQL statements unchanged: DATEADD,
+GETDATE, YEAR and DATE_FORMAT are provided as functions and SELECT TOP n is
+rewritten to LIMIT n as each statement is executed.
+
+Dates are stored as 'YYYY-MM-DD HH:MM:SS' text, laid out backwards from the
+day the database is seeded so the rolling windows of the KPI and chart
+queries always find rows.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from benchmarks.datagen import (
+    Dimensions, TIMESTAMP_FORMAT, format_timestamps, insert_columns, insert_cpos, insert_dimensions,
+    random_timestamps, sample
+)
+
+logger = logging.getLogger(__name__)
+
+STANDIN_SCHEMA = """
+CREATE TABLE zFINANCIAL_YEAR (
+    FinancialYearID INTEGER PRIMARY KEY,
+    FinancialYearName TEXT NOT NULL,
+    StartDate TEXT NOT NULL,
+    EndDate TEXT NOT NULL,
+    IsActive INTEGER NOT NULL
+);
+CREATE TABLE zCustomer_Group (
+    CustomerGroupID INTEGER PRIMARY KEY,
+    CustomerGroupName TEXT NOT NULL,
+    Description TEXT,
+    IsActive INTEGER NOT NULL
+);
+-- zCountry_Office and zCOUNTRY_OFFICE are one table in SQLite (names are case-insensitive)
+CREATE TABLE zCOUNTRY_OFFICE (
+    CountryOfficeID INTEGER PRIMARY KEY,
+    CountryOfficeName TEXT NOT NULL,
+    CountryID INTEGER NOT NULL,
+    CountryName TEXT NOT NULL
+);
+CREATE TABLE zCUSTOMER (
+    CustomerID INTEGER PRIMARY KEY,
+    CustomerName TEXT NOT NULL,
+    CustomerGroupID INTEGER NOT NULL REFERENCES zCustomer_Group (CustomerGroupID)
+);
+CREATE TABLE zCustomer_Order (
+    CustomerOrderID INTEGER PRIMARY KEY,
+    FinancialYearID INTEGER NOT NULL REFERENCES zFINANCIAL_YEAR (FinancialYearID),
+    CustomerID INTEGER NOT NULL REFERENCES zCUSTOMER (CustomerID),
+    OrderStatus TEXT NOT NULL,
+    TotalOrderValue REAL NOT NULL,
+    TotalQuantity INTEGER NOT NULL,
+    MarginPercentage REAL,
+    ModifiedDate TEXT NOT NULL
+);
+CREATE INDEX ix_customer_order_year ON zCustomer_Order (FinancialYearID, OrderStatus);
+CREATE INDEX ix_customer_order_modified ON zCustomer_Order (FinancialYearID, ModifiedDate);
+
+CREATE TABLE zDIVISION (DivisionID INTEGER PRIMARY KEY, DivisionName TEXT NOT NULL);
+CREATE TABLE zDEPARTMENT (DepartmentID INTEGER PRIMARY KEY, DepartmentName TEXT NOT NULL);
+CREATE TABLE zORGANISATION_STRUCTURE (
+    OrganisationStructureID INTEGER PRIMARY KEY,
+    DepartmentID INTEGER REFERENCES zDEPARTMENT (DepartmentID),
+    DivisionID INTEGER REFERENCES zDIVISION (DivisionID),
+    CountryOfficeID INTEGER REFERENCES zCOUNTRY_OFFICE (CountryOfficeID)
+);
+CREATE TABLE zEMPLOYEE (
+    EmployeeID INTEGER PRIMARY KEY,
+    EmployeeNumber TEXT NOT NULL,
+    DefaultOrgStructureID INTEGER REFERENCES zORGANISATION_STRUCTURE (OrganisationStructureID)
+);
+CREATE TABLE zUSER (
+    UserID INTEGER PRIMARY KEY,
+    EmployeeID INTEGER REFERENCES zEMPLOYEE (EmployeeID)
+);
+CREATE TABLE zMASTER_DETAIL (MasterDetailID INTEGER PRIMARY KEY, MasterValue TEXT NOT NULL);
+CREATE TABLE zFABRIC (
+    FabricID INTEGER PRIMARY KEY,
+    FabricName TEXT NOT NULL,
+    Composition TEXT
+);
+CREATE TABLE zCOLOUR (
+    ColourID INTEGER PRIMARY KEY,
+    ColourName TEXT NOT NULL,
+    FabricID INTEGER NOT NULL REFERENCES zFABRIC (FabricID)
+);
+CREATE TABLE zSTYLE (
+    StyleID INTEGER PRIMARY KEY,
+    StyleCode TEXT NOT NULL,
+    CustomerStyleNumber TEXT,
+    StyleName TEXT NOT NULL,
+    StyleDescription TEXT,
+    CollectionNumber TEXT,
+    BrandID INTEGER REFERENCES zMASTER_DETAIL (MasterDetailID)
+);
+CREATE TABLE zCPO (
+    CPOID INTEGER PRIMARY KEY,
+    CustomerID INTEGER NOT NULL REFERENCES zCUSTOMER (CustomerID),
+    CreatedByUserID INTEGER REFERENCES zUSER (UserID),
+    CPODate TEXT NOT NULL,
+    RecordStatus TEXT NOT NULL,
+    CustomerOrderNumber TEXT
+);
+CREATE INDEX ix_cpo_keyset ON zCPO (RecordStatus, CPODate DESC, CPOID DESC);
+CREATE TABLE zCPO_STYLE (
+    CPOStyleID INTEGER PRIMARY KEY,
+    CPOID INTEGER NOT NULL REFERENCES zCPO (CPOID),
+    StyleID INTEGER NOT NULL REFERENCES zSTYLE (StyleID),
+    CPOStyleQuantity INTEGER,
+    CPOStyleValue REAL,
+    FPOStyleQuantity INTEGER,
+    FPOStyleValue REAL
+);
+CREATE INDEX ix_cpo_style_cpo ON zCPO_STYLE (CPOID);
+CREATE TABLE zCPO_SKU (
+    CPOSKUID INTEGER PRIMARY KEY,
+    CPOStyleID INTEGER NOT NULL REFERENCES zCPO_STYLE (CPOStyleID),
+    ColourID INTEGER NOT NULL REFERENCES zCOLOUR (ColourID),
+    CPOSKUCustomerPrice REAL,
+    CPOSKUQuantity INTEGER,
+    FPOSKUQuantity INTEGER,
+    FPOSKUVendorPrice REAL
+);
+CREATE INDEX ix_cpo_sku_style ON zCPO_SKU (CPOStyleID);
+
+CREATE TABLE sales_data (id INTEGER PRIMARY KEY, date TEXT NOT NULL, amount REAL NOT NULL);
+CREATE INDEX ix_sales_data_date ON sales_data (date);
+CREATE TABLE prospects (id INTEGER PRIMARY KEY, name TEXT, status TEXT NOT NULL);
+CREATE TABLE sales_pipeline (
+    id INTEGER PRIMARY KEY,
+    company_name TEXT,
+    contact_person TEXT,
+    deal_value REAL,
+    value REAL,
+    stage TEXT,
+    probability INTEGER,
+    expected_close_date TEXT,
+    source TEXT,
+    status TEXT NOT NULL
+);
+CREATE TABLE manufacturing_metrics (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    factory_name TEXT NOT NULL,
+    utilization_rate REAL,
+    efficiency_rate REAL
+);
+CREATE INDEX ix_manufacturing_metrics_date ON manufacturing_metrics (date);
+CREATE TABLE shipments (
+    id INTEGER PRIMARY KEY,
+    region TEXT NOT NULL,
+    promised_date TEXT NOT NULL,
+    delivery_date TEXT NOT NULL,
+    delivery_time REAL
+);
+CREATE INDEX ix_shipments_delivery_date ON shipments (delivery_date);
+CREATE TABLE financial_data (id INTEGER PRIMARY KEY, fiscal_year INTEGER NOT NULL, revenue REAL NOT NULL);
+CREATE TABLE system_alerts (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    priority TEXT,
+    created_date TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+"""
+
+# Rows per table at scale 1; lookup tables do not scale
+BASE_ROWS = {
+    'customers': 200,
+    'customer_orders': 20000,
+    'cpos': 5000,
+    'styles': 1000,
+    'sales_data': 20000,
+    'prospects': 2000,
+    'sales_pipeline': 1000,
+    'shipments': 10000,
+}
+
+COUNTRIES = ['Bangladesh', 'Sri Lanka', 'India', 'Vietnam', 'Cambodia', 'Pakistan', 'China', 'Indonesia']
+REGIONS = ['Asia', 'Europe', 'North America', 'South America', 'Oceania', 'Africa']
+ORDER_STATUSES = ['Active', 'Confirmed', 'Processing', 'Shipped', 'Cancelled']
+PIPELINE_STAGES = ['qualified', 'proposal', 'negotiation', 'closed']
+
+_DATEADD_PART = re.compile(r'\bDATEADD\(\s*([A-Za-z]+)\s*,', re.IGNORECASE)
+_SELECT_TOP = re.compile(r'\bSELECT(\s+)TOP\s*(?:\(\s*(\?|\d+)\s*\)|(\d+))', re.IGNORECASE)
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """Stored timestamp text (or a datetime) as a datetime"""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def sql_dateadd(part: str, number: int, value: Any) -> Optional[str]:
+    """T-SQL DATEADD for the date parts the dashboard queries use"""
+    moment = _parse_timestamp(value)
+    if moment is None:
+        return None
+    part = part.lower()
+    if part in ('year', 'yy', 'yyyy', 'month', 'mm', 'm', 'quarter', 'qq', 'q'):
+        months = number * {'y': 12, 'q': 3}.get(part[0], 1)
+        month_index = moment.month - 1 + months
+        year, month = moment.year + month_index // 12, month_index % 12 + 1
+        # Clamp to the last day of the target month, as SQL Server does
+        day = moment.day
+        while True:
+            try:
+                moment = moment.replace(year=year, month=month, day=day)
+                break
+            except ValueError:
+                day -= 1
+    else:
+        unit = {'day': 'days', 'dd': 'days', 'd': 'days', 'week': 'weeks', 'wk': 'weeks',
+                'hour': 'hours', 'hh': 'hours', 'minute': 'minutes', 'mi': 'minutes',
+                'second': 'seconds', 'ss': 'seconds'}.get(part)
+        if unit is None:
+            raise ValueError(f"Unsupported DATEADD part: {part}")
+        moment = moment + timedelta(**{unit: number})
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+
+def sql_getdate() -> str:
+    """T-SQL GETDATE"""
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def sql_year(value: Any) -> Optional[int]:
+    """T-SQL YEAR"""
+    moment = _parse_timestamp(value)
+    return moment.year if moment else None
+
+
+def sql_date_format(value: Any, fmt: str) -> Optional[str]:
+    """MySQL-style DATE_FORMAT for the strftime-compatible codes the queries use"""
+    moment = _parse_timestamp(value)
+    return moment.strftime(fmt) if moment else None
+
+
+def _scope_end(sql: str, start: int) -> int:
+    """Index where the SELECT starting at start ends: its closing parenthesis or the end of the text"""
+    depth = 0
+    position = start
+    while position < len(sql):
+        char = sql[position]
+        if char == "'":
+            position = sql.find("'", position + 1)
+            if position < 0:
+                return len(sql)
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            if depth == 0:
+                return position
+            depth -= 1
+        position += 1
+    return len(sql)
+
+
+def translate_tsql(statement: str, parameters: Any) -> Tuple[str, Any]:
+    """Rewrite a compiled T-SQL statement for SQLite, moving TOP (?) parameters with it"""
+    statement = _DATEADD_PART.sub(lambda match: f"DATEADD('{match.group(1)}',", statement)
+
+    match = _SELECT_TOP.search(statement)
+    while match:
+        limit = match.group(2) or match.group(3)
+        head = statement[:match.start()] + 'SELECT' + match.group(1)
+        rest = statement[match.end():]
+        end = _scope_end(rest, 0)
+        body = head + rest[:end].rstrip()
+        if limit == '?' and isinstance(parameters, (list, tuple)):
+            # The bound value moves from the select list to the LIMIT clause
+            values = list(parameters)
+            value = values.pop(statement[:match.start()].count('?'))
+            values.insert(body.count('?'), value)
+            parameters = tuple(values) if isinstance(parameters, tuple) else values
+        statement = f"{body} LIMIT {limit} {rest[end:]}"
+        match = _SELECT_TOP.search(statement)
+    return statement, parameters
+
+
+def _register_functions(dbapi_connection, connection_record) -> None:
+    """Provide the T-SQL functions on every new SQLite connection"""
+    dbapi_connection.create_function('DATEADD', 3, sql_dateadd, deterministic=True)
+    dbapi_connection.create_function('GETDATE', 0, sql_getdate)
+    dbapi_connection.create_function('YEAR', 1, sql_year, deterministic=True)
+    dbapi_connection.create_function('DATE_FORMAT', 2, sql_date_format, deterministic=True)
+
+
+def _translate_statement(conn, cursor, statement, parameters, context, executemany):
+    """before_cursor_execute hook applying translate_tsql"""
+    return translate_tsql(statement, parameters)
+
+
+def create_standin_engine(path: str, pool_size: int = 5, max_overflow: int = 10) -> Engine:
+    """SQLAlchemy engine on a seeded stand-in database that runs the dashboard's T-SQL"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Stand-in database not found: {path} (seed it first)")
+    engine = create_engine(
+        f'sqlite:///{path}',
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        connect_args={'check_same_thread': False}
+    )
+    event.listen(engine, 'connect', _register_functions)
+    event.listen(engine, 'before_cursor_execute', _translate_statement, retval=True)
+    return engine
+
+
+def install_standin(db, path: str) -> Engine:
+    """Point a DatabaseConfig at the stand-in instead of SQL Server"""
+    engine = create_standin_engine(path, pool_size=db.pool_size, max_overflow=db.max_overflow)
+    db.engine = engine
+    return engine
+
+
+def _labels(prefix: str, ids: np.ndarray, width: int = 5) -> List[str]:
+    """Names like 'Style 00042' for an array of ids"""
+    return [f"{prefix} {value:0{width}d}" for value in ids.tolist()]
+
+
+def seed_standin(path: str, scale: float = 1.0, seed: int = 42,
+                 now: Optional[datetime] = None) -> Dict[str, int]:
+    """Create the stand-in database at path (replacing it) and fill every table
+
+    Row counts of the transactional tables are BASE_ROWS times scale; the
+    values are the same for a given seed, only the dates follow now.
+    """
+    rng = np.random.default_rng(seed)
+    now = (now or datetime.now()).replace(hour=12, minute=0, second=0, microsecond=0)
+    sizes = {name: max(1, int(rows * scale)) for name, rows in BASE_ROWS.items()}
+    dimensions = Dimensions(seed, customers=sizes['customers'], factories=10, styles=sizes['styles'])
+    started = time.perf_counter()
+
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    counts: Dict[str, int] = {}
+    try:
+        conn.executescript(STANDIN_SCHEMA)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')
+
+        # Reference data
+        years = np.arange(now.year - 4, now.year + 1)
+        counts['zFINANCIAL_YEAR'] = insert_columns(conn, 'zFINANCIAL_YEAR', {
+            'FinancialYearID': np.arange(1, len(years) + 1),
+            'FinancialYearName': [f"FY{year}" for year in years.tolist()],
+            'StartDate': [f"{year}-01-01 00:00:00" for year in years.tolist()],
+            'EndDate': [f"{year}-12-31 23:59:59" for year in years.tolist()],
+            'IsActive': (years == now.year).astype(int),
+        })
+        office_ids = np.arange(1, len(COUNTRIES) + 1)
+        counts['zCOUNTRY_OFFICE'] = insert_columns(conn, 'zCOUNTRY_OFFICE', {
+            'CountryOfficeID': office_ids,
+            'CountryOfficeName': [f"{country} Office" for country in COUNTRIES],
+            'CountryID': office_ids,
+            'CountryName': COUNTRIES,
+        })
+        counts['zDIVISION'] = insert_columns(conn, 'zDIVISION', {
+            'DivisionID': [1, 2, 3, 4],
+            'DivisionName': ['Knitwear', 'Woven', 'Denim', 'Outerwear'],
+        })
+        counts['zDEPARTMENT'] = insert_columns(conn, 'zDEPARTMENT', {
+            'DepartmentID': [1, 2, 3, 4, 5, 6],
+            'DepartmentName': ['Merchandising', 'Sourcing', 'Quality', 'Logistics', 'Finance', 'Design'],
+        })
+        org_ids = np.arange(1, 21)
+        counts['zORGANISATION_STRUCTURE'] = insert_columns(conn, 'zORGANISATION_STRUCTURE', {
+            'OrganisationStructureID': org_ids,
+            'DepartmentID': rng.integers(1, 7, len(org_ids)),
+            'DivisionID': rng.integers(1, 5, len(org_ids)),
+            'CountryOfficeID': rng.integers(1, len(COUNTRIES) + 1, len(org_ids)),
+        })
+        employee_ids = np.arange(1, 51)
+        counts['zEMPLOYEE'] = insert_columns(conn, 'zEMPLOYEE', {
+            'EmployeeID': employee_ids,
+            'EmployeeNumber': [f"E{value:05d}" for value in employee_ids.tolist()],
+            'DefaultOrgStructureID': rng.integers(1, len(org_ids) + 1, len(employee_ids)),
+        })
+        counts['zUSER'] = insert_columns(conn, 'zUSER', {'UserID': employee_ids, 'EmployeeID': employee_ids})
+        brand_ids = np.arange(1, 21)
+        counts['zMASTER_DETAIL'] = insert_columns(conn, 'zMASTER_DETAIL', {
+            'MasterDetailID': brand_ids,
+            'MasterValue': _labels('Brand', brand_ids, 2),
+        })
+        counts.update(insert_dimensions(conn, dimensions, brands=len(brand_ids)))
+
+        # Customer orders, spread over the financial years with most in the active one
+        orders = sizes['customer_orders']
+        order_years = np.minimum(len(years), 1 + rng.binomial(len(years), 0.8, orders))
+        counts['zCustomer_Order'] = insert_columns(conn, 'zCustomer_Order', {
+            'CustomerOrderID': np.arange(1, orders + 1),
+            'FinancialYearID': order_years,
+            'CustomerID': sample(rng, dimensions.customer_cdf, orders) + 1,
+            'OrderStatus': rng.choice(ORDER_STATUSES, orders, p=[0.35, 0.25, 0.15, 0.2, 0.05]),
+            'TotalOrderValue': np.round(rng.lognormal(9.5, 1.0, orders), 2),
+            'TotalQuantity': rng.integers(100, 25000, orders),
+            'MarginPercentage': np.round(rng.normal(12, 4, orders), 2),
+            'ModifiedDate': random_timestamps(rng, orders, now, 365),
+        })
+
+        # CPOs with their styles and SKUs
+        counts.update(insert_cpos(conn, sizes['cpos'], dimensions, now, users=len(employee_ids), seed=seed))
+
+        # Tables behind the KPI, alert, pipeline and chart queries
+        counts['sales_data'] = insert_columns(conn, 'sales_data', {
+            'date': random_timestamps(rng, sizes['sales_data'], now, 540),
+            'amount': np.round(rng.lognormal(7, 1.2, sizes['sales_data']), 2),
+        })
+        counts['prospects'] = insert_columns(conn, 'prospects', {
+            'name': _labels('Prospect', np.arange(1, sizes['prospects'] + 1)),
+            'status': rng.choice(['active', 'inactive', 'converted'], sizes['prospects'], p=[0.6, 0.3, 0.1]),
+        })
+        pipeline = sizes['sales_pipeline']
+        deal_value = np.round(rng.lognormal(10, 1, pipeline), 2)
+        counts['sales_pipeline'] = insert_columns(conn, 'sales_pipeline', {
+            'company_name': _labels('Company', rng.integers(1, pipeline + 1, pipeline)),
+            'contact_person': _labels('Contact', np.arange(1, pipeline + 1)),
+            'deal_value': deal_value,
+            'value': deal_value,
+            'stage': rng.choice(PIPELINE_STAGES, pipeline),
+            'probability': rng.integers(5, 96, pipeline),
+            'expected_close_date': random_timestamps(rng, pipeline, now, 0, 180),
+            'source': rng.choice(['Referral', 'Trade Show', 'Website', 'Cold Call'], pipeline),
+            'status': rng.choice(['active', 'qualified', 'proposal', 'negotiation', 'closed'], pipeline),
+        })
+        days = np.arange(90)
+        factories = dimensions.factory_names
+        factory_days = np.stack(np.meshgrid(days, np.arange(len(factories)), indexing='ij')).reshape(2, -1)
+        metric_dates = [(now - timedelta(days=int(day))).strftime(TIMESTAMP_FORMAT) for day in factory_days[0]]
+        counts['manufacturing_metrics'] = insert_columns(conn, 'manufacturing_metrics', {
+            'date': metric_dates,
+            'factory_name': factories[factory_days[1]],
+            'utilization_rate': np.round(rng.uniform(60, 98, len(metric_dates)), 1),
+            'efficiency_rate': np.round(rng.uniform(70, 99, len(metric_dates)), 1),
+        })
+        shipments = sizes['shipments']
+        promised = random_timestamps(rng, shipments, now, 120)
+        delay_days = np.round(rng.normal(0, 3, shipments)).astype(int)
+        delivered = promised.astype('datetime64[s]') + (delay_days * 86400).astype('timedelta64[s]')
+        counts['shipments'] = insert_columns(conn, 'shipments', {
+            'region': rng.choice(REGIONS, shipments),
+            'promised_date': promised,
+            'delivery_date': format_timestamps(delivered),
+            'delivery_time': np.round(rng.uniform(2, 30, shipments), 1),
+        })
+        counts['financial_data'] = insert_columns(conn, 'financial_data', {
+            'fiscal_year': np.repeat(years, 12),
+            'revenue': np.round(rng.lognormal(13, 0.5, len(years) * 12), 2),
+        })
+        counts['system_alerts'] = insert_columns(conn, 'system_alerts', {
+            'title': _labels('Alert', np.arange(1, 51), 2),
+            'description': ['Generated benchmark alert'] * 50,
+            'priority': rng.choice(['high', 'medium', 'low'], 50),
+            'created_date': random_timestamps(rng, 50, now, 14),
+            'status': rng.choice(['active', 'resolved'], 50, p=[0.4, 0.6]),
+        })
+        conn.commit()
+        conn.execute('ANALYZE')
+    finally:
+        conn.close()
+
+    logger.info(f"Seeded stand-in {path} at scale {scale} in {time.perf_counter() - started:.1f}s: "
+                f"{sum(counts.values())} rows")
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point: seed a stand-in database"""
+    parser = argparse.ArgumentParser(description='Seed the local SQLite stand-in for benchmarks')
+    parser.add_argument('--db', required=True, help='SQLite file to create (replaced if it exists)')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier on the base row counts')
+    parser.add_argument('--seed', type=int, default=42, help='random seed')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    counts = seed_standin(args.db, args.scale, args.seed)
+    for table, rows in counts.items():
+        print(f"{table:<26} {rows:>10}")
+
+
+if __name__ == '__main__':
+    main()
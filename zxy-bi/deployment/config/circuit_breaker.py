@@ -0,0 +1,131 @@
+"""
+Circuit breaker for database access in ZXY Business Intelligence Dashboard
+
+Once the database has failed enough times in a row, callers are rejected
+immediately instead of each waiting out the ODBC connect timeout. A background
+probe closes the circuit again as soon as the server answers.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of connecting while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit breaker with an optional background probe"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 3, recovery_timeout: float = 30.0,
+                 probe: Optional[Callable[[], Any]] = None, probe_interval: float = 10.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._probe_thread: Optional[threading.Thread] = None
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open"""
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a caller may try the database now
+
+        While open, requests are rejected until recovery_timeout has passed;
+        then a single trial request is let through (half-open) and its outcome
+        decides whether the circuit closes or re-opens.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._state = self.HALF_OPEN
+                logger.info(f"Circuit '{self.name}' half-open, allowing a trial request")
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call"""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit '{self.name}' closed, database reachable again")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold or on a failed trial"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        """Open the circuit and start the background probe; caller holds the lock"""
+        if self._state != self.OPEN:
+            self.times_opened += 1
+            logger.warning(
+                f"Circuit '{self.name}' opened after {self._failures} consecutive failures; "
+                f"failing fast for {self.recovery_timeout:.0f}s"
+            )
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        if self.probe is not None and (self._probe_thread is None or not self._probe_thread.is_alive()):
+            self._probe_thread = threading.Thread(target=self._probe_loop, name=f'{self.name}-probe', daemon=True)
+            self._probe_thread.start()
+
+    def _probe_loop(self) -> None:
+        """Poll the probe while the circuit is not closed"""
+        while self._state != self.CLOSED:
+            time.sleep(self.probe_interval)
+            if self._state == self.CLOSED:
+                break
+            try:
+                self.probe()
+            except Exception as e:
+                logger.debug(f"Circuit '{self.name}' probe failed: {e}")
+                continue
+            self.record_success()
+
+    def reset(self) -> None:
+        """Return to the closed state in a freshly forked worker"""
+        # The parent's lock may have been held at fork time
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+        self._probe_thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker counters for diagnostics"""
+        return {
+            'name': self.name,
+            'state': self._state,
+            'consecutive_failures': self._failures,
+            'failure_threshold': self.failure_threshold,
+            'recovery_timeout': self.recovery_timeout,
+            'times_opened': self.times_opened,
+            'rejected': self.rejected
+        }
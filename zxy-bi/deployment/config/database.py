@@ -3,13 +3,21 @@ Database configuration and connection management for ZXY Business Intelligence D
 """
 
 import os
+import copy
 import pyodbc
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.exc import DBAPIError
+import time
 import logging
-from typing import Optional, Dict, Any, List
+import threading
+from typing import Optional, Dict, Any, List, Iterator, Union, Callable
 from contextlib import contextmanager
+from config.circuit_breaker import CircuitBreaker, CircuitOpenError
+from config.single_flight import SingleFlight
+from config.query_profiler import QueryProfiler
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -45,36 +53,170 @@ class DatabaseConfig:
             f'TrustServerCertificate=yes'
         )
         
-        # Initialize SQLAlchemy engine
-        self.engine = None
-        self._initialize_engine()
+        # Fail fast while the server is unreachable instead of waiting out
+        # the connect timeout on every call
+        self.breaker = CircuitBreaker(
+            'database',
+            failure_threshold=int(os.environ.get('DB_BREAKER_FAILURE_THRESHOLD', 3)),
+            recovery_timeout=float(os.environ.get('DB_BREAKER_RECOVERY_TIMEOUT', 30)),
+            probe=self._probe_database,
+            probe_interval=float(os.environ.get('DB_BREAKER_PROBE_INTERVAL', 10))
+        )
+        
+        # Identical queries issued concurrently share one execution; with
+        # DB_SINGLE_FLIGHT_DIR set, also across worker processes
+        self.single_flight_enabled = os.environ.get('DB_SINGLE_FLIGHT', 'true').lower() != 'false'
+        self.single_flight = SingleFlight(
+            'database',
+            lock_dir=os.environ.get('DB_SINGLE_FLIGHT_DIR') or None,
+            result_ttl=float(os.environ.get('DB_SINGLE_FLIGHT_RESULT_TTL', 2))
+        )
+        
+        # Instrumentation hooks: query_observers are called with (kind, seconds,
+        # rows, ok) after each execute_query / execute_scalar execution,
+        # checkout_observers with the seconds spent waiting for a connection
+        # and hold_observers with the seconds a pooled connection was checked
+        # out, from the pool's checkout and checkin events
+        self.query_observers: List[Callable[[str, float, Optional[int], bool], None]] = []
+        self.checkout_observers: List[Callable[[float], None]] = []
+        self.hold_observers: List[Callable[[float], None]] = []
+        
+        # Per-statement timings from cursor events, attached to each engine
+        self.profiler = None
+        if os.environ.get('DB_QUERY_PROFILER', 'true').lower() != 'false':
+            self.profiler = QueryProfiler(slow_query_ms=float(os.environ.get('DB_SLOW_QUERY_MS', 1000)))
+            self.query_observers.append(lambda kind, seconds, rows, ok: self.profiler.record_rows(rows))
+        
+        # Pool sizing per worker process
+        self.pool_size = int(os.environ.get('DB_POOL_SIZE', 5))
+        self.max_overflow = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+        self.pool_recycle = int(os.environ.get('DB_POOL_RECYCLE', 3600))
+        
+        # The SQLAlchemy engine is created lazily, once per process, so a
+        # pool is never shared across a fork (e.g. gunicorn workers)
+        self._engine = None
+        self._engine_pid: Optional[int] = None
+        self._engine_lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.reset_after_fork)
+    
+    @property
+    def engine(self):
+        """The SQLAlchemy engine for the current process, created on first use"""
+        if self._engine is None or self._engine_pid != os.getpid():
+            with self._engine_lock:
+                if self._engine is None or self._engine_pid != os.getpid():
+                    self._initialize_engine()
+        return self._engine
+    
+    @engine.setter
+    def engine(self, engine):
+        """Replace the engine (e.g. to point at a local stand-in database)"""
+        with self._engine_lock:
+            self._engine = engine
+            self._engine_pid = os.getpid() if engine is not None else None
+            if engine is not None:
+                self._attach_pool_events(engine)
+                if self.profiler is not None:
+                    self.profiler.attach(engine)
     
     def _initialize_engine(self):
         """Initialize SQLAlchemy engine with connection pooling"""
+        if self._engine is not None and self._engine_pid != os.getpid():
+            # Inherited from the parent process: drop the pool without
+            # closing sockets the parent may still be using
+            self._engine.dispose(close=False)
         try:
-            self.engine = create_engine(
+            self._engine = create_engine(
                 self.sqlalchemy_url,
                 poolclass=QueuePool,
-                pool_size=5,
-                max_overflow=10,
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
                 pool_pre_ping=True,
-                pool_recycle=3600,
+                pool_recycle=self.pool_recycle,
                 echo=False  # Set to True for SQL debugging
             )
-            logger.info("Database engine initialized successfully")
+            self._engine_pid = os.getpid()
+            self._attach_pool_events(self._engine)
+            if self.profiler is not None:
+                self.profiler.attach(self._engine)
+            logger.info(f"Database engine initialized successfully (pid {self._engine_pid})")
         except Exception as e:
             logger.error(f"Failed to initialize database engine: {e}")
             raise
     
+    def _attach_pool_events(self, engine) -> None:
+        """Time each connection from pool checkout to checkin for hold_observers"""
+        if event.contains(engine, 'checkout', self._on_checkout):
+            return
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+    
+    @staticmethod
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        """Note when a connection left the pool"""
+        connection_record.info['checked_out_at'] = time.perf_counter()
+    
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        """Report how long a returning connection was checked out"""
+        checked_out_at = connection_record.info.pop('checked_out_at', None)
+        if checked_out_at is not None:
+            self._notify(self.hold_observers, time.perf_counter() - checked_out_at)
+    
+    def reset_after_fork(self) -> None:
+        """Forget state inherited from the parent process; the engine is rebuilt on next use"""
+        # The parent's lock may have been held at fork time
+        self._engine_lock = threading.Lock()
+        if self._engine is not None and self._engine_pid != os.getpid():
+            self._engine.dispose(close=False)
+            self._engine = None
+            self._engine_pid = None
+        # Each of these recreates its own locks before clearing its state
+        self.breaker.reset()
+        self.single_flight.reset()
+        if self.profiler is not None:
+            self.profiler.reset_after_fork()
+    
+    def warm_up(self, connections: int) -> int:
+        """Pre-open pooled connections so first requests skip the TLS and ODBC handshake"""
+        connections = min(connections, self.pool_size)
+        opened = []
+        try:
+            for _ in range(connections):
+                opened.append(self.engine.connect())
+        except Exception as e:
+            logger.warning(f"Connection pool warm-up stopped after {len(opened)} connections: {e}")
+        finally:
+            # Closing returns each connection to the pool, still open
+            for connection in opened:
+                connection.close()
+        logger.info(f"Warmed up {len(opened)} pooled database connections")
+        return len(opened)
+    
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
+        """Context manager for database connections, guarded by the circuit breaker"""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Database circuit is open; skipping connection attempt")
+        
         connection = None
         try:
-            connection = self.engine.connect()
+            started = time.perf_counter()
+            try:
+                connection = self.engine.connect()
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            finally:
+                # Includes queueing for a free connection when the pool is saturated
+                self._notify(self.checkout_observers, time.perf_counter() - started)
+            self.breaker.record_success()
             yield connection
         except Exception as e:
             logger.error(f"Database connection error: {e}")
+            # A connection lost mid-query counts against the breaker too
+            if isinstance(e, DBAPIError) and e.connection_invalidated:
+                self.breaker.record_failure()
             if connection:
                 connection.rollback()
             raise
@@ -82,6 +224,34 @@ class DatabaseConfig:
             if connection:
                 connection.close()
     
+    @staticmethod
+    def _notify(observers: List[Callable], *args) -> None:
+        """Call instrumentation observers, never letting them break a query"""
+        for observer in observers:
+            try:
+                observer(*args)
+            except Exception as e:
+                logger.debug(f"Database observer failed: {e}")
+    
+    def pool_status(self) -> Optional[Dict[str, int]]:
+        """QueuePool counters of this process's engine, or None before it is created"""
+        engine = self._engine
+        if engine is None or self._engine_pid != os.getpid() or not isinstance(engine.pool, QueuePool):
+            return None
+        pool = engine.pool
+        return {
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            # QueuePool counts overflow from -pool_size while the pool is filling
+            'overflow': max(pool.overflow(), 0)
+        }
+    
+    def _probe_database(self) -> None:
+        """Connectivity check used by the circuit breaker, bypassing it"""
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    
     def test_connection(self) -> bool:
         """Test database connectivity"""
         try:
@@ -98,34 +268,88 @@ class DatabaseConfig:
             logger.error(f"Database connection test failed: {e}")
             return False
     
-    def execute_query(self, query: str, params: Optional[Dict] = None) -> pd.DataFrame:
+    @staticmethod
+    def _as_statement(query: Union[str, TextClause]) -> TextClause:
+        """Use registered statements as-is; wrap ad-hoc SQL strings with text()"""
+        return query if isinstance(query, TextClause) else text(query)
+    
+    @staticmethod
+    def _flight_key(statement: TextClause, params: Optional[Dict]) -> tuple:
+        """Coalescing key: the statement text plus its parameters"""
+        return (statement.text, tuple(sorted((name, repr(value)) for name, value in (params or {}).items())))
+    
+    def _coalesce(self, kind: str, statement: TextClause, params: Optional[Dict], run, copy_result):
+        """Run a query, sharing the execution with identical concurrent queries"""
+        if not self.single_flight_enabled:
+            return run()
+        return self.single_flight.do((kind,) + self._flight_key(statement, params), run, copy_result)
+    
+    def execute_query(self, query: Union[str, TextClause], params: Optional[Dict] = None) -> pd.DataFrame:
         """Execute a SQL query and return results as DataFrame"""
+        try:
+            statement = self._as_statement(query)
+            return self._coalesce('frame', statement, params,
+                                  lambda: self._read_frame(statement, params),
+                                  lambda frame: frame.copy())
+        except Exception as e:
+            logger.error(f"Query execution failed: {e}")
+            raise
+    
+    def _read_frame(self, statement: TextClause, params: Optional[Dict]) -> pd.DataFrame:
+        """Run a statement and load the result into a DataFrame"""
+        started = time.perf_counter()
+        rows = None
         try:
             with self.get_connection() as conn:
                 if params:
-                    result = pd.read_sql(text(query), conn, params=params)
+                    result = pd.read_sql(statement, conn, params=params)
                 else:
-                    result = pd.read_sql(text(query), conn)
-                logger.info(f"Query executed successfully, returned {len(result)} rows")
+                    result = pd.read_sql(statement, conn)
+                rows = len(result)
+                logger.info(f"Query executed successfully, returned {rows} rows")
                 return result
-        except Exception as e:
-            logger.error(f"Query execution failed: {e}")
-            raise
+        finally:
+            self._notify(self.query_observers, 'query', time.perf_counter() - started, rows, rows is not None)
+    
+    def stream_query(self, query: Union[str, TextClause], params: Optional[Dict] = None,
+                     chunk_size: int = 1000) -> Iterator[pd.DataFrame]:
+        """Execute a query on a server-side cursor and yield DataFrames of up to chunk_size rows"""
+        with self.get_connection() as conn:
+            result = conn.execution_options(yield_per=chunk_size).execute(self._as_statement(query), params or {})
+            columns = list(result.keys())
+            row_count = 0
+            for rows in result.partitions():
+                row_count += len(rows)
+                yield pd.DataFrame.from_records(rows, columns=columns)
+            logger.info(f"Streamed query completed, returned {row_count} rows")
     
-    def execute_scalar(self, query: str, params: Optional[Dict] = None) -> Any:
+    def execute_scalar(self, query: Union[str, TextClause], params: Optional[Dict] = None) -> Any:
         """Execute a query and return a single scalar value"""
+        try:
+            statement = self._as_statement(query)
+            return self._coalesce('scalar', statement, params,
+                                  lambda: self._read_scalar(statement, params),
+                                  copy.copy)
+        except Exception as e:
+            logger.error(f"Scalar query execution failed: {e}")
+            raise
+
+    def _read_scalar(self, statement: TextClause, params: Optional[Dict]) -> Any:
+        """Run a statement and return the first column of its first row"""
+        started = time.perf_counter()
+        ok = False
         try:
             with self.get_connection() as conn:
                 if params:
-                    result = conn.execute(text(query), params)
+                    result = conn.execute(statement, params)
                 else:
-                    result = conn.execute(text(query))
+                    result = conn.execute(statement)
                 value = result.scalar()
+                ok = True
                 logger.info(f"Scalar query executed successfully")
                 return value
-        except Exception as e:
-            logger.error(f"Scalar query execution failed: {e}")
-            raise
+        finally:
+            self._notify(self.query_observers, 'scalar', time.perf_counter() - started, 1 if ok else None, ok)
 
 # Global database instance
 db_config = DatabaseConfig()
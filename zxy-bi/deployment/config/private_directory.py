@@ -0,0 +1,25 @@
+"""
+Private directories for ZXY Business Intelligence Dashboard
+
+Workers unpickle what they read from the shared cache, snapshot and
+single-flight files, so those files must live in a directory only the user
+the workers run as can write to; otherwise another local user could plant a
+pickle there and have it executed in every worker.
+"""
+
+import os
+import stat
+
+
+def ensure_private_directory(path: str) -> None:
+    """Create path with mode 0700, or check that an existing one is private
+
+    Raises PermissionError if path is owned by another user or writable by
+    group or others, and OSError if it cannot be created.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.stat(path)
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by uid {info.st_uid}, not this user")
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"{path} is writable by group or others")
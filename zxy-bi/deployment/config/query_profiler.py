@@ -0,0 +1,189 @@
+"""
+Query profiler for ZXY Business Intelligence Dashboard
+
+Hooks SQLAlchemy's cursor events to time every statement the engine runs and
+aggregates the timings by normalized SQL: count, total, p50 / p99 / max and
+rows returned. Statements slower than the slow-query threshold are logged
+with their parameters.
+"""
+
+import re
+import time
+import logging
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Any, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PARAMETER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+# Statement text kept in slow-query log lines
+SLOW_LOG_SQL_CHARS = 2000
+# Statements tracked individually; later distinct statements share one bucket
+MAX_STATEMENTS = 500
+OTHER_STATEMENTS = '<other statements>'
+# Columns stats() can be sorted by
+SORT_KEYS = ('count', 'errors', 'total_ms', 'mean_ms', 'p50_ms', 'p99_ms', 'max_ms', 'rows')
+# Distinct statement texts whose normalized form is remembered
+NORMALIZE_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_sql(statement: str) -> str:
+    """Statement text with literals replaced by ? and whitespace collapsed"""
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _PARAMETER_LIST.sub('(?)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+class StatementStats:
+    """Timings of one normalized statement, with a window of recent durations for percentiles"""
+
+    __slots__ = ('statement', 'count', 'errors', 'total', 'max', 'rows', 'recent')
+
+    def __init__(self, statement: str, window: int):
+        self.statement = statement
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.recent = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        """Add one execution"""
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Aggregates in milliseconds; percentiles cover the recent window"""
+        recent = sorted(self.recent)
+
+        def percentile(fraction: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(fraction * len(recent)))] * 1000
+
+        return {
+            'statement': self.statement,
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            'p50_ms': round(percentile(0.50), 3),
+            'p99_ms': round(percentile(0.99), 3),
+            'max_ms': round(self.max * 1000, 3),
+            'rows': self.rows
+        }
+
+
+class QueryProfiler:
+    """Per-statement timings collected from SQLAlchemy cursor events"""
+
+    def __init__(self, slow_query_ms: float = 1000.0, window: int = 1000):
+        self.slow_query_ms = slow_query_ms
+        self.window = window
+        self._lock = threading.Lock()
+        self._stats: Dict[str, StatementStats] = {}
+        self._local = threading.local()
+        self.slow_queries = 0
+
+    def attach(self, engine) -> None:
+        """Listen to an engine's cursor events (once per engine)"""
+        if event.contains(engine, 'before_cursor_execute', self._before_cursor_execute):
+            return
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(engine, 'handle_error', self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        """Note the start time on the connection"""
+        conn.info.setdefault('query_profiler_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        """Record the elapsed time and log the statement if it was slow"""
+        started = conn.info.get('query_profiler_started')
+        if not started:
+            return
+        seconds = time.perf_counter() - started.pop()
+        stats = self._statement(statement)
+        with self._lock:
+            stats.record(seconds)
+        self._local.last = stats
+
+        if self.slow_query_ms and seconds * 1000 >= self.slow_query_ms:
+            self.slow_queries += 1
+            logger.warning(
+                f"Slow query ({seconds * 1000:.0f} ms): {statement[:SLOW_LOG_SQL_CHARS]} "
+                f"parameters={parameters!r}"
+            )
+
+    def _handle_error(self, context) -> None:
+        """Count a failed statement and drop its start time"""
+        connection = context.connection
+        started = connection.info.get('query_profiler_started') if connection is not None else None
+        if started:
+            started.pop()
+        if context.statement:
+            stats = self._statement(context.statement)
+            with self._lock:
+                stats.errors += 1
+
+    def _statement(self, statement: str) -> StatementStats:
+        """Stats bucket for a statement, created on first sight"""
+        key = normalize_sql(statement)
+        stats = self._stats.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.get(key)
+                if stats is None:
+                    if len(self._stats) >= MAX_STATEMENTS:
+                        key = OTHER_STATEMENTS
+                    stats = self._stats.setdefault(key, StatementStats(key, self.window))
+        return stats
+
+    def record_rows(self, rows: Optional[int]) -> None:
+        """Attribute a fetched row count to the statement this thread executed last
+
+        The DBAPI does not report SELECT row counts, so callers that fetch the
+        result (execute_query) report them once the rows are read.
+        """
+        stats = getattr(self._local, 'last', None)
+        if stats is None or rows is None:
+            return
+        self._local.last = None
+        with self._lock:
+            stats.rows += rows
+
+    def stats(self, sort: str = 'total_ms', limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Statement aggregates, most expensive first"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Cannot sort query stats by {sort}")
+        with self._lock:
+            rows = [stats.to_dict() for stats in self._stats.values()]
+        rows.sort(key=lambda row: row[sort], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def reset(self) -> None:
+        """Forget all collected timings"""
+        with self._lock:
+            self._stats = {}
+            self.slow_queries = 0
+
+    def reset_after_fork(self) -> None:
+        """Forget the parent's timings and in-flight statements in a freshly forked worker"""
+        # The parent's lock may have been held at fork time
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {}
+        self.slow_queries = 0
@@ -0,0 +1,231 @@
+"""
+Single-flight query coalescing for ZXY Business Intelligence Dashboard
+
+When several requests run the same statement with the same parameters at the
+same moment, only the first executes it; the others wait for that execution
+and receive copies of its result. Optionally, a file lock extends this across
+gunicorn workers: the worker holding the lock publishes its result to a
+short-lived file that the waiting workers read instead of querying again.
+Results are pickles, so the lock directory must be private to the user the
+workers run as; expired result files and idle lock files are swept away.
+"""
+
+import os
+import copy
+import glob
+import time
+import pickle
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, Any, Optional, Callable, Hashable
+
+from config.private_directory import ensure_private_directory
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """An in-flight execution that followers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into a single execution"""
+
+    def __init__(self, name: str, lock_dir: Optional[str] = None, result_ttl: float = 2.0,
+                 sweep_interval: float = 60.0):
+        self.name = name
+        self.result_ttl = result_ttl
+        self.sweep_interval = sweep_interval
+        self.lock_dir = lock_dir if FCNTL_AVAILABLE else None
+        if lock_dir and not FCNTL_AVAILABLE:
+            logger.warning("fcntl is not available; single-flight coalescing is per process only")
+        if self.lock_dir and not self._private_directory(self.lock_dir):
+            self.lock_dir = None
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._swept_at = time.monotonic()
+        self.executions = 0
+        self.coalesced = 0
+        self.shared_across_workers = 0
+        self.swept_files = 0
+
+    @staticmethod
+    def _private_directory(path: str) -> bool:
+        """Create path for this user only, or check that an existing one is; results are unpickled from it"""
+        try:
+            ensure_private_directory(path)
+        except OSError as e:
+            logger.warning(f"Cannot use single-flight lock directory {path}, coalescing per process only: {e}")
+            return False
+        return True
+
+    def do(self, key: Hashable, fn: Callable[[], Any],
+           copy_result: Callable[[Any], Any] = copy.copy) -> Any:
+        """Return fn(), sharing one execution among concurrent callers with the same key
+
+        Followers get copy_result(result) so a caller mutating its result
+        cannot affect the others; errors are raised in every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy_result(call.result)
+
+        try:
+            call.result = self._execute(key, fn)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        # The leader's own result is shared with followers, so hand it a copy too
+        return copy_result(call.result) if call.followers else call.result
+
+    def _execute(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn, coordinating with other workers when a lock directory is configured"""
+        if not self.lock_dir:
+            with self._lock:
+                self.executions += 1
+            return fn()
+
+        self._maybe_sweep()
+
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        lock_path = os.path.join(self.lock_dir, f'{digest}.lock')
+        result_path = os.path.join(self.lock_dir, f'{digest}.result')
+        with open(lock_path, 'a+b') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Another worker may have run the query while we waited for the lock
+                shared = self._read_result(result_path)
+                if shared is not None:
+                    with self._lock:
+                        self.shared_across_workers += 1
+                    return shared[0]
+                with self._lock:
+                    self.executions += 1
+                result = fn()
+                self._write_result(result_path, result)
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_result(self, path: str) -> Optional[tuple]:
+        """(result,) from a result file written within result_ttl, else None"""
+        try:
+            with open(path, 'rb') as f:
+                info = os.fstat(f.fileno())
+                if time.time() - info.st_mtime > self.result_ttl:
+                    return None
+                if info.st_uid != os.getuid():
+                    logger.warning(f"Ignoring single-flight result {path} owned by another user")
+                    return None
+                return (pickle.load(f),)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable single-flight result {path}: {e}")
+            return None
+
+    def _write_result(self, path: str, result: Any) -> None:
+        """Publish a result for waiting workers, replacing the file atomically"""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.lock_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not publish single-flight result: {e}")
+
+    def _maybe_sweep(self) -> None:
+        """Sweep the lock directory if sweep_interval has passed since the last sweep"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._swept_at < self.sweep_interval:
+                return
+            self._swept_at = now
+        self.sweep()
+
+    def sweep(self) -> int:
+        """Delete expired result files and lock files no worker holds; returns the count
+
+        A lock file is only deleted while this worker holds its lock, so at
+        worst a caller that opened it just before gets its own execution.
+        """
+        if not self.lock_dir:
+            return 0
+        removed = 0
+        now = time.time()
+        expiries = [('*.result', self.result_ttl), ('*.tmp', max(self.sweep_interval, self.result_ttl))]
+        for pattern, expiry in expiries:
+            for path in glob.glob(os.path.join(self.lock_dir, pattern)):
+                try:
+                    if now - os.path.getmtime(path) > expiry:
+                        os.unlink(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Could not remove single-flight file {path}: {e}")
+        for path in glob.glob(os.path.join(self.lock_dir, '*.lock')):
+            if os.path.exists(path[:-len('.lock')] + '.result'):
+                continue
+            try:
+                with open(path, 'a+b') as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    try:
+                        os.unlink(path)
+                        removed += 1
+                    finally:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+            except (BlockingIOError, FileNotFoundError):
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove single-flight lock {path}: {e}")
+        with self._lock:
+            self.swept_files += removed
+        return removed
+
+    def reset(self) -> None:
+        """Forget in-flight calls, e.g. those of the parent's threads after a fork"""
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Coalescing counters for diagnostics"""
+        return {
+            'name': self.name,
+            'in_flight': len(self._calls),
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'shared_across_workers': self.shared_across_workers,
+            'swept_files': self.swept_files,
+            'cross_worker': bool(self.lock_dir)
+        }
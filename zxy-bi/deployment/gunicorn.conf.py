@@ -0,0 +1,26 @@
+"""
+Gunicorn configuration for ZXY Business Intelligence Dashboard
+
+Gives each worker its own database pool, created after the fork, and
+optionally pre-opens DB_POOL_WARMUP connections before the worker serves
+its first request.
+"""
+
+import os
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 80)}")
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+
+
+def post_fork(server, worker):
+    """Drop any database pool inherited from the master process"""
+    from config.database import get_database
+    get_database().reset_after_fork()
+
+
+def post_worker_init(worker):
+    """Pre-open pooled database connections once the app is loaded"""
+    connections = int(os.environ.get('DB_POOL_WARMUP', 0))
+    if connections > 0:
+        from config.database import get_database
+        get_database().warm_up(connections)
@@ -0,0 +1,11 @@
+"""
+Test configuration for ZXY Business Intelligence Dashboard
+
+Puts the deployment directory on sys.path so the app and config packages
+import the same way they do under gunicorn.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,101 @@
+"""
+Result cache tests for ZXY Business Intelligence Dashboard
+"""
+
+import threading
+import time
+
+from app.cache import CachedDashboardModel, TTLCache
+from app.models.dashboard_data import sample_data
+
+
+def test_fresh_hit_does_not_reload():
+    cache = TTLCache(10)
+    loads = []
+    loader = lambda: loads.append(1) or len(loads)
+    assert cache.get_or_load('key', loader, ttl=60) == 1
+    assert cache.get_or_load('key', loader, ttl=60) == 1
+    assert len(loads) == 1
+    assert cache.hits == 1
+
+
+def test_stale_value_served_while_refresh_runs():
+    cache = TTLCache(10)
+    cache.get_or_load('key', lambda: 'old', ttl=0.01, stale_ttl=60)
+    time.sleep(0.02)
+
+    refreshing, release = threading.Event(), threading.Event()
+
+    def slow_reload():
+        refreshing.set()
+        release.wait(timeout=10)
+        return 'new'
+
+    started = time.monotonic()
+    assert cache.get_or_load('key', slow_reload, ttl=60, stale_ttl=60) == 'old'
+    assert time.monotonic() - started < 1
+    assert refreshing.wait(timeout=10)
+    # Still stale while the refresh is running, and only one refresh is started
+    assert cache.get_or_load('key', slow_reload, ttl=60, stale_ttl=60) == 'old'
+    assert cache.stale_hits == 2
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while cache.get_or_load('key', slow_reload, ttl=60) != 'new' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get_or_load('key', slow_reload, ttl=60) == 'new'
+
+
+def test_expired_value_is_reloaded():
+    cache = TTLCache(10)
+    cache.get_or_load('key', lambda: 'old', ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get_or_load('key', lambda: 'new', ttl=60) == 'new'
+    assert cache.misses == 2
+
+
+class FlakyModel:
+    """Data model whose getter falls back to sample data while the database is down"""
+
+    def __init__(self):
+        self.database_up = False
+        self.loads = 0
+
+    def get_kpi_data(self):
+        self.loads += 1
+        return [{'id': 'real'}] if self.database_up else self._get_sample_kpis()
+
+    @sample_data
+    def _get_sample_kpis(self):
+        return [{'id': 'sample'}]
+
+
+def test_sample_data_fallback_uses_the_short_ttl():
+    model = FlakyModel()
+    cached = CachedDashboardModel(model, cache=TTLCache(10, fallback_ttl=0.05),
+                                  method_ttls={'get_kpi_data': (3600, 3600)})
+    fallbacks = []
+    cached.fallback_observers.append(fallbacks.append)
+
+    assert cached.get_kpi_data() == [{'id': 'sample'}]
+    # Cached briefly, and a cached fallback still counts as one
+    assert cached.get_kpi_data() == [{'id': 'sample'}]
+    assert model.loads == 1
+    assert fallbacks == ['get_kpi_data', 'get_kpi_data']
+    assert cached.fresh_ttl('kpis') == 0.05
+
+    model.database_up = True
+    time.sleep(0.06)
+    # Neither fresh nor stale past the fallback TTL: the real data is loaded
+    assert cached.get_kpi_data() == [{'id': 'real'}]
+    assert model.loads == 2
+    assert cached.fresh_ttl('kpis') == 3600
+
+
+def test_invalidate_drops_entries():
+    cache = TTLCache(10)
+    cache.get_or_load(('get_kpi_data',), lambda: 1, ttl=60)
+    cache.get_or_load(('get_alerts_data',), lambda: 2, ttl=60)
+    assert cache.invalidate('get_kpi_data') == 1
+    assert cache.get_or_load(('get_kpi_data',), lambda: 3, ttl=60) == 3
+    assert cache.get_or_load(('get_alerts_data',), lambda: 4, ttl=60) == 2
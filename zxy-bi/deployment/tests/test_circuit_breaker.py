@@ -0,0 +1,60 @@
+"""
+Circuit breaker tests for ZXY Business Intelligence Dashboard
+"""
+
+import time
+
+from config.circuit_breaker import CircuitBreaker
+
+
+def test_opens_after_threshold_failures():
+    breaker = CircuitBreaker('test', failure_threshold=3, recovery_timeout=60)
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.rejected == 1
+
+
+def test_half_open_allows_a_single_trial_then_closes():
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one trial is in flight at a time
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.times_opened == 2
+
+
+def test_probe_closes_the_circuit():
+    probes = []
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=60,
+                             probe=lambda: probes.append(1), probe_interval=0.01)
+    breaker.record_failure()
+    deadline = time.monotonic() + 2
+    while breaker.state != CircuitBreaker.CLOSED and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert probes
@@ -0,0 +1,64 @@
+"""
+Incremental order metrics tests for ZXY Business Intelligence Dashboard
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from app.models.order_metrics import IncrementalOrderMetrics, WatermarkError, max_watermark
+from app.models.queries import QUERIES
+
+
+def _orders(*rows):
+    """zCustomer_Order rows as (id, value, status, watermark)"""
+    return pd.DataFrame([
+        {'CustomerOrderID': order_id, 'TotalOrderValue': value, 'TotalQuantity': 1,
+         'MarginPercentage': 10.0, 'OrderStatus': status, 'watermark': watermark}
+        for order_id, value, status, watermark in rows
+    ])
+
+
+class FakeOrderDatabase:
+    """Answers the resync query with all orders and the delta query with the changed ones"""
+
+    def __init__(self, orders, changes):
+        self.orders = orders
+        self.changes = changes
+        self.watermarks = []
+
+    def execute_scalar(self, statement):
+        return 2026
+
+    def execute_query(self, statement, params=None):
+        if statement is QUERIES.get('customer_order_metrics.delta'):
+            self.watermarks.append(params['watermark'])
+            return self.changes
+        return self.orders
+
+
+@pytest.mark.parametrize('first, second, changed', [
+    (datetime(2026, 1, 1), datetime(2026, 1, 2), datetime(2026, 1, 3)),
+    (b'\x00\x00\x00\x00\x00\x00\x07\xd1', b'\x00\x00\x00\x00\x00\x00\x07\xd2', b'\x00\x00\x00\x00\x00\x00\x08\x00'),
+])
+def test_deltas_follow_the_watermark(first, second, changed):
+    db = FakeOrderDatabase(_orders((1, 100.0, 'Active', first), (2, 50.0, 'Active', second)),
+                           _orders((2, 80.0, 'Active', changed)))
+    metrics = IncrementalOrderMetrics(db, resync_interval=3600)
+    assert metrics.refresh()['value'] == 150.0
+
+    assert metrics.refresh()['value'] == 180.0
+    assert db.watermarks == [second]
+    assert (metrics.stats()['resyncs'], metrics.stats()['deltas']) == (1, 1)
+
+
+def test_unusable_watermark_raises():
+    with pytest.raises(WatermarkError):
+        max_watermark(pd.Series([None, None]))
+    with pytest.raises(WatermarkError):
+        max_watermark(pd.Series(['not a date']))
+
+    db = FakeOrderDatabase(_orders((1, 100.0, 'Active', None)), _orders())
+    with pytest.raises(WatermarkError):
+        IncrementalOrderMetrics(db).refresh()
@@ -0,0 +1,28 @@
+"""
+Shared cache tests for ZXY Business Intelligence Dashboard
+"""
+
+import os
+
+import pytest
+
+from app.shared_cache import SharedCache
+
+
+def test_values_are_shared_through_the_file(tmp_path):
+    path = str(tmp_path / 'cache' / 'cache.db')
+    writer, reader = SharedCache(path), SharedCache(path)
+    writer.set(('get_kpi_data',), [{'id': 'sales'}], ttl=60, stale_ttl=60)
+    value, fresh_for, stale_for = reader.get(('get_kpi_data',))
+    assert value == [{'id': 'sales'}]
+    assert 0 < fresh_for <= 60 < stale_for
+    assert oct(os.stat(tmp_path / 'cache').st_mode & 0o777) == oct(0o700)
+
+
+def test_refuses_a_directory_others_can_write(tmp_path):
+    directory = tmp_path / 'cache'
+    directory.mkdir()
+    os.chmod(directory, 0o777)
+    with pytest.raises(PermissionError):
+        SharedCache(str(directory / 'cache.db'))
+    assert not (directory / 'cache.db').exists()
@@ -0,0 +1,94 @@
+"""
+Single-flight coalescing tests for ZXY Business Intelligence Dashboard
+"""
+
+import threading
+
+import pytest
+
+from config.single_flight import SingleFlight
+
+CALLERS = 20
+
+
+def _run_concurrently(flight, fn, key='query'):
+    """Call flight.do(key, fn) from CALLERS threads, returning results and errors"""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results, errors
+
+
+def _slow_query(started, release, executions, result):
+    """A query that blocks until released, counting its executions"""
+    def query():
+        executions.append(1)
+        started.set()
+        release.wait(timeout=10)
+        return result
+    return query
+
+
+@pytest.mark.parametrize('cross_worker', [False, True])
+def test_identical_concurrent_calls_execute_once(tmp_path, cross_worker):
+    flight = SingleFlight('test', lock_dir=str(tmp_path / 'flights') if cross_worker else None)
+    started, release, executions = threading.Event(), threading.Event(), []
+    query = _slow_query(started, release, executions, {'rows': [1, 2, 3]})
+
+    outcome = {}
+    runner = threading.Thread(target=lambda: outcome.update(zip(('results', 'errors'),
+                                                                _run_concurrently(flight, query))))
+    runner.start()
+    assert started.wait(timeout=10)
+    # Let every caller reach the in-flight call before the query returns
+    while flight.stats()['coalesced'] < CALLERS - 1:
+        threading.Event().wait(0.005)
+    release.set()
+    runner.join(timeout=10)
+
+    assert len(executions) == 1
+    assert outcome['errors'] == []
+    assert outcome['results'] == [{'rows': [1, 2, 3]}] * CALLERS
+    # Followers get copies, so one caller mutating its result cannot affect another
+    assert len({id(result) for result in outcome['results']}) == CALLERS
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight('test')
+    started, release = threading.Event(), threading.Event()
+
+    def failing_query():
+        started.set()
+        release.wait(timeout=10)
+        raise RuntimeError('database unavailable')
+
+    outcome = {}
+    runner = threading.Thread(target=lambda: outcome.update(zip(('results', 'errors'),
+                                                                _run_concurrently(flight, failing_query))))
+    runner.start()
+    assert started.wait(timeout=10)
+    while flight.stats()['coalesced'] < CALLERS - 1:
+        threading.Event().wait(0.005)
+    release.set()
+    runner.join(timeout=10)
+
+    assert outcome['results'] == []
+    assert len(outcome['errors']) == CALLERS
+    assert flight.stats()['executions'] == 1
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight('test')
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    assert flight.stats()['executions'] == 2
@@ -0,0 +1,64 @@
+"""
+Dashboard snapshot tests for ZXY Business Intelligence Dashboard
+"""
+
+import os
+import time
+
+import pytest
+
+from app.snapshots import SnapshotStore, SnapshotScheduler
+
+
+class StaticFanout:
+    """Section fan-out answering every section with the number of fetches so far"""
+
+    def __init__(self, errors=None):
+        self.fetches = 0
+        self.errors = errors or {}
+
+    def fetch(self, names):
+        self.fetches += 1
+        return {name: self.fetches for name in names}, dict(self.errors)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_sections_that_failed_keep_the_previous_snapshot(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots' / 'snapshots.db'))
+    fanout = StaticFanout()
+    scheduler = SnapshotScheduler(store, fanout, ['kpis', 'alerts'])
+    scheduler.run_once()
+
+    fanout.errors = {'kpis': 'Database unavailable, served sample data'}
+    scheduler.run_once()
+    assert store.read('kpis').payload == 1
+    assert store.read('alerts').payload == 2
+
+
+def test_refresh_requested_by_another_worker_wakes_the_leader(tmp_path):
+    path = str(tmp_path / 'snapshots' / 'snapshots.db')
+    fanout = StaticFanout()
+    scheduler = SnapshotScheduler(SnapshotStore(path), fanout, ['kpis'], interval=3600, poll_interval=0.02)
+    scheduler.ensure_started()
+    assert _wait_for(lambda: scheduler.runs == 1)
+
+    # A second store on the same file stands in for a worker that is not the leader
+    other_worker = SnapshotStore(path)
+    assert other_worker.request_refresh() == 1
+    assert other_worker.read('kpis') is None
+    assert _wait_for(lambda: other_worker.read('kpis') is not None)
+    assert other_worker.read('kpis').payload == 2
+
+
+def test_refuses_a_directory_others_can_write(tmp_path):
+    directory = tmp_path / 'snapshots'
+    directory.mkdir()
+    os.chmod(directory, 0o757)
+    with pytest.raises(PermissionError):
+        SnapshotStore(str(directory / 'snapshots.db'))
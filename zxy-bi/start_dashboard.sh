@@ -22,7 +22,7 @@ export FLASK_ENV=production
 
 # Start the application with Gunicorn
 echo "   🌐 Starting server on http://18.140.79.12:80"
-gunicorn -w 4 -b 0.0.0.0:80 app:app --daemon
+gunicorn -c gunicorn.conf.py -w 4 -b 0.0.0.0:80 app:app --daemon
 
 echo "   ✅ ZXY Dashboard started successfully!"
 echo "   🌐 Access at: http://18.140.79.12:80"